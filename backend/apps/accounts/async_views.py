@@ -0,0 +1,26 @@
+from django.contrib.auth import get_user_model
+
+from apps.core.async_views import AsyncAPIView, UseSyncView
+
+from .authentication import TokenClaimsUser
+from .views import ProfileView
+
+
+class AsyncProfileView(AsyncAPIView):
+    view_class = ProfileView
+    conditional = True
+
+    async def get_etag_parts(self, view, request):
+        if isinstance(request.user, TokenClaimsUser):
+            # JWT_STATELESS_AUTH: the validators need the row, not just the claims
+            try:
+                await request.user.aload()
+            except get_user_model().DoesNotExist:
+                raise UseSyncView
+        return view.get_etag_parts(request)
+
+    def get_last_modified(self, view, request):
+        return view.get_last_modified(request)
+
+    async def get(self, view, request, *args, **kwargs):
+        return self.render(view, view.get_serializer(request.user).data)
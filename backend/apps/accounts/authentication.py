@@ -0,0 +1,187 @@
+import logging
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.functional import SimpleLazyObject, empty
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from apps.core.async_cache import async_cache
+from apps.core.routers import afresh_reads, fresh_reads
+
+logger = logging.getLogger(__name__)
+
+
+def _snapshot_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def _snapshot_fields():
+    return [field.attname for field in get_user_model()._meta.concrete_fields]
+
+
+def _from_snapshot(snapshot):
+    # Rows cached before a schema change are treated as misses
+    names = _snapshot_fields()
+    if not isinstance(snapshot, dict) or list(snapshot) != names:
+        return None
+    return get_user_model().from_db(DEFAULT_DB_ALIAS, names, list(snapshot.values()))
+
+
+def _load_snapshot(user_id):
+    """The user row as a dict in concrete field order, from the primary."""
+    with fresh_reads():
+        return get_user_model().objects.values(*_snapshot_fields()).get(pk=user_id)
+
+
+def get_user_snapshot(user_id):
+    """The user, from a short-lived cached copy of its row when there is one.
+
+    Raises User.DoesNotExist. Every write to the user deletes the copy, see
+    invalidate_user_snapshot().
+    """
+    key = _snapshot_key(user_id)
+    try:
+        user = _from_snapshot(cache.get(key))
+        if user is not None:
+            return user
+    except Exception as e:
+        logger.error(f"Failed to read user snapshot {user_id}: {e}")
+
+    snapshot = _load_snapshot(user_id)
+    try:
+        cache.set(key, snapshot, settings.AUTH_USER_SNAPSHOT_TIMEOUT)
+    except Exception as e:
+        logger.error(f"Failed to cache user snapshot {user_id}: {e}")
+    return _from_snapshot(snapshot)
+
+
+async def aget_user_snapshot(user_id):
+    """Async get_user_snapshot()."""
+    key = _snapshot_key(user_id)
+    try:
+        user = _from_snapshot(await async_cache.get(key))
+        if user is not None:
+            return user
+    except Exception as e:
+        logger.error(f"Failed to read user snapshot {user_id}: {e}")
+
+    async with afresh_reads():
+        snapshot = await get_user_model().objects.values(*_snapshot_fields()).aget(pk=user_id)
+    try:
+        await async_cache.set(key, snapshot, settings.AUTH_USER_SNAPSHOT_TIMEOUT)
+    except Exception as e:
+        logger.error(f"Failed to cache user snapshot {user_id}: {e}")
+    return _from_snapshot(snapshot)
+
+
+def invalidate_user_snapshot(*user_ids):
+    """Drop the cached rows of these users; call after any write to them."""
+    try:
+        cache.delete_many([_snapshot_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.error(f"Failed to invalidate user snapshots {user_ids}: {e}")
+
+
+class TokenClaimsUser(SimpleLazyObject):
+    """request.user answered from the access token's claims.
+
+    id, pk, username and is_active come from the token; touching anything
+    else (or assigning it to a foreign key) loads the user snapshot.
+    """
+
+    def __init__(self, token):
+        # simplejwt writes the id as a string
+        user_id = get_user_model()._meta.pk.to_python(token[jwt_settings.USER_ID_CLAIM])
+        super().__init__(lambda: get_user_snapshot(user_id))
+        self.__dict__['_claims'] = {
+            'pk': user_id,
+            'username': token.get('username'),
+            'is_active': token.get('is_active', True),
+        }
+
+    def __getattr__(self, name):
+        value = self.__dict__['_claims'].get(name)
+        if value is not None:
+            return value
+        return super().__getattr__(name)
+
+    # SimpleLazyObject would load the user for these
+    id = pk = property(lambda self: self._claims['pk'])
+    is_authenticated = True
+    is_anonymous = False
+
+    def __bool__(self):
+        # IsAuthenticated tests request.user itself; no need to load it for that
+        return True
+
+    async def aload(self):
+        """Load the user snapshot without blocking, for async views.
+
+        Raises User.DoesNotExist.
+        """
+        if self._wrapped is empty:
+            self._wrapped = await aget_user_snapshot(self.pk)
+        return self
+
+    def __eq__(self, other):
+        return isinstance(other, (TokenClaimsUser, get_user_model())) and other.pk == self.pk
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that reads the user from the cached snapshot.
+
+    A valid token costs one cache read instead of a query. With
+    JWT_STATELESS_AUTH it costs nothing at all: request.user is built from
+    the token's claims, so a deactivated user keeps access until their
+    access token expires.
+    """
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        if settings.JWT_STATELESS_AUTH:
+            return self._claims_user(validated_token)
+        try:
+            user = get_user_snapshot(user_id)
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        self._check_user(user, validated_token)
+        return user
+
+    async def aget_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        if settings.JWT_STATELESS_AUTH:
+            return self._claims_user(validated_token)
+        try:
+            user = await aget_user_snapshot(user_id)
+        except get_user_model().DoesNotExist:
+            raise AuthenticationFailed(_('User not found'), code='user_not_found')
+        self._check_user(user, validated_token)
+        return user
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+    def _claims_user(self, validated_token):
+        if not validated_token.get('is_active', True):
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        return TokenClaimsUser(validated_token)
+
+    def _check_user(self, user, validated_token):
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+        if jwt_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+        ):
+            raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .hashing import check_password, wait_as_if_hashing
+
+UserModel = get_user_model()
+
+
+class BoundedHashingBackend(ModelBackend):
+    """ModelBackend whose password checks run on the bounded hashing executor.
+
+    Unknown emails are rejected without hashing, after waiting about as long
+    as a hash takes. May raise HashingBusy.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            wait_as_if_hashing()
+            return None
+        if check_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
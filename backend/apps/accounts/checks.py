@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+from .tokens import blacklist_shares_default_cache
+
+
+@register(Tags.security, Tags.caches)
+def check_token_blacklist_cache(app_configs, **kwargs):
+    if settings.DEBUG:
+        return []
+    errors = []
+    backend = settings.CACHES.get(settings.TOKEN_BLACKLIST_CACHE, {}).get('BACKEND', '')
+    if 'locmem' in backend.lower():
+        errors.append(Warning(
+            'TOKEN_BLACKLIST_CACHE is a local-memory cache: revocations are per process and lost on restart.',
+            hint='Use a Redis cache with maxmemory-policy noeviction.',
+            id='accounts.W001',
+        ))
+    if blacklist_shares_default_cache():
+        errors.append(Warning(
+            'TOKEN_BLACKLIST_CACHE shares storage with the default cache: clearing or evicting '
+            'cached pages also un-revokes refresh tokens.',
+            hint='Point it at its own Redis database (TOKEN_BLACKLIST_REDIS_URL).',
+            id='accounts.W002',
+        ))
+    return errors
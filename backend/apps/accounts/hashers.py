@@ -0,0 +1,49 @@
+import base64
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+def scrypt_maxmem(n, r, p):
+    """Bytes OpenSSL needs for these scrypt parameters, with some headroom."""
+    return 128 * r * (n + p + 2) + 1024 * 1024
+
+
+class ScryptPasswordHasher(hashers.ScryptPasswordHasher):
+    """Django's scrypt hasher with its cost taken from settings.
+
+    Stored hashes keep the 'scrypt' format, so raising PASSWORD_SCRYPT_*
+    later re-hashes each user on their next login. Django passes maxmem=0,
+    which leaves OpenSSL's 32 MiB limit in place; it is sized to the
+    parameters instead, so work factors above 2**14 work.
+    """
+
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_WORK_FACTOR
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_BLOCK_SIZE
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_PARALLELISM
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=n,
+            r=r,
+            p=p,
+            maxmem=scrypt_maxmem(n, r, p),
+            dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+from django.utils.crypto import get_random_string
+
+logger = logging.getLogger(__name__)
+
+# Weight of the newest sample in the average hash time
+LATENCY_SMOOTHING = 0.2
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+_latency = None
+
+
+class HashingBusy(Exception):
+    """Every hashing slot of this process is taken; try again shortly."""
+
+
+def get_executor():
+    global _executor, _slots
+    with _executor_lock:
+        if _executor is None:
+            workers = settings.PASSWORD_HASHING_WORKERS
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hashing')
+            # Hashes running plus hashes waiting for a worker
+            _slots = threading.BoundedSemaphore(workers + settings.PASSWORD_HASHING_MAX_PENDING)
+        return _executor
+
+
+def _acquire_slot():
+    get_executor()
+    if not _slots.acquire(blocking=False):
+        raise HashingBusy()
+
+
+def _observe(seconds):
+    global _latency
+    _latency = seconds if _latency is None else (
+        (1 - LATENCY_SMOOTHING) * _latency + LATENCY_SMOOTHING * seconds
+    )
+
+
+def run_hashing(func, *args):
+    """func(*args) on the hashing executor, from the calling request thread.
+
+    Raises HashingBusy at once instead of queueing when the executor already
+    has PASSWORD_HASHING_MAX_PENDING hashes waiting, so a burst of logins
+    cannot park every worker thread behind the CPU.
+    """
+    _acquire_slot()
+    started = time.perf_counter()
+    try:
+        future = _executor.submit(func, *args)
+    except BaseException:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda future: _slots.release())
+    result = future.result()
+    _observe(time.perf_counter() - started)
+    return result
+
+
+def check_password(user, password):
+    """user.check_password(), hashing on the executor.
+
+    A correct password stored with outdated hasher settings is re-hashed
+    with the current ones and saved.
+    """
+    is_correct, must_update = run_hashing(verify_password, password, user.password)
+    if is_correct and must_update:
+        user.password = run_hashing(make_password, password)
+        user.save(update_fields=['password'])
+        logger.info(f"Upgraded the password hash of user {user.pk}")
+    return is_correct
+
+
+def wait_as_if_hashing():
+    """Take as long as a password check would, without hashing.
+
+    Used for unknown emails: the caller learns nothing from the timing and
+    no CPU is spent. Busy executors are reported the same way as for a
+    real check.
+    """
+    if _latency is None:
+        # Nothing measured in this process yet; one real hash sets the pace
+        run_hashing(make_password, get_random_string(12))
+        return
+    _acquire_slot()
+    _slots.release()
+    time.sleep(_latency)
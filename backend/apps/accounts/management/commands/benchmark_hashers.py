@@ -0,0 +1,96 @@
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import get_hasher, get_hashers
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from apps.accounts.hashers import scrypt_maxmem
+
+PASSWORD = 'benchmark-password'
+
+
+def time_verify(hasher, encoded, iterations):
+    """Seconds per verify() of encoded, the median of iterations runs."""
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        if not hasher.verify(PASSWORD, encoded):
+            raise CommandError(f'{hasher.algorithm} failed to verify its own hash')
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def threaded_rate(hasher, encoded, threads, iterations):
+    """Verifies per second with threads hashing at once."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(lambda _: hasher.verify(PASSWORD, encoded), range(threads * iterations)))
+    return threads * iterations / (time.perf_counter() - started)
+
+
+class Command(BaseCommand):
+    help = (
+        'Time password verification for each configured hasher and for a range of scrypt '
+        'work factors, as logins per second per core, to pick PASSWORD_SCRYPT_WORK_FACTOR.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=5, help='Verifies timed per hasher')
+        parser.add_argument(
+            '--work-factors', type=int, nargs='+', default=[14, 15, 16, 17],
+            help='scrypt work factors to try, as powers of two'
+        )
+        parser.add_argument(
+            '--threads', type=int, default=0,
+            help='Also measure the rate with this many threads hashing at once'
+        )
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+
+        results = []
+        for hasher in get_hashers():
+            if hasher.library:
+                try:
+                    hasher._load_library()
+                except ValueError:
+                    continue  # e.g. argon2-cffi or bcrypt not installed
+            results.append(self.measure(hasher.algorithm, hasher, options))
+
+        preferred = get_hasher()
+        if preferred.algorithm == 'scrypt':
+            for exponent in options['work_factors']:
+                with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2**exponent):
+                    results.append(self.measure(f'scrypt 2**{exponent}', get_hasher(), options))
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'hasher':<24} {'ms/login':>9} {'logins/s/core':>14} {'threaded/s':>11} {'MiB':>6}")
+        for result in results:
+            threaded = result.get('threaded_per_second')
+            memory = result.get('memory_mib')
+            self.stdout.write(
+                f"{result['hasher']:<24} {result['ms_per_login']:>9.1f} {result['logins_per_core']:>14.1f} "
+                f"{f'{threaded:.1f}' if threaded else '-':>11} {f'{memory:.0f}' if memory else '-':>6}"
+            )
+        self.stdout.write(self.style.SUCCESS(f'✓ New passwords use {preferred.algorithm}'))
+
+    def measure(self, name, hasher, options):
+        encoded = hasher.encode(PASSWORD, hasher.salt())
+        seconds = time_verify(hasher, encoded, options['iterations'])
+        result = {
+            'hasher': name,
+            'ms_per_login': seconds * 1000,
+            'logins_per_core': 1 / seconds,
+        }
+        if hasher.algorithm == 'scrypt':
+            result['memory_mib'] = scrypt_maxmem(hasher.work_factor, hasher.block_size, hasher.parallelism) / 2**20
+        if options['threads']:
+            result['threaded_per_second'] = threaded_rate(hasher, encoded, options['threads'], options['iterations'])
+        return result
@@ -0,0 +1,70 @@
+from datetime import timezone as dt_timezone
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.accounts.tokens import blacklist_jti
+
+# simplejwt's token_blacklist app; it is not installed, so no models here
+OUTSTANDING_TABLE = 'token_blacklist_outstandingtoken'
+BLACKLISTED_TABLE = 'token_blacklist_blacklistedtoken'
+
+
+def to_epoch(value):
+    """Epoch seconds of an expires_at value as the raw cursor returns it."""
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    if timezone.is_naive(value):
+        # Stored in UTC with USE_TZ
+        value = value.replace(tzinfo=dt_timezone.utc)
+    return int(value.timestamp())
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the unexpired entries of simplejwt's token_blacklist tables into the cache "
+        'blacklist (TOKEN_BLACKLIST_CACHE). Expired ones are skipped: those tokens are '
+        'rejected anyway. --drop-tables removes both tables afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--drop-tables', action='store_true',
+            help='Drop the token_blacklist tables and their migration records once copied'
+        )
+
+    def handle(self, *args, **options):
+        tables = connection.introspection.table_names()
+        if BLACKLISTED_TABLE not in tables or OUTSTANDING_TABLE not in tables:
+            self.stdout.write('No token_blacklist tables; nothing to migrate')
+            return
+
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT o.jti, o.expires_at FROM {qn(OUTSTANDING_TABLE)} o '
+                f'JOIN {qn(BLACKLISTED_TABLE)} b ON b.token_id = o.id '
+                f'WHERE o.expires_at > %s',
+                [timezone.now()]
+            )
+            rows = cursor.fetchall()
+
+        now = timezone.now().timestamp()
+        copied = 0
+        for jti, expires_at in rows:
+            exp = to_epoch(expires_at)
+            if exp > now:
+                blacklist_jti(jti, exp)
+                copied += 1
+        self.stdout.write(f'Blacklisted {copied} unexpired tokens in the cache')
+
+        if options['drop_tables']:
+            with connection.cursor() as cursor:
+                # The blacklist references the outstanding tokens
+                cursor.execute(f'DROP TABLE {qn(BLACKLISTED_TABLE)}')
+                cursor.execute(f'DROP TABLE {qn(OUTSTANDING_TABLE)}')
+                cursor.execute('DELETE FROM django_migrations WHERE app = %s', ['token_blacklist'])
+            self.stdout.write(f'Dropped {BLACKLISTED_TABLE} and {OUTSTANDING_TABLE}')
+        self.stdout.write(self.style.SUCCESS('✓ Done'))
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from apps.accounts.authentication import invalidate_user_snapshot
+from apps.tasks.models import Product
+
+User = get_user_model()
+
+
+def actual_products_count():
+    """The user's product count as a subquery, for use inside an UPDATE."""
+    counts = (
+        Product.objects
+        .filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(count=Count('id'))
+        .values('count')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalised User.products_count counters and repair drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report users whose counter has drifted',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of users updated per query',
+        )
+
+    def handle(self, *args, **options):
+        drifted = (
+            User.objects
+            .annotate(actual_count=Count('products'))
+            .exclude(products_count=F('actual_count'))
+            .only('id', 'products_count')
+            .order_by('pk')
+        )
+
+        batch = []
+        repaired = 0
+        for user in drifted.iterator(chunk_size=options['batch_size']):
+            self.stdout.write(
+                f'  User {user.pk}: stored {user.products_count}, actual {user.actual_count}'
+            )
+            batch.append(user.pk)
+            if len(batch) >= options['batch_size']:
+                repaired += self.flush(batch, options['dry_run'])
+                batch = []
+        repaired += self.flush(batch, options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{repaired} user counter(s) have drifted'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Repaired {repaired} user counter(s)'))
+
+    def flush(self, user_ids, dry_run):
+        if not user_ids or dry_run:
+            return len(user_ids)
+        # Counted by the UPDATE itself, so products created or deleted since
+        # the read above are not overwritten by a stale count
+        User.objects.filter(pk__in=user_ids).update(products_count=actual_products_count())
+        invalidate_user_snapshot(*user_ids)
+        return len(user_ids)
@@ -0,0 +1,35 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_products_count(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    Product = apps.get_model('tasks', 'Product')
+    db_alias = schema_editor.connection.alias
+    counts = (
+        Product.objects.using(db_alias)
+        .filter(user=OuterRef('pk'))
+        .order_by()
+        .values('user')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    User.objects.using(db_alias).update(products_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_products_count, migrations.RunPython.noop),
+    ]
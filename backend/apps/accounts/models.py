@@ -9,10 +9,14 @@ class User(AbstractUser):
     first_name = models.CharField(max_length=30, blank=True)
     last_name = models.CharField(max_length=30, blank=True)
     avatar = models.ImageField(upload_to='avatars/', blank=True, null=True)
+    # sha256 of the avatar; names its derivatives, see apps.tasks.images
+    avatar_hash = models.CharField(max_length=64, blank=True, editable=False)
     bio = models.TextField(max_length=500, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Denormalised Product count, kept in sync by apps.tasks.signals
+    products_count = models.PositiveIntegerField(default=0, editable=False)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ['username']
@@ -23,6 +27,13 @@ class User(AbstractUser):
         verbose_name_plural = "Users"
         
         
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the avatar as loaded so signals can detect a new upload
+        instance._loaded_avatar = instance.__dict__.get('avatar')
+        return instance
+
     @property 
     def full_name(self):
         return f"{self.first_name} {self.last_name}" 
\ No newline at end of file
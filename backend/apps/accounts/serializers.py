@@ -1,7 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer as BaseTokenRefreshSerializer
+from apps.tasks.serializers import ImageSrcsetField
+
 from .models import User
+from .tokens import RefreshToken
 
 
 class UserRegisterSerializer(serializers.ModelSerializer):
@@ -67,23 +71,18 @@ class UserLoginSerializer(serializers.Serializer):
 
 class UserProfileSerializer(serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()
-    list_count = serializers.SerializerMethodField()
+    list_count = serializers.IntegerField(source='products_count', read_only=True)
+    avatar_srcset = ImageSrcsetField(source='avatar_hash')
 
     class Meta:
         model = User
         fields = (
             'id', 'username', 'email', 'first_name', 'last_name',
-            'full_name', 'avatar', 'bio', 'created_at', 'updated_at',
+            'full_name', 'avatar', 'avatar_srcset', 'bio', 'created_at', 'updated_at',
             'list_count'
         )
         read_only_fields = ('id', 'created_at', 'updated_at')
 
-    def get_list_count(self, obj):
-        try:
-            return obj.products.count()
-        except Exception:
-            return 0
-
 
 class UserUpdateSerializer(serializers.ModelSerializer):
     class Meta:
@@ -96,7 +95,8 @@ class UserUpdateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
+        # Restrict the UPDATE so a stale in-memory products_count is never written back
+        instance.save(update_fields=[*validated_data, 'updated_at'])
         return instance
 
 
@@ -124,5 +124,10 @@ class ChangePasswordSerializer(serializers.Serializer):
     def save(self, **kwargs):
         user = self.context['request'].user
         user.set_password(self.validated_data['new_password'])
-        user.save()
+        user.save(update_fields=['password', 'updated_at'])
         return user
+
+
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    # Checks and, on rotation, blacklists through the cache
+    token_class = RefreshToken
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.tasks.images import image_changed
+
+from .authentication import invalidate_user_snapshot
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    image_changed(instance, 'avatar', 'avatar_hash')
+    invalidate_user_snapshot(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_user_snapshot(instance.pk)
@@ -1,8 +1,21 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
+import json
+import shutil
+import tempfile
+from unittest import mock
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.management import call_command
 from rest_framework.test import APITestCase
 from rest_framework import status
 from django.urls import reverse
+from apps.core.testing import QueryBudgetMixin
+from apps.tasks.models import Product
+from apps.tasks.tests import make_image_upload
+from .serializers import UserProfileSerializer
+from .tokens import RefreshToken
 
 User = get_user_model()
 
@@ -82,3 +95,568 @@ class UserAPITest(APITestCase):
     def test_user_profile_access_requires_authentication(self):
         response = self.client.get(self.profile_url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserProductsCountTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='owner',
+            email='owner@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+
+    def create_product(self, index, user=None):
+        return Product.objects.create(
+            name=f'Product {index}',
+            price=Decimal('10.00'),
+            url=f'https://example.com/product/{index}',
+            user=user or self.user
+        )
+
+    def assertCounts(self, owner, other):
+        self.user.refresh_from_db()
+        self.other.refresh_from_db()
+        self.assertEqual(self.user.products_count, owner)
+        self.assertEqual(self.other.products_count, other)
+
+    def test_counter_follows_create_delete_and_reassign(self):
+        first = self.create_product(1)
+        self.create_product(2)
+        self.assertCounts(2, 0)
+
+        product = Product.objects.get(pk=first.pk)
+        product.user = self.other
+        product.save()
+        self.assertCounts(1, 1)
+
+        product.delete()
+        self.assertCounts(1, 0)
+
+        Product.objects.filter(user=self.user).delete()
+        self.assertCounts(0, 0)
+
+    def test_profile_serialization_needs_no_query(self):
+        self.create_product(1)
+        self.user.refresh_from_db()
+        with self.assertNumQueries(0):
+            data = UserProfileSerializer(self.user).data
+        self.assertEqual(data['list_count'], 1)
+
+    def test_sync_command_repairs_drift(self):
+        self.create_product(1)
+        User.objects.filter(pk=self.user.pk).update(products_count=7)
+        User.objects.filter(pk=self.other.pk).update(products_count=3)
+
+        out = StringIO()
+        call_command('sync_products_count', stdout=out)
+
+        self.assertIn('Repaired 2 user counter(s)', out.getvalue())
+        self.assertCounts(1, 0)
+
+    def test_sync_command_keeps_products_created_meanwhile(self):
+        from .management.commands.sync_products_count import Command
+        User.objects.filter(pk=self.user.pk).update(products_count=7)
+        flush = Command.flush
+
+        def flush_after_a_create(command, user_ids, dry_run):
+            if user_ids:
+                # Created between the drift report and the repair
+                self.create_product(1)
+            return flush(command, user_ids, dry_run)
+
+        with mock.patch.object(Command, 'flush', flush_after_a_create):
+            call_command('sync_products_count', stdout=StringIO())
+        self.assertCounts(1, 0)
+
+
+class UserAvatarDerivativesTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, IMAGE_PROCESSING_SYNC=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def test_avatar_upload_exposes_srcset(self):
+        user = User.objects.get(pk=self.user.pk)
+        self.assertIsNone(UserProfileSerializer(user).data['avatar_srcset'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.avatar = make_image_upload('me.png', size=(400, 400))
+            user.save(update_fields=['avatar', 'updated_at'])
+
+        user.refresh_from_db()
+        srcset = UserProfileSerializer(user).data['avatar_srcset']
+        self.assertIn(f'{user.avatar_hash}/thumb.webp 160w', srcset['webp'])
+
+
+class ProfileConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.profile_url = reverse('profile')
+        self.client.force_authenticate(user=self.user)
+
+    def test_profile_answers_304_until_it_changes(self):
+        response = self.client.get(self.profile_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        response = self.client.get(self.profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = self.client.get(self.profile_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.patch(self.profile_url, {'bio': 'Hello'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bio'], 'Hello')
+        self.assertEqual(response.data['email'], 'test@example.com')
+
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+        response = self.client.get(self.profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['bio'], 'Hello')
+
+    def test_new_product_changes_profile_etag(self):
+        etag = self.client.get(self.profile_url)['ETag']
+        Product.objects.create(
+            name='Lamp', price=Decimal('10.00'), url='https://example.com/lamp', user=self.user
+        )
+        self.client.force_authenticate(user=User.objects.get(pk=self.user.pk))
+        response = self.client.get(self.profile_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['list_count'], 1)
+
+
+
+class AsyncProfileViewTest(APITestCase):
+    def setUp(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.auth = f'Bearer {AccessToken.for_user(self.user)}'
+        self.url = reverse('profile')
+
+    def call(self, **extra):
+        from asgiref.sync import async_to_sync
+        from django.test import RequestFactory
+        from .async_views import AsyncProfileView
+        return async_to_sync(AsyncProfileView.as_view())(RequestFactory().get(self.url, **extra))
+
+    def test_matches_the_sync_view(self):
+        expected = self.client.get(self.url, HTTP_AUTHORIZATION=self.auth)
+        response = self.call(HTTP_AUTHORIZATION=self.auth)
+        self.assertEqual(json.loads(response.content), expected.json())
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+        response = self.call(HTTP_AUTHORIZATION=self.auth, HTTP_IF_NONE_MATCH=expected['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_anonymous_is_rejected(self):
+        self.assertEqual(self.call().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_stateless_auth_with_a_cold_cache(self):
+        # request.user comes from the token; the ETag needs the row behind it
+        token = RefreshToken.for_user(self.user).access_token
+        expected = self.client.get(self.url, HTTP_AUTHORIZATION=f'Bearer {token}')
+        cache.clear()
+        response = self.call(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content), expected.json())
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+
+# Most queries each endpoint may run per request, whatever the user owns.
+# Measured with a cold cache, so authentication loads the user row.
+QUERY_BUDGETS = {
+    'register POST': 3,
+    'login POST': 2,
+    'profile GET': 1,
+    'profile PATCH': 2,
+    'token_refresh POST': 1,
+    'logout POST': 1,
+}
+DATA_SIZES = (1, 5, 15)
+
+
+class QueryBudgetTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+        self.calls = 0
+
+    def populate(self, size):
+        """Give the user size products, next to products of other users."""
+        other = User.objects.get_or_create(username='other', email='other@example.com')[0]
+        for i in range(self.user.products.count(), size):
+            for owner in (self.user, other):
+                Product.objects.create(
+                    name=f'Product {i}', price=Decimal('10.00'),
+                    url=f'https://example.com/{owner.username}/{i}', user=owner
+                )
+
+    def check(self, endpoint, request):
+        def make_request():
+            self.calls += 1
+            cache.clear()
+            response = request()
+            self.assertLess(response.status_code, 400, response.data)
+        self.assertQueryBudgetAtSizes(QUERY_BUDGETS[endpoint], DATA_SIZES, self.populate, make_request)
+
+    def test_register(self):
+        self.client.credentials()
+        self.check('register POST', lambda: self.client.post(reverse('register'), {
+            'username': f'new{self.calls}', 'email': f'new{self.calls}@example.com',
+            'password': 'testpass123', 'password_confirm': 'testpass123'
+        }))
+
+    def test_login(self):
+        self.client.credentials()
+        self.check('login POST', lambda: self.client.post(
+            reverse('login'), {'email': 'test@example.com', 'password': 'testpass123'}
+        ))
+
+    def test_profile(self):
+        self.check('profile GET', lambda: self.client.get(reverse('profile')))
+        self.check('profile PATCH', lambda: self.client.patch(reverse('profile'), {'bio': f'Bio {self.calls}'}))
+
+    def test_token_refresh(self):
+        # Rotation blacklists each token it accepts, so every call needs a new one
+        self.check('token_refresh POST', lambda: self.client.post(
+            reverse('token_refresh'), {'refresh': str(RefreshToken.for_user(self.user))}
+        ))
+
+    def test_logout(self):
+        # Each logout needs a token that is not blacklisted yet
+        self.check('logout POST', lambda: self.client.post(
+            reverse('logout'), {'refresh_token': str(RefreshToken.for_user(self.user))}
+        ))
+
+    # change-password has no successful path to budget yet:
+    # ChangePasswordView routes no method to update().
+
+
+class CachedAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+        self.profile_url = reverse('profile')
+
+    def test_cached_user_needs_no_query(self):
+        self.client.get(self.profile_url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.profile_url)
+        self.assertEqual(response.json()['email'], 'test@example.com')
+
+    def test_writes_to_the_user_refresh_the_snapshot(self):
+        self.client.get(self.profile_url)
+        self.client.patch(self.profile_url, {'bio': 'Updated'})
+        self.assertEqual(self.client.get(self.profile_url).json()['bio'], 'Updated')
+
+        # Counter updates bypass save(); they invalidate explicitly
+        Product.objects.create(
+            name='Lamp', price=Decimal('10.00'), url='https://example.com/lamp', user=self.user
+        )
+        self.assertEqual(self.client.get(self.profile_url).json()['list_count'], 1)
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.client.get(self.profile_url)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get(self.profile_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(JWT_STATELESS_AUTH=True)
+    def test_stateless_mode_answers_from_the_claims(self):
+        from .authentication import CachedJWTAuthentication
+        with self.assertNumQueries(0):
+            user = CachedJWTAuthentication().get_user(self.token)
+            self.assertEqual((user.id, user.username, user.is_authenticated), (self.user.pk, 'testuser', True))
+            self.assertTrue(user)
+            self.assertEqual(user, self.user)
+        # Anything else loads the user
+        self.assertEqual(user.email, 'test@example.com')
+        self.assertEqual(self.client.get(self.profile_url).json()['email'], 'test@example.com')
+
+    def test_login_creates_no_session(self):
+        self.client.credentials()
+        response = self.client.post(reverse('login'), {'email': 'test@example.com', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn('sessionid', response.cookies)
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+
+MD5_ONLY = ['django.contrib.auth.hashers.MD5PasswordHasher']
+SCRYPT_FIRST = ['apps.accounts.hashers.ScryptPasswordHasher'] + MD5_ONLY
+
+
+class LoginProtectionTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        with override_settings(PASSWORD_HASHERS=MD5_ONLY):
+            self.user = User.objects.create_user(
+                username='testuser',
+                email='test@example.com',
+                password='testpass123'
+            )
+        self.login_url = reverse('login')
+
+    def login(self, email='test@example.com', password='testpass123'):
+        return self.client.post(self.login_url, {'email': email, 'password': password})
+
+    def test_wrong_password_and_unknown_email_look_alike(self):
+        wrong = self.login(password='wrongpass123')
+        unknown = self.login(email='nobody@example.com')
+        self.assertEqual(wrong.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(unknown.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(wrong.data, unknown.data)
+
+    def test_unknown_email_is_rejected_without_hashing(self):
+        from . import hashing
+        self.login()  # measures the hash time
+        measured = hashing._latency
+        self.assertIsNotNone(measured)
+        self.assertEqual(self.login(email='nobody@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+        # Any hash would have moved the average
+        self.assertEqual(hashing._latency, measured)
+
+    def test_busy_hashing_pool_answers_503(self):
+        from . import hashing
+        hashing.get_executor()
+        held = 0
+        try:
+            while hashing._slots.acquire(blocking=False):
+                held += 1
+            response = self.login()
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            self.assertEqual(response['Retry-After'], '1')
+            self.assertEqual(self.login(email='nobody@example.com').status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        finally:
+            for _ in range(held):
+                hashing._slots.release()
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    @override_settings(LOGIN_RATE_LIMIT_ACCOUNT=(2, 60))
+    def test_failed_logins_lock_the_account(self):
+        for _ in range(2):
+            self.assertEqual(self.login(password='wrongpass123').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.login()
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        # Emails are compared case-insensitively; other accounts are unaffected
+        self.assertEqual(self.login(email='TEST@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.login(email='nobody@example.com').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(LOGIN_RATE_LIMIT_ACCOUNT=(2, 60))
+    def test_successful_login_resets_failures(self):
+        self.assertEqual(self.login(password='wrongpass123').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login(password='wrongpass123').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+
+    @override_settings(LOGIN_RATE_LIMIT_IP=(3, 60))
+    def test_attempts_per_ip_are_limited(self):
+        for _ in range(3):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login().status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_non_object_body_is_a_bad_request(self):
+        for body in ([], 'x', 1, None):
+            with self.subTest(body=body):
+                response = self.client.post(self.login_url, json.dumps(body), content_type='application/json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(LOGIN_RATE_LIMIT_IP=(3, 60))
+    def test_forwarded_for_cannot_reset_the_ip_limit(self):
+        for i in range(3):
+            response = self.client.post(
+                self.login_url, {'email': 'test@example.com', 'password': 'testpass123'},
+                HTTP_X_FORWARDED_FOR=f'203.0.113.{i}'
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(
+            self.login_url, {'email': 'test@example.com', 'password': 'testpass123'},
+            HTTP_X_FORWARDED_FOR='203.0.113.99'
+        )
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_is_read_behind_trusted_proxies(self):
+        from django.conf import settings
+        from django.test import RequestFactory
+        from .throttling import LoginRateLimit
+        request = RequestFactory().post(
+            self.login_url, REMOTE_ADDR='10.0.0.2', HTTP_X_FORWARDED_FOR='198.51.100.7, 203.0.113.5'
+        )
+        self.assertEqual(LoginRateLimit(request, '').ip, '10.0.0.2')
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            # The spoofable leftmost entry is never used
+            self.assertEqual(LoginRateLimit(request, '').ip, '203.0.113.5')
+
+    def test_login_upgrades_the_password_hash(self):
+        with override_settings(PASSWORD_HASHERS=SCRYPT_FIRST, PASSWORD_SCRYPT_WORK_FACTOR=2**10):
+            self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('scrypt$1024$'))
+
+            with override_settings(PASSWORD_SCRYPT_WORK_FACTOR=2**11):
+                self.assertEqual(self.login().status_code, status.HTTP_200_OK)
+                self.user.refresh_from_db()
+                self.assertTrue(self.user.password.startswith('scrypt$2048$'))
+            # A wrong password never rewrites the hash
+            self.assertEqual(self.login(password='wrongpass123').status_code, status.HTTP_401_UNAUTHORIZED)
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('scrypt$2048$'))
+
+    @override_settings(PASSWORD_HASHERS=SCRYPT_FIRST, PASSWORD_SCRYPT_WORK_FACTOR=2**15)
+    def test_scrypt_beyond_the_openssl_default_memory_limit(self):
+        from django.contrib.auth.hashers import check_password, make_password
+        # 2**15 x 8 needs 32 MiB, over what Django's own scrypt hasher allows
+        encoded = make_password('testpass123')
+        self.assertTrue(encoded.startswith('scrypt$32768$'))
+        self.assertTrue(check_password('testpass123', encoded))
+
+    @override_settings(PASSWORD_HASHERS=SCRYPT_FIRST)
+    def test_benchmark_hashers_command(self):
+        out = StringIO()
+        call_command('benchmark_hashers', iterations=1, work_factors=[10, 11], threads=2, json=True, stdout=out)
+        results = {result['hasher']: result for result in json.loads(out.getvalue())}
+        self.assertEqual(set(results), {'scrypt', 'md5', 'scrypt 2**10', 'scrypt 2**11'})
+        self.assertGreater(results['scrypt 2**10']['logins_per_core'], 0)
+        self.assertIn('threaded_per_second', results['md5'])
+        self.assertLess(results['scrypt 2**10']['memory_mib'], results['scrypt 2**11']['memory_mib'])
+
+
+class TokenBlacklistTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches['tokens'].clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.refresh = RefreshToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.refresh.access_token}')
+
+    def refresh_with(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': str(token)})
+
+    def test_logout_revokes_the_refresh_token(self):
+        response = self.client.post(reverse('logout'), {'refresh_token': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.refresh_with(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+        # A second logout with the same token is refused
+        response = self.client.post(reverse('logout'), {'refresh_token': str(self.refresh)})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_rotation_blacklists_the_used_token(self):
+        response = self.refresh_with(self.refresh)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+        self.assertEqual(self.refresh_with(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh_with(response.data['refresh']).status_code, status.HTTP_200_OK)
+
+    def test_blacklist_is_a_cache_lookup(self):
+        from .tokens import is_blacklisted
+        jti = self.refresh['jti']
+        with self.assertNumQueries(0):
+            self.refresh.blacklist()
+        self.assertTrue(is_blacklisted(jti))
+        self.assertFalse(is_blacklisted(RefreshToken.for_user(self.user)['jti']))
+
+    def test_blacklisting_twice_is_refused(self):
+        from rest_framework_simplejwt.exceptions import TokenError
+        from .tokens import blacklist_jti
+        self.refresh.blacklist()
+        # One atomic add: of two concurrent rotations, only one wins
+        with self.assertRaises(TokenError):
+            self.refresh.blacklist()
+        self.assertFalse(blacklist_jti(self.refresh['jti'], self.refresh['exp']))
+
+    def test_migrate_token_blacklist_command(self):
+        from django.db import connection
+        from django.utils import timezone
+        from datetime import timedelta
+        from .tokens import is_blacklisted
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE TABLE token_blacklist_outstandingtoken '
+                '(id integer PRIMARY KEY, jti varchar(255), expires_at timestamp)'
+            )
+            cursor.execute('CREATE TABLE token_blacklist_blacklistedtoken (id integer PRIMARY KEY, token_id integer)')
+            now = timezone.now()
+            cursor.executemany('INSERT INTO token_blacklist_outstandingtoken VALUES (%s, %s, %s)', [
+                (1, 'revoked', now + timedelta(days=1)),
+                (2, 'expired', now - timedelta(days=1)),
+                (3, 'outstanding', now + timedelta(days=1)),
+            ])
+            cursor.executemany('INSERT INTO token_blacklist_blacklistedtoken VALUES (%s, %s)', [(1, 1), (2, 2)])
+
+        out = StringIO()
+        call_command('migrate_token_blacklist', drop_tables=True, stdout=out)
+        self.assertIn('Blacklisted 1 unexpired tokens', out.getvalue())
+        self.assertTrue(is_blacklisted('revoked'))
+        self.assertFalse(is_blacklisted('expired'))
+        self.assertFalse(is_blacklisted('outstanding'))
+        self.assertNotIn('token_blacklist_outstandingtoken', connection.introspection.table_names())
+
+        out = StringIO()
+        call_command('migrate_token_blacklist', stdout=out)
+        self.assertIn('nothing to migrate', out.getvalue())
+
+    def test_clearing_the_default_cache_keeps_revocations(self):
+        self.client.post(reverse('logout'), {'refresh_token': str(self.refresh)})
+        cache.clear()
+        self.assertEqual(self.refresh_with(self.refresh).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cold_cache_benchmark_refuses_a_shared_blacklist(self):
+        from django.core.management.base import CommandError
+        with override_settings(TOKEN_BLACKLIST_CACHE='default'):
+            with self.assertRaisesMessage(CommandError, 'token blacklist'):
+                call_command('benchmark_api', cold_cache=True, stdout=StringIO())
+
+    def test_unsafe_blacklist_cache_is_reported(self):
+        from django.conf import settings
+        from .checks import check_token_blacklist_cache
+        locmem = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'shared'}
+        redis = {'BACKEND': 'django_redis.cache.RedisCache', 'LOCATION': 'redis://cache:6379/1'}
+        cases = [
+            ({'default': redis, 'tokens': {**redis, 'LOCATION': 'redis://tokens:6379/0'}}, 'tokens', []),
+            ({'default': redis, 'tokens': locmem}, 'tokens', ['accounts.W001']),
+            ({'default': redis, 'tokens': redis}, 'tokens', ['accounts.W002']),
+            ({'default': redis}, 'default', ['accounts.W002']),
+        ]
+        for caches_setting, alias, expected in cases:
+            with self.subTest(caches=caches_setting, alias=alias):
+                with override_settings(DEBUG=False, CACHES=caches_setting, TOKEN_BLACKLIST_CACHE=alias):
+                    self.assertEqual([error.id for error in check_token_blacklist_cache(None)], expected)
+        self.assertEqual(settings.TOKEN_BLACKLIST_CACHE, 'tokens')
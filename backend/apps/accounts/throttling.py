@@ -0,0 +1,78 @@
+import hashlib
+import logging
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+
+def _window(window):
+    """Index of the current fixed window and seconds until it ends."""
+    now = time.time()
+    return int(now // window), math.ceil(window - now % window)
+
+
+class LoginRateLimit:
+    """Fixed-window login limits kept in the cache.
+
+    LOGIN_RATE_LIMIT_IP caps attempts per client IP, LOGIN_RATE_LIMIT_ACCOUNT
+    caps failed attempts per email (known or not). Both are (count, seconds).
+    The checks run before any hashing. A cache outage lets logins through.
+    """
+
+    def __init__(self, request, email):
+        # REMOTE_ADDR, or the client address the trusted proxies recorded (NUM_PROXIES)
+        self.ip = BaseThrottle().get_ident(request)
+        self.email = str(email or '').strip().lower()
+
+    def _key(self, scope, ident, index):
+        # Emails stay out of the cache keys
+        digest = hashlib.sha256(ident.encode()).hexdigest()[:32]
+        return f'login:{scope}:{digest}:{index}'
+
+    def _account_key(self):
+        index, _ = _window(settings.LOGIN_RATE_LIMIT_ACCOUNT[1])
+        return self._key('account', self.email, index)
+
+    def check(self):
+        """Count this attempt; raise Throttled when a limit is reached."""
+        try:
+            limit, window = settings.LOGIN_RATE_LIMIT_IP
+            index, remaining = _window(window)
+            key = self._key('ip', self.ip or '', index)
+            cache.add(key, 0, window)
+            if cache.incr(key) > limit:
+                raise Throttled(wait=remaining)
+
+            if self.email:
+                limit, window = settings.LOGIN_RATE_LIMIT_ACCOUNT
+                index, remaining = _window(window)
+                if (cache.get(self._key('account', self.email, index)) or 0) >= limit:
+                    raise Throttled(wait=remaining)
+        except Throttled:
+            raise
+        except Exception as e:
+            logger.error(f"Login rate limit check failed: {e}")
+
+    def failed(self):
+        if not self.email:
+            return
+        try:
+            key = self._account_key()
+            cache.add(key, 0, settings.LOGIN_RATE_LIMIT_ACCOUNT[1])
+            cache.incr(key)
+        except Exception as e:
+            logger.error(f"Failed to count a failed login: {e}")
+
+    def succeeded(self):
+        if not self.email:
+            return
+        try:
+            cache.delete(self._account_key())
+        except Exception as e:
+            logger.error(f"Failed to reset failed logins: {e}")
@@ -0,0 +1,86 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_to_epoch
+
+logger = logging.getLogger(__name__)
+
+
+def _blacklist_key(jti):
+    return f'jwt:blacklist:{jti}'
+
+
+def blacklist_jti(jti, exp):
+    """Blacklist a token id until exp (epoch seconds), when the token expires anyway.
+
+    Returns False when it already was blacklisted. The entry's TTL is the
+    token's remaining lifetime, so the blacklist never outgrows the tokens
+    still alive.
+    """
+    ttl = max(int(exp) - datetime_to_epoch(aware_utcnow()), 1)
+    return caches[settings.TOKEN_BLACKLIST_CACHE].add(_blacklist_key(jti), 1, ttl)
+
+
+def is_blacklisted(jti):
+    return caches[settings.TOKEN_BLACKLIST_CACHE].get(_blacklist_key(jti)) is not None
+
+
+def blacklist_shares_default_cache():
+    """True when clearing the default cache would also drop blacklist entries."""
+    alias = settings.TOKEN_BLACKLIST_CACHE
+    if alias == 'default':
+        return True
+    default, tokens = settings.CACHES['default'], settings.CACHES.get(alias, {})
+    return (default.get('BACKEND'), default.get('LOCATION')) == (tokens.get('BACKEND'), tokens.get('LOCATION'))
+
+
+class RefreshToken(BaseRefreshToken):
+    """Refresh token with username and is_active claims, copied into its access tokens.
+
+    JWT_STATELESS_AUTH builds request.user from them, see
+    apps.accounts.authentication.TokenClaimsUser.
+
+    Blacklisting keeps the jti in the TOKEN_BLACKLIST_CACHE instead of
+    simplejwt's token_blacklist tables: one key lookup per check, and no
+    outstanding-token rows at all.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['is_active'] = user.is_active
+        return token
+
+    def verify(self, *args, **kwargs):
+        # Expired or malformed tokens never reach the cache
+        super().verify(*args, **kwargs)
+        self.check_blacklist()
+
+    def check_blacklist(self):
+        try:
+            blacklisted = is_blacklisted(self.payload[jwt_settings.JTI_CLAIM])
+        except Exception as e:
+            # Fail closed: a revoked token must not come back during an outage
+            logger.error(f"Token blacklist check failed: {e}")
+            raise TokenError(_('Token blacklist is unavailable'))
+        if blacklisted:
+            raise TokenError(_('Token is blacklisted'))
+
+    def blacklist(self):
+        """Blacklist this token; raises TokenError if it already was.
+
+        The check and the write are one atomic add, so two concurrent
+        refreshes with the same token cannot both be rotated.
+        """
+        if not blacklist_jti(self.payload[jwt_settings.JTI_CLAIM], self.payload['exp']):
+            raise TokenError(_('Token is blacklisted'))
+
+    def outstand(self):
+        # No outstanding-token list: every unexpired token is valid unless blacklisted
+        return None
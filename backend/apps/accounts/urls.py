@@ -1,12 +1,19 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
 
+if settings.ASYNC_VIEWS:
+    from .async_views import AsyncProfileView
+    profile_view = AsyncProfileView.as_view()
+else:
+    profile_view = views.ProfileView.as_view()
+
 urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('login/', views.LoginView.as_view(), name='login'),
     path('logout/', views.logout_view, name='logout'),
-    path('profile/', views.ProfileView.as_view(), name='profile'),
+    path('profile/', profile_view, name='profile'),
     path('change-password/', views.ChangePasswordView.as_view(), name='change_password'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
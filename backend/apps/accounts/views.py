@@ -1,13 +1,19 @@
+from collections.abc import Mapping
+
 from rest_framework import status, generics, permissions
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
-from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.exceptions import TokenError
-from django.contrib.auth import login
 from django.core.exceptions import ValidationError as DjangoValidationError
 
+from apps.core.conditional import ConditionalGetMixin
+from apps.tasks.cache_utils import invalidate_user_cache
+
+from .hashing import HashingBusy
 from .models import User
+from .throttling import LoginRateLimit
+from .tokens import RefreshToken
 from .serializers import (
     UserRegisterSerializer,
     UserLoginSerializer,
@@ -56,13 +62,23 @@ class LoginView(generics.GenericAPIView):
     permission_classes = [permissions.AllowAny]
 
     def post(self, request, *args, **kwargs):
+        if not isinstance(request.data, Mapping):
+            # JSON bodies such as [] or "x" have no email to rate-limit by
+            return Response(
+                {'error': 'Validation failed', 'details': {'non_field_errors': ['Expected a JSON object']}},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Before any hashing; raises Throttled (429)
+        rate_limit = LoginRateLimit(request, request.data.get('email'))
+        rate_limit.check()
         try:
             serializer = self.get_serializer(data=request.data, context={'request': request})
             serializer.is_valid(raise_exception=True)
 
             user = serializer.save()
+            rate_limit.succeeded()
 
-            login(request, user)
+            # Token-only: no session and no last_login UPDATE
             refresh = RefreshToken.for_user(user)
             access_token = str(refresh.access_token)
             refresh_token = str(refresh)
@@ -77,10 +93,17 @@ class LoginView(generics.GenericAPIView):
                 status=status.HTTP_200_OK
             )
         except ValidationError as e:
+            rate_limit.failed()
             return Response(
                 {'error': 'Authentication failed', 'details': e.detail},
                 status=status.HTTP_401_UNAUTHORIZED
             )
+        except HashingBusy:
+            return Response(
+                {'error': 'Too many logins in progress, try again shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'}
+            )
         except Exception as e:
             return Response(
                 {'error': 'Login failed', 'details': str(e)},
@@ -88,7 +111,7 @@ class LoginView(generics.GenericAPIView):
             )
 
 
-class ProfileView(generics.GenericAPIView):
+class ProfileView(ConditionalGetMixin, generics.RetrieveUpdateAPIView):
     serializer_class = UserProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -100,6 +123,20 @@ class ProfileView(generics.GenericAPIView):
             return UserUpdateSerializer
         return UserProfileSerializer
 
+    def get_etag_parts(self, request):
+        # The user row is already loaded by authentication; no extra query
+        user = request.user
+        return [user.updated_at.isoformat(), user.products_count, user.avatar_hash]
+
+    def get_last_modified(self, request):
+        return request.user.updated_at
+
+    def update(self, request, *args, **kwargs):
+        super().update(request, *args, **kwargs)
+        invalidate_user_cache(request.user.pk)
+        # Answer with the full profile, as GET does
+        return Response(UserProfileSerializer(request.user, context=self.get_serializer_context()).data)
+
 
 class ChangePasswordView(generics.GenericAPIView):
     serializer_class = ChangePasswordSerializer
@@ -0,0 +1,131 @@
+import asyncio
+import time
+import weakref
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+
+try:
+    from django_redis.cache import RedisCache
+    from redis import asyncio as redis_asyncio
+except ImportError:  # optional: fall back to Django's async cache API
+    RedisCache = redis_asyncio = None
+
+from .metrics import record_cache_call
+
+
+def redis_client(params):
+    """A redis.asyncio client for the primary of a django-redis CACHES entry.
+
+    Connects the way django-redis's ConnectionFactory does: the first
+    LOCATION, PASSWORD and socket timeouts from OPTIONS, then
+    CONNECTION_POOL_KWARGS (SSL settings and the like) on top, and
+    REDIS_CLIENT_KWARGS for the client.
+    """
+    location = params['LOCATION']
+    if isinstance(location, str):
+        location = location.split(',')
+    options = params.get('OPTIONS', {})
+    kwargs = {}
+    for option, name in (
+        ('PASSWORD', 'password'),
+        ('SOCKET_TIMEOUT', 'socket_timeout'),
+        ('SOCKET_CONNECT_TIMEOUT', 'socket_connect_timeout'),
+    ):
+        if options.get(option):
+            kwargs[name] = options[option]
+    kwargs.update(options.get('CONNECTION_POOL_KWARGS', {}))
+    pool = redis_asyncio.ConnectionPool.from_url(location[0].strip(), **kwargs)
+    return redis_asyncio.Redis(connection_pool=pool, **options.get('REDIS_CLIENT_KWARGS', {}))
+
+
+class AsyncCache:
+    """Non-blocking access to a cache from async views.
+
+    With django-redis the entries are read and written through
+    redis.asyncio using django-redis's own key format and serializer, so
+    sync and async code share every entry. The local-memory cache does no
+    I/O and is called directly; other backends use Django's async cache
+    methods, which run the sync client in a thread.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        # redis.asyncio connections belong to the event loop that opened them
+        self._clients = weakref.WeakKeyDictionary()
+
+    @property
+    def backend(self):
+        return caches[self.alias]
+
+    def _redis(self):
+        backend = self.backend
+        if redis_asyncio is None or not isinstance(backend, RedisCache):
+            return None
+        params = settings.CACHES[self.alias]
+        if 'SENTINELS' in params.get('OPTIONS', {}):
+            return None  # no sentinel discovery here; use Django's async API
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = redis_client(params)
+            self._clients[loop] = client
+        return client
+
+    def _key(self, key):
+        return self.backend.client.make_key(key)
+
+    async def _timed(self, awaitable):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            record_cache_call(time.perf_counter() - started)
+
+    async def _call(self, method, *args):
+        backend = self.backend
+        if isinstance(backend, LocMemCache):
+            return getattr(backend, method)(*args)
+        return await getattr(backend, f'a{method}')(*args)
+
+    async def get(self, key, default=None):
+        client = self._redis()
+        if client is None:
+            return await self._call('get', key, default)
+        value = await self._timed(client.get(self._key(key)))
+        return default if value is None else self.backend.client.decode(value)
+
+    async def get_many(self, keys):
+        client = self._redis()
+        if client is None:
+            return await self._call('get_many', keys)
+        values = await self._timed(client.mget([self._key(key) for key in keys]))
+        decode = self.backend.client.decode
+        return {key: decode(value) for key, value in zip(keys, values) if value is not None}
+
+    async def set(self, key, value, timeout=None, nx=False):
+        """Store value for timeout seconds (None: no expiry); nx only adds."""
+        client = self._redis()
+        if client is None:
+            if nx:
+                return await self._call('add', key, value, timeout)
+            await self._call('set', key, value, timeout)
+            return True
+        px = int(timeout * 1000) if timeout is not None else None
+        result = await self._timed(
+            client.set(self._key(key), self.backend.client.encode(value), px=px, nx=nx)
+        )
+        return bool(result)
+
+    async def add(self, key, value, timeout=None):
+        return await self.set(key, value, timeout, nx=True)
+
+    async def delete(self, key):
+        client = self._redis()
+        if client is None:
+            return await self._call('delete', key)
+        return bool(await self._timed(client.delete(self._key(key))))
+
+
+async_cache = AsyncCache()
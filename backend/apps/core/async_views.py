@@ -0,0 +1,157 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import InvalidPage
+from django.utils.decorators import classonlymethod
+from rest_framework.exceptions import APIException
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .conditional import conditional_response, make_etag, patch_validators
+from .response_cache import entry_response, render_entry
+
+
+class UseSyncView(Exception):
+    """Raised by an async handler to hand the request to the DRF view."""
+
+
+async def authenticate(request):
+    """JWT authentication with the user row loaded through the async ORM.
+
+    Returns (user, token), or (AnonymousUser, None) without credentials.
+    Any failure raises UseSyncView so DRF answers with its usual 401.
+    """
+    # The configured JWT class, so that a cached user lookup is used here too
+    authenticator = next(
+        (cls() for cls in api_settings.DEFAULT_AUTHENTICATION_CLASSES if issubclass(cls, JWTAuthentication)),
+        JWTAuthentication()
+    )
+    header = authenticator.get_header(request)
+    raw_token = authenticator.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        return AnonymousUser(), None
+
+    User = get_user_model()
+    try:
+        token = authenticator.get_validated_token(raw_token)
+        if hasattr(authenticator, 'aget_user'):
+            # Does its own active and revocation checks
+            return await authenticator.aget_user(token), token
+        user_id = token[jwt_settings.USER_ID_CLAIM]
+        user = await User.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except (APIException, KeyError, User.DoesNotExist):
+        raise UseSyncView
+    if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise UseSyncView
+    if jwt_settings.CHECK_REVOKE_TOKEN and (
+        token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+    ):
+        raise UseSyncView
+    return user, token
+
+
+async def apaginate(view, queryset):
+    """Async counterpart of GenericAPIView.paginate_queryset for page-number pagination.
+
+    Returns the page's rows, or None when the view does not paginate.
+    """
+    paginator = view.paginator
+    if paginator is None:
+        return None
+    if not isinstance(paginator, PageNumberPagination):
+        raise UseSyncView
+
+    request = view.request
+    paginator.request = request
+    page_size = paginator.get_page_size(request)
+    if not page_size:
+        return None
+
+    django_paginator = paginator.django_paginator_class(queryset, page_size)
+    # Paginator.count is a cached_property; fill it without a sync query
+    django_paginator.count = await queryset.acount()
+    try:
+        page = django_paginator.page(paginator.get_page_number(request, django_paginator))
+    except InvalidPage:
+        raise UseSyncView
+    page.object_list = [row async for row in page.object_list]
+    paginator.page = page
+    return page.object_list
+
+
+class AsyncAPIView:
+    """Native async GET/HEAD for a DRF view, for ASGI deployments.
+
+    The DRF view class in ``view_class`` still does content negotiation,
+    permissions and serialization (all CPU-only) while I/O goes through the
+    async ORM and the async cache. Other methods, non-JSON renderers,
+    errors and anything a handler cannot serve (UseSyncView) are passed to
+    the DRF view in a thread, so responses match the sync view exactly.
+
+    Subclasses define ``async def get(self, view, request, *args, **kwargs)``;
+    without one every request goes to the DRF view.
+    """
+    view_class = None
+    # Whether responses carry validators, as with ConditionalGetMixin
+    conditional = False
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        sync_view = sync_to_async(cls.view_class.as_view(**initkwargs))
+        methods = ('GET', 'HEAD') if hasattr(cls, 'get') else ()
+
+        async def view(request, *args, **kwargs):
+            if request.method in methods:
+                self = cls()
+                try:
+                    return await self.dispatch(request, initkwargs, *args, **kwargs)
+                except (UseSyncView, APIException):
+                    pass
+            return await sync_view(request, *args, **kwargs)
+
+        view.view_class = cls
+        # Same as DRF: authentication is by token, not by session cookie
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, initkwargs, *args, **kwargs):
+        view = self.view_class(**initkwargs)
+        view.setup(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        drf_request = view.initialize_request(request, *args, **kwargs)
+        view.request = drf_request
+
+        # Set before initial() so DRF does not authenticate synchronously
+        drf_request.user, drf_request.auth = await authenticate(drf_request)
+        view.initial(drf_request, *args, **kwargs)
+        if drf_request.accepted_renderer.format != 'json':
+            raise UseSyncView
+
+        if not self.conditional:
+            response = await self.get(view, drf_request, *args, **kwargs)
+            return view.finalize_response(drf_request, response, *args, **kwargs)
+
+        etag = make_etag(drf_request, await self.get_etag_parts(view, drf_request))
+        last_modified = self.get_last_modified(view, drf_request)
+        response = conditional_response(drf_request, etag, last_modified)
+        if response is None:
+            response = await self.get(view, drf_request, *args, **kwargs)
+        patch_validators(response, etag, last_modified)
+        return view.finalize_response(drf_request, response, *args, **kwargs)
+
+    async def get_etag_parts(self, view, request):
+        return None
+
+    def get_last_modified(self, view, request):
+        return None
+
+    async def filter_queryset(self, view):
+        # Filter backends may validate parameters against the database
+        return await sync_to_async(view.filter_queryset)(view.get_queryset())
+
+    def render(self, view, data):
+        """Render data with the negotiated renderer into a response."""
+        return entry_response(render_entry(view, data), view.request)
@@ -0,0 +1,65 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(request, parts):
+    """Weak ETag over the validator parts, the user, the full path and the media type."""
+    if not parts:
+        return None
+    media_type = getattr(request, 'accepted_media_type', '')
+    payload = '|'.join(str(part) for part in (
+        *parts, request.user.pk, request.get_full_path(), media_type
+    ))
+    # Weak: the same representation may be sent gzipped or not
+    return 'W/' + quote_etag(hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32])
+
+
+def conditional_response(request, etag, last_modified):
+    """304 response when the client's copy is current, else None."""
+    last_modified = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def patch_validators(response, etag, last_modified):
+    """Add the validators and the revalidation headers to a 200/304 response."""
+    if response.status_code in (200, 304):
+        if etag and not response.has_header('ETag'):
+            response['ETag'] = etag
+        if last_modified and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(int(last_modified.timestamp()))
+        # Always revalidate; the response differs per token
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+class ConditionalGetMixin:
+    """Answer GET/HEAD with 304 Not Modified when the client's copy is current.
+
+    Views provide cheap validators that are checked before the queryset is
+    touched: get_etag_parts() returns values that change whenever the body
+    would (cache namespace versions, updated_at, counters), and
+    get_last_modified() optionally returns a datetime. The ETag also covers
+    the user, the query string and the negotiated media type, so it is
+    safe for per-user and filtered responses.
+    """
+
+    def get_etag_parts(self, request):
+        return None
+
+    def get_last_modified(self, request):
+        return None
+
+    def get_etag(self, request):
+        return make_etag(request, self.get_etag_parts(request))
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        last_modified = self.get_last_modified(request)
+
+        response = conditional_response(request, etag, last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return patch_validators(response, etag, last_modified)
@@ -0,0 +1,20 @@
+from django.db import connections
+
+
+def get_pool_stats():
+    """psycopg pool counters of this process, keyed by database alias."""
+    stats = {}
+    for alias in connections:
+        pool = getattr(connections[alias], 'pool', None)
+        if pool is not None:
+            stats[alias] = pool.get_stats()
+    return stats
+
+
+def close_pools():
+    """Close every connection and pool owned by this process."""
+    for alias in connections:
+        connection = connections[alias]
+        connection.close()
+        if getattr(connection, 'pool', None) is not None:
+            connection.close_pool()
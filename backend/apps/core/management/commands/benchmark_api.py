@@ -0,0 +1,223 @@
+import json
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from apps.accounts.tokens import blacklist_shares_default_cache
+from apps.core.testing import QueryRecorder
+from apps.tasks.management.commands.seed_benchmark_data import ADJECTIVES, BRANDS, EMAIL_DOMAIN, NOUNS
+from apps.tasks.models import Category, Product
+
+from .loadtest import percentile
+
+SCENARIOS = ('list', 'detail', 'search', 'login', 'profile')
+
+
+class Scenarios:
+    """Request builders for each scenario, drawing from the seeded data."""
+
+    def __init__(self, rng, password):
+        self.rng = rng
+        self.password = password
+        users = list(get_user_model().objects.filter(email__endswith=f'@{EMAIL_DOMAIN}').order_by('id')[:50])
+        if not users:
+            raise CommandError('No benchmark data; run `manage.py seed_benchmark_data` first')
+        self.emails = [user.email for user in users]
+        self.tokens = [f'Bearer {AccessToken.for_user(user)}' for user in users]
+        product_ids = list(Product.objects.filter(user__in=users).order_by('id').values_list('id', flat=True)[:5000])
+        self.product_ids = rng.sample(product_ids, min(len(product_ids), 500))
+        self.category_ids = list(Category.objects.values_list('id', flat=True)[:50])
+        self.terms = BRANDS + ADJECTIVES + NOUNS
+
+    def auth(self):
+        return {'HTTP_AUTHORIZATION': self.rng.choice(self.tokens)}
+
+    def list(self, client):
+        # Half browse the first pages, half the first page of a category
+        if self.category_ids and self.rng.random() < 0.5:
+            params = {'category': self.rng.choice(self.category_ids)}
+        else:
+            params = {'page': self.rng.randint(1, 3)}
+        return client.get(reverse('product-list-create'), params, **self.auth())
+
+    def detail(self, client):
+        pk = self.rng.choice(self.product_ids)
+        return client.get(reverse('product-detail', args=[pk]), **self.auth())
+
+    def search(self, client):
+        return client.get(reverse('product-list-create'), {'q': self.rng.choice(self.terms)}, **self.auth())
+
+    def login(self, client):
+        return client.post(
+            reverse('login'), {'email': self.rng.choice(self.emails), 'password': self.password},
+            content_type='application/json'
+        )
+
+    def profile(self, client):
+        return client.get(reverse('profile'), **self.auth())
+
+
+def summarize(latencies, queries, allocations, errors):
+    latencies = sorted(latencies)
+    allocations = sorted(allocations)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'queries_mean': statistics.fmean(queries) if queries else 0.0,
+        'queries_max': max(queries, default=0),
+        'alloc_p50_kib': percentile(allocations, 0.50) / 1024,
+        'alloc_max_kib': (allocations[-1] if allocations else 0) / 1024,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True, cwd=settings.BASE_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the list, detail, search, login and profile endpoints in-process '
+        'through the Django test client, against data from seed_benchmark_data. '
+        'Reports latency percentiles, queries per request and allocations per request; '
+        'use --output to save a run and --compare to diff against a saved one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS), help='Scenarios to run'
+        )
+        parser.add_argument('--iterations', type=int, default=200, help='Timed requests per scenario')
+        parser.add_argument('--warmup', type=int, default=20, help='Untimed requests per scenario first')
+        parser.add_argument(
+            '--alloc-iterations', type=int, default=50,
+            help='Requests per scenario run under tracemalloc, separately from the timed ones (0 to skip)'
+        )
+        parser.add_argument(
+            '--cold-cache', action='store_true',
+            help='Clear the default cache before every request (do not use against a shared Redis)'
+        )
+        parser.add_argument('--password', default='benchmark', help='Password given to seed_benchmark_data')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed for the request mix')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+
+    def handle(self, *args, **options):
+        if options['cold_cache'] and blacklist_shares_default_cache():
+            raise CommandError(
+                '--cold-cache clears the default cache, which also holds the token blacklist '
+                '(TOKEN_BLACKLIST_CACHE); give the blacklist its own cache first'
+            )
+        rng = random.Random(options['seed'])
+        scenarios = Scenarios(rng, options['password'])
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        client = Client(HTTP_HOST=host)
+
+        results = {}
+        # Every request comes from one client; measure logins, not the login rate limits
+        no_limits = (10**9, 60)
+        with override_settings(LOGIN_RATE_LIMIT_IP=no_limits, LOGIN_RATE_LIMIT_ACCOUNT=no_limits):
+            for name in options['scenarios']:
+                request = getattr(scenarios, name)
+                results[name] = self.run_scenario(client, request, options)
+
+        report = {
+            'revision': git_revision(),
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'cache': settings.CACHES['default']['BACKEND'],
+            'options': {key: options[key] for key in ('iterations', 'warmup', 'alloc_iterations', 'cold_cache', 'seed')},
+            'results': results,
+        }
+        self.print_results(results)
+        if options['compare']:
+            with open(options['compare']) as f:
+                self.print_comparison(json.load(f), report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+        self.stdout.write(self.style.SUCCESS('✓ Done'))
+
+    def send(self, client, request):
+        """Issue one request and read the whole body; True for an error response."""
+        response = request(client)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code >= 400
+
+    def run_scenario(self, client, request, options):
+        for _ in range(options['warmup']):
+            self.send(client, request)
+
+        latencies, queries, errors = [], [], 0
+        for _ in range(options['iterations']):
+            if options['cold_cache']:
+                cache.clear()
+            with QueryRecorder() as recorder:
+                started = time.perf_counter()
+                errors += self.send(client, request)
+                latencies.append(time.perf_counter() - started)
+            queries.append(recorder.count)
+
+        # Tracing slows every allocation down, so it gets its own requests
+        allocations = []
+        if options['alloc_iterations']:
+            tracemalloc.start()
+            try:
+                for _ in range(options['alloc_iterations']):
+                    if options['cold_cache']:
+                        cache.clear()
+                    tracemalloc.reset_peak()
+                    baseline = tracemalloc.get_traced_memory()[0]
+                    errors += self.send(client, request)
+                    allocations.append(tracemalloc.get_traced_memory()[1] - baseline)
+            finally:
+                tracemalloc.stop()
+        return summarize(latencies, queries, allocations, errors)
+
+    def print_results(self, results):
+        self.stdout.write(
+            f"{'scenario':<10} {'requests':>8} {'errors':>6} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} "
+            f"{'p99 ms':>8} {'queries':>7} {'peak KiB':>9}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<10} {result['requests']:>8} {result['errors']:>6} {result['mean_ms']:>8.2f} "
+                f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} {result['p99_ms']:>8.2f} "
+                f"{result['queries_mean']:>7.1f} {result['alloc_p50_kib']:>9.1f}"
+            )
+
+    def print_comparison(self, baseline, report):
+        self.stdout.write(f"\nChange against {baseline.get('revision') or 'the baseline'} (negative is better):")
+        for name, result in report['results'].items():
+            before = baseline['results'].get(name)
+            if before is None:
+                continue
+            changes = []
+            for key in ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean', 'alloc_p50_kib'):
+                if before[key]:
+                    changes.append(f'{key} {(result[key] - before[key]) / before[key] * 100:+.1f}%')
+                else:
+                    changes.append(f'{key} {result[key] - before[key]:+.2f}')
+            self.stdout.write(f"{name:<10} {', '.join(changes)}")
@@ -0,0 +1,91 @@
+import time
+from decimal import Decimal
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from apps.core.renderers import FastJSONParser, FastJSONRenderer, orjson
+from apps.tasks.models import Category, Product
+from apps.tasks.serializers import ProductListSerializer
+
+
+def build_page(size):
+    """An in-memory products page shaped like the list endpoint's, without the database."""
+    now = timezone.now()
+    user = get_user_model()(id=1, username='bench', email='bench@example.com')
+    category = Category(id=1, name='Electronics', slug='electronics')
+    products = [
+        Product(
+            id=i, name=f'Бездротові навушники {i}', price=Decimal('1299.50') + i,
+            url=f'https://shop.example.com/products/{i}', user=user, category=category,
+            image=f'products/{i}.jpg', image_hash='ab' * 32, created_at=now, updated_at=now
+        )
+        for i in range(size)
+    ]
+    results = ProductListSerializer(products, many=True).data
+    return {'count': size, 'next': None, 'previous': None, 'results': results}
+
+
+def best_of(func, iterations, repeat=5):
+    """Best per-call time in seconds over several timed loops."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - start) / iterations)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = 'Compare JSON render/parse throughput of the stock and orjson-backed DRF classes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[20, 100, 1000],
+            help='Page sizes (number of products) to benchmark'
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=0,
+            help='Calls per timed loop (default: scaled to the page size)'
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING('orjson is not installed; the fast classes use the stdlib fallback'))
+
+        media_type = 'application/json'
+        self.stdout.write(f"{'size':>6} {'bytes':>9} {'step':<7} {'stock µs':>10} {'fast µs':>10} {'speedup':>8}")
+        with override_settings(JSON_BACKEND='orjson'):
+            for size in options['sizes']:
+                page = build_page(size)
+                iterations = options['iterations'] or max(5, 20000 // size)
+                body = JSONRenderer().render(page, media_type)
+
+                rows = (
+                    ('render',
+                     lambda: JSONRenderer().render(page, media_type),
+                     lambda: FastJSONRenderer().render(page, media_type)),
+                    ('parse',
+                     lambda: JSONParser().parse(BytesIO(body), media_type),
+                     lambda: FastJSONParser().parse(BytesIO(body), media_type)),
+                )
+                for step, stock, fast in rows:
+                    stock_time = best_of(stock, iterations)
+                    fast_time = best_of(fast, iterations)
+                    self.stdout.write(
+                        f'{size:>6} {len(body):>9} {step:<7} {stock_time * 1e6:>10.1f} '
+                        f'{fast_time * 1e6:>10.1f} {stock_time / fast_time:>7.1f}x'
+                    )
+
+        self.stdout.write(self.style.SUCCESS('✓ Done'))
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import ssl
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class HTTPConnection:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams."""
+
+    def __init__(self, url, headers, slow_client):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'https' else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == 'https' else None
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        lines = [f'GET {path} HTTP/1.1', f'Host: {parts.netloc}', 'Accept-Encoding: gzip']
+        lines += [f'{name}: {value}' for name, value in headers]
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+        # A slow client sends the request in two parts with a pause in between
+        self.request = (head[:len(head) // 2], head[len(head) // 2:])
+        self.slow_client = slow_client
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def get(self):
+        """Send one request and read the whole response; returns the status code."""
+        if self.writer is None:
+            await self.open()
+        first, rest = self.request
+        if self.slow_client:
+            self.writer.write(first)
+            await self.writer.drain()
+            await asyncio.sleep(self.slow_client)
+            self.writer.write(rest)
+        else:
+            self.writer.write(first + rest)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Connection closed by server')
+        status = int(status_line.split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            while True:
+                size = int((await self.reader.readline()).split(b';')[0], 16)
+                await self.reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif status not in (204, 304):
+            await self.reader.readexactly(int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        return status
+
+
+async def run_target(url, concurrency, duration, headers, slow_client):
+    latencies = []
+    errors = 0
+    statuses = {}
+    deadline = time.monotonic() + duration
+
+    async def client():
+        nonlocal errors
+        connection = HTTPConnection(url, headers, slow_client)
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                status = await connection.get()
+            except (OSError, ValueError, asyncio.IncompleteReadError):
+                errors += 1
+                connection.close()
+                await asyncio.sleep(0.01)
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status >= 400:
+                errors += 1
+        connection.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        'url': url,
+        'requests': len(latencies),
+        'errors': errors,
+        'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': (latencies[-1] if latencies else 0.0) * 1000,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test read endpoints with many concurrent keep-alive clients and compare servers. '
+        'Example, WSGI vs ASGI with the async views: '
+        '`gunicorn -c ../gunicorn.conf.py conf.wsgi:application --bind :8000` and '
+        '`ASYNC_VIEWS=True uvicorn conf.asgi:application --port 8001`, then '
+        '`python manage.py loadtest wsgi=http://localhost:8000/api/v1/tasks/products/ '
+        'asgi=http://localhost:8001/api/v1/tasks/products/ --concurrency 500 --slow-client-ms 200`'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('targets', nargs='+', help='URLs to test, optionally labelled as label=url')
+        parser.add_argument('--concurrency', type=int, default=100, help='Concurrent connections per target')
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run each target')
+        parser.add_argument('--token', help='JWT access token sent as a Bearer Authorization header')
+        parser.add_argument(
+            '--header', action='append', default=[], help='Extra request header, "Name: value" (repeatable)'
+        )
+        parser.add_argument(
+            '--slow-client-ms', type=int, default=0,
+            help='Pause in the middle of sending each request, like a client on a slow network'
+        )
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+
+    def handle(self, *args, **options):
+        headers = []
+        if options['token']:
+            headers.append(('Authorization', f"Bearer {options['token']}"))
+        for header in options['header']:
+            name, sep, value = header.partition(':')
+            if not sep:
+                raise CommandError(f'Invalid header "{header}", expected "Name: value"')
+            headers.append((name.strip(), value.strip()))
+
+        results = []
+        for target in options['targets']:
+            label, sep, url = target.partition('=')
+            if not sep or '://' in label:
+                label, url = target, target
+            if urlsplit(url).scheme not in ('http', 'https'):
+                raise CommandError(f'Invalid URL "{url}"')
+            result = asyncio.run(run_target(
+                url, options['concurrency'], options['duration'], headers, options['slow_client_ms'] / 1000
+            ))
+            result['label'] = label
+            results.append(result)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        self.stdout.write(
+            f"{'target':<12} {'requests':>9} {'errors':>7} {'req/s':>9} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['label'][:12]:<12} {result['requests']:>9} {result['errors']:>7} "
+                f"{result['rps']:>9.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                f"{result['p99_ms']:>8.1f} {result['max_ms']:>8.1f}"
+            )
+        if len(results) > 1 and results[0]['rps']:
+            for result in results[1:]:
+                self.stdout.write(f"{result['label']}: {result['rps'] / results[0]['rps']:.2f}x "
+                                  f"the throughput of {results[0]['label']}")
+        self.stdout.write(self.style.SUCCESS('✓ Done'))
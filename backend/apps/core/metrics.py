@@ -0,0 +1,277 @@
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+try:
+    from django_redis import get_redis_connection
+    from django_redis.cache import RedisCache
+except ImportError:  # optional: metrics stay per process without django-redis
+    get_redis_connection = RedisCache = None
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Method label values; any other verb a client sends is recorded as "other"
+HTTP_METHODS = frozenset({'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'TRACE', 'CONNECT'})
+
+METRIC_HELP = {
+    'http_requests_total': ('counter', 'Requests by view, method and status class.'),
+    'http_request_duration_seconds': ('histogram', 'Request latency by view and method.'),
+    'http_response_size_bytes': ('summary', 'Response body size by view.'),
+    'db_queries_total': ('counter', 'Database queries run while handling requests, by view.'),
+    'db_query_duration_seconds': ('summary', 'Time spent in database queries, by view.'),
+    'cache_hits_total': ('counter', 'Cached pages and entries served, by view.'),
+    'cache_misses_total': ('counter', 'Cache misses that rebuilt an entry, by view.'),
+    'cache_calls_total': ('counter', 'Calls to the cache server, by view.'),
+    'cache_call_duration_seconds': ('summary', 'Time spent in cache server calls, by view.'),
+}
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """What one request spent on the database and the cache."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.query_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_calls = 0
+        self.cache_time = 0.0
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def query_recorder(execute, sql, params, many, context):
+    """Database execute wrapper timing every query of the current request."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.query_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """connection_created receiver: time queries on every new connection."""
+    if query_recorder not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_recorder)
+
+
+def record_cache_lookup(hit):
+    metrics = _current.get()
+    if metrics is not None:
+        if hit:
+            metrics.cache_hits += 1
+        else:
+            metrics.cache_misses += 1
+
+
+def record_cache_call(duration):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.cache_calls += 1
+        metrics.cache_time += duration
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels.items())
+
+
+class LocalStore:
+    """Totals of this process only; used without a shared Redis cache."""
+
+    def __init__(self):
+        self._totals = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def add(self, deltas):
+        with self._lock:
+            for field, value in deltas.items():
+                self._totals[field] += value
+
+    def read(self):
+        with self._lock:
+            return dict(self._totals)
+
+    def clear(self):
+        with self._lock:
+            self._totals.clear()
+
+
+class RedisStore:
+    """Totals shared by every worker process in one Redis hash."""
+    key = 'metrics:totals'
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    def add(self, deltas):
+        pipeline = get_redis_connection(self.alias).pipeline(transaction=False)
+        for field, value in deltas.items():
+            pipeline.hincrbyfloat(self.key, field, value)
+        pipeline.execute()
+
+    def read(self):
+        totals = get_redis_connection(self.alias).hgetall(self.key)
+        return {field.decode(): float(value) for field, value in totals.items()}
+
+    def clear(self):
+        get_redis_connection(self.alias).delete(self.key)
+
+
+class MetricsRegistry:
+    """Per-process buffer of metric increments, flushed to a shared store.
+
+    Requests only touch an in-memory dict; a daemon thread pushes the
+    accumulated deltas every METRICS_FLUSH_INTERVAL seconds, so Redis sees
+    one pipelined write per worker per interval however busy it is. Every
+    gunicorn worker adds into the same hash, which makes /metrics totals
+    cover all processes.
+    """
+
+    def __init__(self):
+        self._deltas = defaultdict(float)
+        self._lock = threading.Lock()
+        self._flusher_pid = None
+        self._local_store = LocalStore()
+
+    @property
+    def store(self):
+        alias = getattr(settings, 'METRICS_CACHE_ALIAS', 'default')
+        if RedisCache is not None and isinstance(caches[alias], RedisCache):
+            return RedisStore(alias)
+        return self._local_store
+
+    def observe_request(self, view, method, status, duration, size, metrics):
+        # The method comes from the client, so it must not mint new series
+        method = method if method in HTTP_METHODS else 'other'
+        labels = _labels(view=view, method=method)
+        view_labels = _labels(view=view)
+        status_labels = _labels(view=view, method=method, status=f'{status // 100}xx')
+        with self._lock:
+            deltas = self._deltas
+            deltas[f'http_requests_total{{{status_labels}}}'] += 1
+            for bound in LATENCY_BUCKETS:
+                if duration <= bound:
+                    deltas[f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}}'] += 1
+            deltas[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'] += 1
+            deltas[f'http_request_duration_seconds_sum{{{labels}}}'] += duration
+            deltas[f'http_request_duration_seconds_count{{{labels}}}'] += 1
+            deltas[f'http_response_size_bytes_sum{{{view_labels}}}'] += size
+            deltas[f'http_response_size_bytes_count{{{view_labels}}}'] += 1
+            deltas[f'db_queries_total{{{view_labels}}}'] += metrics.queries
+            deltas[f'db_query_duration_seconds_sum{{{view_labels}}}'] += metrics.query_time
+            deltas[f'db_query_duration_seconds_count{{{view_labels}}}'] += 1
+            deltas[f'cache_hits_total{{{view_labels}}}'] += metrics.cache_hits
+            deltas[f'cache_misses_total{{{view_labels}}}'] += metrics.cache_misses
+            deltas[f'cache_calls_total{{{view_labels}}}'] += metrics.cache_calls
+            deltas[f'cache_call_duration_seconds_sum{{{view_labels}}}'] += metrics.cache_time
+            deltas[f'cache_call_duration_seconds_count{{{view_labels}}}'] += 1
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        # Started lazily so that each forked worker runs its own thread
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._lock:
+            if self._flusher_pid == pid:
+                return
+            self._flusher_pid = pid
+        threading.Thread(target=self._flush_forever, name='metrics-flush', daemon=True).start()
+
+    def _flush_forever(self):
+        while True:
+            time.sleep(getattr(settings, 'METRICS_FLUSH_INTERVAL', 5))
+            self.flush()
+
+    def flush(self):
+        """Push this process's buffered increments to the shared store."""
+        with self._lock:
+            deltas, self._deltas = self._deltas, defaultdict(float)
+        deltas = {field: value for field, value in deltas.items() if value}
+        if not deltas:
+            return
+        try:
+            self.store.add(deltas)
+        except Exception as e:
+            logger.error(f"Failed to flush metrics: {e}")
+            # Keep the increments for the next attempt
+            with self._lock:
+                for field, value in deltas.items():
+                    self._deltas[field] += value
+
+    def reset(self):
+        """Drop buffered and stored metrics (used by tests)."""
+        with self._lock:
+            self._deltas.clear()
+        self.store.clear()
+
+    def render(self):
+        """All stored metrics in the Prometheus text exposition format."""
+        self.flush()
+        totals = self.store.read()
+        families = defaultdict(list)
+        for field, value in totals.items():
+            name = field.split('{', 1)[0]
+            for suffix in ('_bucket', '_sum', '_count'):
+                if name.endswith(suffix) and name[:-len(suffix)] in METRIC_HELP:
+                    name = name[:-len(suffix)]
+                    break
+            families[name].append((field, value))
+
+        lines = []
+        for name in sorted(families):
+            metric_type, help_text = METRIC_HELP.get(name, ('untyped', ''))
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for field, value in sorted(families[name], key=_sample_order):
+                lines.append(f'{field} {int(value) if value.is_integer() else value!r}')
+        return '\n'.join(lines) + '\n'
+
+
+def _sample_order(item):
+    # Buckets of one series in ascending le order, +Inf last
+    field = item[0]
+    if 'le="' not in field:
+        return (field, 0.0)
+    head, le = field.rsplit('le="', 1)
+    le = le.rstrip('"}')
+    return (head, float('inf') if le == '+Inf' else float(le))
+
+
+registry = MetricsRegistry()
+
+
+def server_timing(metrics, duration):
+    """Server-Timing header value for one request, in milliseconds."""
+    parts = [f'app;dur={duration * 1000:.1f}']
+    if metrics.queries:
+        parts.append(f'db;dur={metrics.query_time * 1000:.1f};desc="{metrics.queries} queries"')
+    if metrics.cache_calls or metrics.cache_hits or metrics.cache_misses:
+        parts.append(
+            f'cache;dur={metrics.cache_time * 1000:.1f};'
+            f'desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"'
+        )
+    return ', '.join(parts)
@@ -0,0 +1,117 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from .metrics import end_request, registry, server_timing, start_request
+from .routers import RequestState, get_client_key, get_replicas, note_write, request_state
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class MetricsMiddleware:
+    """Measure every request: latency, queries, cache use and response size.
+
+    Totals go to the metrics registry (served at /metrics) labelled by URL
+    name, and the request's own breakdown is sent back in a Server-Timing
+    header. Keep it first in MIDDLEWARE so the latency covers the others.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics, token = start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            end_request(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        duration = time.perf_counter() - metrics.started
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+        if view == 'metrics':
+            return response
+
+        if response.streaming:
+            size = int(response.get('Content-Length', 0))
+        else:
+            size = len(response.content)
+        registry.observe_request(view, request.method, response.status_code, duration, size, metrics)
+
+        if getattr(settings, 'METRICS_SERVER_TIMING', True):
+            response['Server-Timing'] = server_timing(metrics, duration)
+        if duration >= getattr(settings, 'METRICS_SLOW_REQUEST_SECONDS', 1.0):
+            logger.warning(
+                f"Slow request {request.method} {request.path} ({view}): {duration * 1000:.0f} ms, "
+                f"{metrics.queries} queries in {metrics.query_time * 1000:.0f} ms, "
+                f"{metrics.cache_calls} cache calls in {metrics.cache_time * 1000:.0f} ms"
+            )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Give the database router the request context it needs.
+
+    Unsafe requests read from the primary throughout. Once such a request
+    succeeds, the client is pinned to the primary for REPLICA_PIN_SECONDS
+    so its next reads see its own writes despite replica lag. Works in both
+    sync and async stacks.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not get_replicas():
+            return self.get_response(request)
+
+        state = self.get_state(request)
+        with request_state(state):
+            response = self.get_response(request)
+        self.record_write(state, response)
+        return response
+
+    async def __acall__(self, request):
+        if not get_replicas():
+            return await self.get_response(request)
+
+        state = self.get_state(request)
+        with request_state(state):
+            response = await self.get_response(request)
+        if state.force_primary:
+            await sync_to_async(self.record_write)(state, response)
+        return response
+
+    def get_state(self, request):
+        return RequestState(get_client_key(request), force_primary=request.method not in SAFE_METHODS)
+
+    def record_write(self, state, response):
+        if state.force_primary and response.status_code < 400:
+            state.pin()
+            note_write()
@@ -0,0 +1,42 @@
+import functools
+import time
+from contextvars import ContextVar
+
+from django_redis.client import DefaultClient
+
+from .metrics import record_cache_call
+
+_in_call = ContextVar('cache_call_in_progress', default=False)
+
+
+def _timed(name):
+    method = getattr(DefaultClient, name)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        # add() and set_many() call set(); count the outer call only
+        if _in_call.get():
+            return method(self, *args, **kwargs)
+        token = _in_call.set(True)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            _in_call.reset(token)
+            record_cache_call(time.perf_counter() - started)
+    return wrapper
+
+
+class InstrumentedClient(DefaultClient):
+    """django-redis client that adds every call's time to the request metrics."""
+    get = _timed('get')
+    get_many = _timed('get_many')
+    set = _timed('set')
+    set_many = _timed('set_many')
+    add = _timed('add')
+    delete = _timed('delete')
+    delete_many = _timed('delete_many')
+    incr = _timed('incr')
+    decr = _timed('decr')
+    has_key = _timed('has_key')
+    touch = _timed('touch')
@@ -0,0 +1,82 @@
+import codecs
+from decimal import Decimal
+
+from django.conf import settings
+from django.db.models.fields.files import FieldFile
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib json module
+    orjson = None
+
+_fallback_encoder = JSONEncoder()
+
+
+def use_orjson():
+    """orjson is used when installed and JSON_BACKEND is 'orjson' (the default)."""
+    return orjson is not None and getattr(settings, 'JSON_BACKEND', 'orjson') == 'orjson'
+
+
+def _default(obj):
+    # orjson handles str/int/float/dict/list/datetime/date/time/UUID natively
+    if isinstance(obj, Decimal):
+        return str(obj) if api_settings.COERCE_DECIMAL_TO_STRING else float(obj)
+    if isinstance(obj, FieldFile):
+        return obj.url if obj else None
+    if isinstance(obj, Promise):
+        return str(obj)
+    return _fallback_encoder.default(obj)
+
+
+def dumps(data, indent=None):
+    """Serialize data to UTF-8 JSON bytes with the configured backend."""
+    if not use_orjson():
+        return JSONRenderer().render(data, renderer_context={'indent': indent})
+    option = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return orjson.dumps(data, default=_default, option=option)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer backed by orjson, with the stock renderer as fallback.
+
+    Output matches JSONRenderer's compact, non-ASCII-escaped form: Decimals
+    follow COERCE_DECIMAL_TO_STRING, UTC datetimes end in 'Z' and files
+    render as their URL. ``indent`` in the Accept header gives two-space
+    indentation (orjson's only indented form).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not use_orjson() or not (self.compact and not self.ensure_ascii):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        content = dumps(data, indent=indent)
+        # Same as JSONRenderer: keep the output safe to embed in <script>
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser backed by orjson, with the stock parser as fallback."""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if not use_orjson():
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                content = content.decode(encoding).encode('utf-8')
+            return orjson.loads(content)
+        except (ValueError, LookupError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
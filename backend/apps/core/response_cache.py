@@ -0,0 +1,50 @@
+import gzip
+import re
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+
+def is_cacheable(request):
+    """Only JSON output is stored as bytes; the browsable API renders per request."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    return renderer is not None and renderer.format == 'json'
+
+
+def render_entry(view, data):
+    """Render data once with the negotiated renderer into a cacheable entry.
+
+    Bodies above RESPONSE_CACHE_GZIP_MIN_BYTES are stored gzipped, which
+    shrinks the cache entry and can be sent as-is to clients accepting gzip.
+    """
+    request = view.request
+    renderer = request.accepted_renderer
+    body = renderer.render(data, request.accepted_media_type, view.get_renderer_context())
+    content_type = request.accepted_media_type
+    if renderer.charset:
+        content_type = f'{content_type}; charset={renderer.charset}'
+
+    encoding = ''
+    if len(body) >= getattr(settings, 'RESPONSE_CACHE_GZIP_MIN_BYTES', 1024):
+        # mtime=0 keeps the bytes identical for identical bodies
+        body = gzip.compress(body, compresslevel=6, mtime=0)
+        encoding = 'gzip'
+    return {'content_type': content_type, 'body': body, 'encoding': encoding}
+
+
+def entry_response(entry, request):
+    """Build the HTTP response straight from cached bytes, skipping the renderer."""
+    body = entry['body']
+    response = HttpResponse(content_type=entry['content_type'])
+    if entry['encoding'] == 'gzip':
+        if _accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')):
+            response['Content-Encoding'] = 'gzip'
+        else:
+            body = gzip.decompress(body)
+        patch_vary_headers(response, ('Accept-Encoding',))
+    response.content = body
+    response['Content-Length'] = str(len(body))
+    return response
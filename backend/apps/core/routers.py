@@ -0,0 +1,217 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils.connection import ConnectionDoesNotExist
+
+from .async_cache import async_cache
+
+logger = logging.getLogger(__name__)
+
+PIN_KEY_PREFIX = 'db_pin'
+RECENT_WRITE_KEY = 'db_pin:recent_write'
+
+# Replay lag of a streaming replica in seconds; 0 when it has replayed
+# everything it received, NULL on a server that is not in recovery.
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+_force_primary = ContextVar('force_primary', default=False)
+_request_state = ContextVar('replica_request_state', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def pin_seconds():
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+
+@contextmanager
+def use_primary():
+    """Send every read in this block to the primary."""
+    token = _force_primary.set(True)
+    try:
+        yield
+    finally:
+        _force_primary.reset(token)
+
+
+def note_write():
+    """Remember that data changed, so reads that seed caches avoid lagging replicas."""
+    if get_replicas():
+        cache.set(RECENT_WRITE_KEY, 1, pin_seconds())
+
+
+@contextmanager
+def fresh_reads():
+    """Read from the primary if anything was written within the pin window.
+
+    Used around cache fills: a page computed from a lagging replica would
+    otherwise be served to everybody until the next invalidation.
+    """
+    if get_replicas() and cache.get(RECENT_WRITE_KEY):
+        with use_primary():
+            yield
+    else:
+        yield
+
+
+@asynccontextmanager
+async def afresh_reads():
+    """Async counterpart of fresh_reads(); the routing flag follows the ORM into its thread."""
+    if get_replicas() and await async_cache.get(RECENT_WRITE_KEY):
+        with use_primary():
+            yield
+    else:
+        yield
+
+
+class RequestState:
+    """Routing state of the request being handled on this thread/task."""
+
+    def __init__(self, client_key, force_primary=False):
+        self.client_key = client_key
+        self.force_primary = force_primary
+        self._pinned = None
+
+    @property
+    def pinned(self):
+        # One cache lookup per request, and only if something reads
+        if self._pinned is None:
+            self._pinned = bool(self.client_key and cache.get(self.client_key))
+        return self._pinned
+
+    def pin(self):
+        if self.client_key:
+            cache.set(self.client_key, 1, pin_seconds())
+
+
+def get_client_key(request):
+    """Identify the client for pinning without touching the database.
+
+    The Authorization header (JWT clients) or the session cookie is hashed;
+    anonymous clients cannot write and are never pinned.
+    """
+    credential = request.META.get('HTTP_AUTHORIZATION') or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if not credential:
+        return None
+    return f"{PIN_KEY_PREFIX}:{hashlib.sha256(credential.encode('utf-8')).hexdigest()}"
+
+
+@contextmanager
+def request_state(state):
+    token = _request_state.set(state)
+    try:
+        yield state
+    finally:
+        _request_state.reset(token)
+
+
+class ReplicaHealth:
+    """Per-process replica health, re-checked at most every interval seconds.
+
+    A replica is unhealthy when it cannot be queried or, on PostgreSQL,
+    when its replay lag exceeds REPLICA_MAX_LAG_SECONDS.
+    """
+
+    def __init__(self):
+        self._status = {}
+        self._lock = threading.Lock()
+
+    def check(self, alias):
+        try:
+            connection = connections[alias]
+            with connection.cursor() as cursor:
+                if connection.vendor == 'postgresql':
+                    cursor.execute(POSTGRES_LAG_SQL)
+                    lag = cursor.fetchone()[0]
+                    max_lag = getattr(settings, 'REPLICA_MAX_LAG_SECONDS', 5)
+                    if lag is not None and lag > max_lag:
+                        logger.warning(f"Replica {alias} is {lag:.1f}s behind, reading from primary")
+                        return False
+                else:
+                    cursor.execute('SELECT 1')
+            return True
+        except (DatabaseError, ConnectionDoesNotExist) as e:
+            logger.warning(f"Replica {alias} is unavailable: {e}")
+            return False
+
+    def is_healthy(self, alias):
+        interval = getattr(settings, 'REPLICA_HEALTH_CHECK_INTERVAL', 10)
+        now = time.monotonic()
+        with self._lock:
+            status = self._status.get(alias)
+        if status is not None and now - status[1] < interval:
+            return status[0]
+
+        healthy = self.check(alias)
+        with self._lock:
+            self._status[alias] = (healthy, now)
+        return healthy
+
+    def reset(self):
+        with self._lock:
+            self._status.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+class PrimaryReplicaRouter:
+    """Send safe reads to healthy replicas and everything else to the primary.
+
+    Reads stay on the primary while a request is writing, inside a
+    transaction on the primary, for a short window after the same client
+    wrote (read-your-writes), and when every replica is unhealthy.
+    Replicas are configured with DATABASE_REPLICAS; without any, all
+    queries use the default database.
+    """
+    health = replica_health
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas or _force_primary.get():
+            return DEFAULT_DB_ALIAS
+
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in replicas:
+            # Follow relations on the database the instance came from
+            return instance._state.db
+
+        state = _request_state.get()
+        if state is not None and (state.force_primary or state.pinned):
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        healthy = [alias for alias in replicas if self.health.is_healthy(alias)]
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication
+        if db in get_replicas():
+            return False
+        return None
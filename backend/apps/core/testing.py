@@ -0,0 +1,139 @@
+import functools
+import re
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.core.signals import request_started
+from django.db import connections
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'(?<![\w."])\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \(\?(?:, ?\?)*\)', re.IGNORECASE)
+
+
+def normalize_sql(sql):
+    """SQL with every value replaced by ?, so statements differing only in values compare equal."""
+    sql = sql.replace('%s', '?')
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = ' '.join(sql.split())
+    # id__in lookups grow with the page size
+    return _IN_LIST.sub('IN (...)', sql)
+
+
+class RequestQueries:
+    """SQL statements run while handling one request."""
+
+    def __init__(self, label):
+        self.label = label
+        self.statements = []
+
+    def __len__(self):
+        return len(self.statements)
+
+    def repeated(self, threshold):
+        """Normalised statements run at least threshold times: the N+1 suspects."""
+        counts = Counter(normalize_sql(sql) for sql in self.statements)
+        return {sql: count for sql, count in counts.items() if count >= threshold}
+
+    def report(self):
+        lines = [f'{len(self)} queries in {self.label}:']
+        lines += [f'  {index}. {sql}' for index, sql in enumerate(self.statements, 1)]
+        return '\n'.join(lines)
+
+
+class QueryRecorder:
+    """Record the SQL run inside a with block on every database alias.
+
+    Queries are split per request through the request_started signal, so a
+    block issuing several test client calls gets one RequestQueries each.
+    Only queries of the current thread are seen, so use the sync test client.
+    """
+
+    def __init__(self):
+        self.outside = RequestQueries('the block, outside any request')
+        self.requests = []
+        self._current = self.outside
+        self._stack = None
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all(initialized_only=False):
+            self._stack.enter_context(connection.execute_wrapper(self._record))
+        request_started.connect(self._start_request)
+        self._stack.callback(request_started.disconnect, self._start_request)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def _start_request(self, sender, environ=None, **kwargs):
+        label = 'request'
+        if environ is not None:
+            query = environ.get('QUERY_STRING')
+            label = f"{environ.get('REQUEST_METHOD')} {environ.get('PATH_INFO')}{'?' + query if query else ''}"
+        self._current = RequestQueries(label)
+        self.requests.append(self._current)
+
+    def _record(self, execute, sql, params, many, context):
+        self._current.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    @property
+    def groups(self):
+        """The per-request groups, or the whole block when it made no request."""
+        return self.requests or [self.outside]
+
+    @property
+    def count(self):
+        return sum(len(group) for group in self.groups)
+
+
+class QueryBudgetMixin:
+    """TestCase mixin that fails requests running more queries than budgeted.
+
+    Every request in the block must stay within the budget, and no
+    normalised statement may repeat n_plus_one_threshold times or more
+    within one request, however small the budget.
+    """
+    n_plus_one_threshold = 3
+
+    @contextmanager
+    def assertQueryBudget(self, budget, threshold=None):
+        threshold = threshold or self.n_plus_one_threshold
+        with QueryRecorder() as recorder:
+            yield recorder
+        for request in recorder.groups:
+            repeated = request.repeated(threshold)
+            if repeated:
+                details = '\n'.join(f'  {count}x {sql}' for sql, count in repeated.items())
+                self.fail(f'N+1 queries in {request.label}:\n{details}\n{request.report()}')
+            if len(request) > budget:
+                self.fail(f'Query budget of {budget} exceeded. {request.report()}')
+
+    def assertQueryBudgetAtSizes(self, budget, sizes, populate, make_request):
+        """Check make_request() after populate(size) for each size.
+
+        The count must stay within budget and must not grow with the data,
+        which catches a per-row query even below the repeat threshold.
+        """
+        counts = {}
+        for size in sizes:
+            populate(size)
+            with self.subTest(size=size):
+                with self.assertQueryBudget(budget) as recorder:
+                    make_request()
+                counts[size] = recorder.count
+        if len(set(counts.values())) > 1:
+            self.fail(f'Query count grows with the data: {counts}')
+
+
+def query_budget(budget, threshold=None):
+    """Decorator form of QueryBudgetMixin.assertQueryBudget for a whole test method."""
+    def decorator(test):
+        @functools.wraps(test)
+        def wrapper(self, *args, **kwargs):
+            with self.assertQueryBudget(budget, threshold):
+                return test(self, *args, **kwargs)
+        return wrapper
+    return decorator
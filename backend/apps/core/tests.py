@@ -0,0 +1,381 @@
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+from rest_framework.views import APIView
+
+from .async_cache import AsyncCache
+from .async_views import AsyncAPIView
+from .db import get_pool_stats
+from .metrics import registry
+from .middleware import ReplicaRoutingMiddleware
+from .testing import QueryBudgetMixin, normalize_sql, query_budget
+from .renderers import FastJSONParser, FastJSONRenderer
+from .routers import (
+    PrimaryReplicaRouter, ReplicaHealth, RequestState, replica_health, fresh_reads, get_client_key, note_write, request_state, use_primary
+)
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    data = {
+        'name': 'Навушники  ',
+        'created_at': datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc),
+        'tags': ['a', 'b'],
+        'image': None,
+    }
+
+    def test_matches_stock_renderer(self):
+        fast = FastJSONRenderer().render(self.data, 'application/json')
+        stock = JSONRenderer().render(self.data, 'application/json')
+        self.assertEqual(fast, stock)
+
+    def test_raw_decimal_stays_exact(self):
+        # The stock encoder would emit the float 1299.5
+        content = FastJSONRenderer().render({'price': Decimal('1299.50')}, 'application/json')
+        self.assertEqual(content, b'{"price":"1299.50"}')
+
+    def test_indent_from_accept_header(self):
+        content = FastJSONRenderer().render({'a': [1]}, 'application/json; indent=4')
+        self.assertEqual(content, b'{\n  "a": [\n    1\n  ]\n}')
+
+    @override_settings(JSON_BACKEND='stdlib')
+    def test_stdlib_backend(self):
+        content = FastJSONRenderer().render(self.data, 'application/json')
+        self.assertEqual(content, JSONRenderer().render(self.data, 'application/json'))
+
+
+class FastJSONParserTest(SimpleTestCase):
+    def parse(self, body, **context):
+        return FastJSONParser().parse(BytesIO(body), 'application/json', context)
+
+    def test_parses_like_stock_parser(self):
+        body = '{"name": "Лампа", "price": "10.00", "ids": [1, 2]}'.encode('utf-8')
+        self.assertEqual(self.parse(body), JSONParser().parse(BytesIO(body)))
+
+    def test_non_utf8_encoding(self):
+        body = '{"name": "Лампа"}'.encode('utf-16')
+        self.assertEqual(self.parse(body, encoding='utf-16'), {'name': 'Лампа'})
+
+    def test_invalid_json_is_a_parse_error(self):
+        for body in (b'{"a":', b'{"a": NaN}'):
+            with self.assertRaises(ParseError):
+                self.parse(body)
+
+
+class AsyncCacheTest(SimpleTestCase):
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'rediss://cache.internal:6380/1,redis://replica.internal:6379/1',
+        'OPTIONS': {
+            'PASSWORD': 's3cret',
+            'SOCKET_TIMEOUT': 5,
+            'SOCKET_CONNECT_TIMEOUT': 2,
+            'CONNECTION_POOL_KWARGS': {'max_connections': 20, 'ssl_cert_reqs': 'none'},
+        },
+    }})
+    def test_redis_client_follows_the_cache_settings(self):
+        async def connection_kwargs():
+            # Nothing connects until the first command
+            return AsyncCache()._redis().connection_pool.connection_kwargs
+
+        kwargs = async_to_sync(connection_kwargs)()
+        self.assertEqual((kwargs['host'], kwargs['port'], kwargs['db']), ('cache.internal', 6380, 1))
+        self.assertEqual(kwargs['password'], 's3cret')
+        self.assertEqual((kwargs['socket_timeout'], kwargs['socket_connect_timeout']), (5, 2))
+        self.assertEqual(kwargs['ssl_cert_reqs'], 'none')
+
+    def test_local_memory_needs_no_client(self):
+        async def client():
+            return AsyncCache()._redis()
+
+        self.assertIsNone(async_to_sync(client)())
+
+
+class AsyncAPIViewTest(SimpleTestCase):
+    def test_without_get_the_drf_view_answers(self):
+        class PostOnly(APIView):
+            authentication_classes = permission_classes = []
+
+            def post(self, request):
+                return Response({})
+
+        class AsyncPostOnly(AsyncAPIView):
+            view_class = PostOnly
+
+        response = async_to_sync(AsyncPostOnly.as_view())(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, 405)
+
+
+class FakeHealth:
+    def __init__(self, *unhealthy):
+        self.unhealthy = set(unhealthy)
+
+    def is_healthy(self, alias):
+        return alias not in self.unhealthy
+
+
+@override_settings(DATABASE_REPLICAS=['replica1', 'replica2'])
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = PrimaryReplicaRouter()
+        self.router.health = FakeHealth()
+        self.factory = RequestFactory()
+
+    def test_reads_go_to_replicas(self):
+        self.assertIn(self.router.db_for_read(None), {'replica1', 'replica2'})
+        self.assertEqual(self.router.db_for_write(None), 'default')
+
+    def test_unhealthy_replicas_are_skipped(self):
+        self.router.health = FakeHealth('replica1')
+        self.assertEqual(self.router.db_for_read(None), 'replica2')
+        self.router.health = FakeHealth('replica1', 'replica2')
+        self.assertEqual(self.router.db_for_read(None), 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_uses_default(self):
+        self.assertEqual(self.router.db_for_read(None), 'default')
+
+    def test_use_primary(self):
+        with use_primary():
+            self.assertEqual(self.router.db_for_read(None), 'default')
+
+    def test_writing_request_reads_from_primary(self):
+        with request_state(RequestState('db_pin:client', force_primary=True)):
+            self.assertEqual(self.router.db_for_read(None), 'default')
+
+    def test_client_is_pinned_after_a_write(self):
+        def view(request):
+            return HttpResponse(status=201)
+
+        middleware = ReplicaRoutingMiddleware(view)
+        middleware(self.factory.post('/api/products/', HTTP_AUTHORIZATION='Bearer a'))
+
+        routes = {}
+
+        def read_view(request):
+            routes[request.META['HTTP_AUTHORIZATION']] = self.router.db_for_read(None)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(read_view)
+        middleware(self.factory.get('/api/products/', HTTP_AUTHORIZATION='Bearer a'))
+        middleware(self.factory.get('/api/products/', HTTP_AUTHORIZATION='Bearer b'))
+        self.assertEqual(routes['Bearer a'], 'default')
+        self.assertIn(routes['Bearer b'], {'replica1', 'replica2'})
+
+    def test_async_stack_pins_after_a_write(self):
+        from asgiref.sync import async_to_sync
+
+        async def view(request):
+            return HttpResponse(status=201)
+
+        middleware = ReplicaRoutingMiddleware(view)
+        async_to_sync(middleware)(self.factory.post('/api/products/', HTTP_AUTHORIZATION='Bearer a'))
+        request = self.factory.get('/api/products/', HTTP_AUTHORIZATION='Bearer a')
+        self.assertTrue(RequestState(get_client_key(request)).pinned)
+
+    def test_failed_write_does_not_pin(self):
+        middleware = ReplicaRoutingMiddleware(lambda request: HttpResponse(status=400))
+        middleware(self.factory.post('/api/products/', HTTP_AUTHORIZATION='Bearer a'))
+        request = self.factory.get('/api/products/', HTTP_AUTHORIZATION='Bearer a')
+        self.assertFalse(RequestState(get_client_key(request)).pinned)
+        self.assertIsNone(cache.get('db_pin:recent_write'))
+
+    def test_cache_fills_read_from_primary_after_a_write(self):
+        with fresh_reads():
+            self.assertIn(self.router.db_for_read(None), {'replica1', 'replica2'})
+        note_write()
+        with fresh_reads():
+            self.assertEqual(self.router.db_for_read(None), 'default')
+
+    def test_replicas_are_never_migrated(self):
+        self.assertIs(self.router.allow_migrate('replica1', 'tasks'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'tasks'))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTest(TransactionTestCase):
+    """The router against two real databases; `replica` never receives the primary's writes.
+
+    Not a TestCase: its transaction on the primary would keep every read there.
+    """
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        from apps.tasks.models import Category
+        cache.clear()
+        replica_health.reset()
+        self.addCleanup(replica_health.reset)
+        self.category = Category
+        self.factory = RequestFactory()
+
+    def request(self, view, method, credential):
+        middleware = ReplicaRoutingMiddleware(view)
+        return middleware(getattr(self.factory, method)('/api/categories/', HTTP_AUTHORIZATION=credential))
+
+    def count(self, credential):
+        return self.request(
+            lambda request: HttpResponse(str(self.category.objects.count())), 'get', credential
+        ).content.decode()
+
+    def test_reads_follow_the_client_across_a_write(self):
+        self.category.objects.create(name='Music')
+        self.assertEqual(self.count('Bearer a'), '0')
+
+        def create(request):
+            self.category.objects.create(name='Books')
+            return HttpResponse(status=201)
+
+        self.request(create, 'post', 'Bearer a')
+        self.assertEqual(self.category.objects.using('default').count(), 2)
+        self.assertEqual(self.category.objects.using('replica').count(), 0)
+
+        # The writer is pinned to the primary and sees its rows; others still read the replica
+        self.assertEqual(self.count('Bearer a'), '2')
+        self.assertEqual(self.count('Bearer b'), '0')
+
+    def test_unhealthy_replica_falls_back_to_the_primary(self):
+        self.category.objects.create(name='Music')
+        self.assertTrue(replica_health.check('replica'))
+        with mock.patch.object(replica_health, 'check', return_value=False):
+            self.assertEqual(self.count('Bearer b'), '1')
+
+
+class ReplicaHealthTest(TestCase):
+    def test_check(self):
+        health = ReplicaHealth()
+        self.assertTrue(health.check('default'))
+        self.assertFalse(health.check('missing'))
+
+
+class HealthViewTest(APITestCase):
+    def test_health(self):
+        response = self.client.get(reverse('health'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'ok'})
+
+    def test_staff_see_pool_stats(self):
+        staff = get_user_model().objects.create_user(
+            username='staff', email='staff@example.com', password='testpass123', is_staff=True
+        )
+        self.client.force_authenticate(staff)
+        response = self.client.get(reverse('health'))
+        self.assertEqual(response.json()['pools'], get_pool_stats())
+
+
+class MetricsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.user = get_user_model().objects.create_user(
+            username='metrics', email='metrics@example.com', password='testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('product-list-create'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Server-Timing'].startswith('app;dur='))
+        self.assertIn('db;dur=', response['Server-Timing'])
+
+    def test_requests_are_counted_per_view(self):
+        self.client.get(reverse('product-list-create'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_requests_total{view="product-list-create",method="GET",status="2xx"} 1', body)
+        self.assertIn('http_request_duration_seconds_bucket{view="product-list-create",method="GET",le="+Inf"} 1', body)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', body)
+        self.assertRegex(body, r'db_queries_total\{view="product-list-create"\} [1-9]')
+        # /metrics itself is not measured
+        self.assertNotIn('view="metrics"', body)
+
+    def test_unknown_methods_share_one_label(self):
+        for method in ('FOO', 'BAR'):
+            self.client.generic(method, reverse('product-list-create'))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('http_requests_total{view="product-list-create",method="other",status="4xx"} 2', body)
+        self.assertNotIn('FOO', body)
+
+    def test_cached_response_counts_a_hit(self):
+        self.client.get(reverse('product-list-create'))
+        response = self.client.get(reverse('product-list-create'))
+        self.assertIn('1 hits', response['Server-Timing'])
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('cache_hits_total{view="product-list-create"} 1', body)
+        self.assertIn('cache_misses_total{view="product-list-create"} 1', body)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain; version=0.0.4; charset=utf-8')
+
+
+class QueryBudgetHarnessTest(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        from apps.tasks.models import Category
+        for i in range(4):
+            Category.objects.create(name=f'Category {i}')
+
+    def test_normalize_sql(self):
+        self.assertEqual(
+            normalize_sql('SELECT "a"."id2" FROM "a" WHERE "a"."x" = 12 AND y = \'it\'\'s\' AND id IN (%s, %s)'),
+            'SELECT "a"."id2" FROM "a" WHERE "a"."x" = ? AND y = ? AND id IN (...)'
+        )
+
+    def test_per_row_query_is_reported_as_n_plus_one(self):
+        from apps.tasks.models import Category
+        from apps.tasks.serializers import CategorySerializer
+        # Without the products_count annotation every row counts its products
+        with self.assertRaisesMessage(AssertionError, 'N+1 queries'):
+            with self.assertQueryBudget(10):
+                CategorySerializer(Category.objects.all(), many=True).data
+
+    def test_budget_is_per_request(self):
+        with self.assertQueryBudget(3) as recorder:
+            for _ in range(2):
+                self.client.get(reverse('category-detail', args=['category-0']))
+        self.assertEqual([len(request) for request in recorder.requests], [1, 1])
+        with self.assertRaisesMessage(AssertionError, 'Query budget of 0 exceeded'):
+            with self.assertQueryBudget(0):
+                self.client.get(reverse('category-detail', args=['category-0']))
+
+    @query_budget(1)
+    def test_decorator(self):
+        self.client.get(reverse('category-detail', args=['category-0']))
+
+
+class BenchmarkCommandTest(TestCase):
+    def test_writes_comparable_results_for_every_scenario(self):
+        import json
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+        call_command('seed_benchmark_data', '--users', '3', '--products', '30', stdout=StringIO())
+
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            options = ['--iterations', '3', '--warmup', '1', '--alloc-iterations', '1', '--cold-cache']
+            call_command('benchmark_api', *options, '--output', output.name, stdout=StringIO())
+            report = json.load(output)
+            out = StringIO()
+            call_command('benchmark_api', *options, '--compare', output.name, stdout=out)
+
+        self.assertEqual(set(report['results']), {'list', 'detail', 'search', 'login', 'profile'})
+        for name, result in report['results'].items():
+            self.assertEqual(result['errors'], 0, name)
+            self.assertEqual(result['requests'], 3)
+            self.assertGreater(result['queries_mean'], 0, name)
+            self.assertGreater(result['alloc_p50_kib'], 0, name)
+        self.assertIn('Change against', out.getvalue())
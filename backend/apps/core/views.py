@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .db import get_pool_stats
+from .metrics import registry
+
+
+class HealthView(APIView):
+    """Liveness check for load balancers; staff also get connection pool stats."""
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, *args, **kwargs):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except DatabaseError:
+            return Response({'status': 'unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        data = {'status': 'ok'}
+        if request.user.is_staff:
+            data['pools'] = get_pool_stats()
+        return Response(data)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; requires ``Bearer METRICS_TOKEN`` when the token is set."""
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token and not constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
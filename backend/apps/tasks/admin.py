@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 
-from .models import Category, Product
+from .models import Category, PriceHistory, Product
 
 
 @admin.register(Category)
@@ -40,3 +40,11 @@ class ProductAdmin(admin.ModelAdmin):
             return format_html('<img src="{}" style="max-height: 120px; max-width: 180px; object-fit: contain;" />', obj.image.url)
         return "(нема зображення)"
     image_preview.short_description = 'Превʼю зображення'
+
+
+@admin.register(PriceHistory)
+class PriceHistoryAdmin(admin.ModelAdmin):
+    list_display = ('id', 'product', 'observed_at', 'resolution', 'price', 'price_min', 'price_max')
+    list_filter = ('resolution',)
+    raw_id_fields = ('product',)
+    ordering = ('-observed_at',)
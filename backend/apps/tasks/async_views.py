@@ -0,0 +1,74 @@
+from apps.core.async_views import AsyncAPIView, UseSyncView, apaginate
+from apps.core.response_cache import entry_response, render_entry
+
+from .cache_utils import (
+    CATEGORIES_NAMESPACE, PRODUCTS_NAMESPACE,
+    aget_namespace_validator, aget_or_compute_categories_list, aget_or_compute_products_list,
+    normalize_list_params, user_namespace
+)
+from .serializers import ProductListRowSerializer
+from .views import CategoryListCreateView, ProductDetail, ProductList
+
+
+class AsyncCategoryList(AsyncAPIView):
+    view_class = CategoryListCreateView
+    conditional = True
+
+    async def get_etag_parts(self, view, request):
+        validator = await aget_namespace_validator(CATEGORIES_NAMESPACE)
+        return [validator] if validator else None
+
+    async def get(self, view, request, *args, **kwargs):
+        filters = normalize_list_params(request.query_params, view.ordering_fields, 'name')
+        entry = await aget_or_compute_categories_list(
+            filters, lambda: self.compute(view), request.accepted_media_type
+        )
+        return entry_response(entry, request)
+
+    async def compute(self, view):
+        queryset = await self.filter_queryset(view)
+        page = await apaginate(view, queryset)
+        if page is None:
+            data = view.get_serializer([row async for row in queryset], many=True).data
+            return render_entry(view, data)
+        data = view.get_serializer(page, many=True).data
+        return render_entry(view, view.get_paginated_response(data).data)
+
+
+class AsyncProductList(AsyncAPIView):
+    view_class = ProductList
+    conditional = True
+
+    async def get_etag_parts(self, view, request):
+        validator = await aget_namespace_validator(PRODUCTS_NAMESPACE, user_namespace(request.user.id))
+        return [validator] if validator else None
+
+    async def get(self, view, request, *args, **kwargs):
+        filters = normalize_list_params(request.query_params, view.ordering_fields, '-created_at')
+        entry = await aget_or_compute_products_list(
+            request.user.id, filters, lambda: self.compute(view), request.accepted_media_type
+        )
+        return entry_response(entry, request)
+
+    async def compute(self, view):
+        queryset = ProductListRowSerializer.values(await self.filter_queryset(view))
+        context = view.get_serializer_context()
+        page = await apaginate(view, queryset)
+        if page is None:
+            return render_entry(view, ProductListRowSerializer([row async for row in queryset], context=context).data)
+        data = ProductListRowSerializer(page, context=context).data
+        return render_entry(view, view.get_paginated_response(data).data)
+
+
+class AsyncProductDetail(AsyncAPIView):
+    view_class = ProductDetail
+
+    async def get(self, view, request, *args, **kwargs):
+        lookup = {view.lookup_field: kwargs[view.lookup_url_kwarg or view.lookup_field]}
+        try:
+            product = await view.get_queryset().aget(**lookup)
+        except view.get_queryset().model.DoesNotExist:
+            # Let DRF produce its 404
+            raise UseSyncView
+        view.check_object_permissions(request, product)
+        return self.render(view, view.get_serializer(product).data)
@@ -0,0 +1,209 @@
+import codecs
+import csv
+import json
+from itertools import islice
+
+from django.db import transaction
+
+from .cache_utils import invalidate_products_cache, invalidate_user_cache
+from .models import Category, Product
+from .prices import record_prices
+from .serializers import ProductImportSerializer
+from .signals import adjust_products_count
+
+IMPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_FIELDS = ('name', 'price', 'url', 'category')
+EXPORT_CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+DEFAULT_BATCH_SIZE = 500
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def iter_lines(stream, encoding='utf-8-sig'):
+    """Decode a binary stream line by line without reading it all into memory.
+
+    utf-8-sig drops the byte order mark Excel puts in front of its CSV exports.
+    """
+    return codecs.iterdecode(iter(stream.readline, b''), encoding)
+
+
+def iter_rows(lines, file_format):
+    """Yield (row_number, row_dict_or_None, error) from CSV or JSONL lines.
+
+    Input that cannot be decoded or split into fields ends the rows with an
+    error for the row it is in, so the rows before it are still imported and
+    reported.
+    """
+    number = 0
+    try:
+        for number, row, error in _parse_rows(lines, file_format):
+            yield number, row, error
+    except (UnicodeDecodeError, csv.Error) as e:
+        yield number + 1, None, {'non_field_errors': [f'Unreadable input, import stopped: {e}']}
+
+
+def _parse_rows(lines, file_format):
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(lines), start=1):
+            yield number, row, None
+    elif file_format == 'jsonl':
+        number = 0
+        for line in lines:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, None, {'non_field_errors': [f'Invalid JSON: {e}']}
+                continue
+            if not isinstance(row, dict):
+                yield number, None, {'non_field_errors': ['Each line must be a JSON object']}
+                continue
+            yield number, row, None
+    else:
+        raise ImportFormatError(f'Unsupported format: {file_format}')
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _import_batch(batch, user, update_existing, result):
+    valid = []
+    for number, row, error in batch:
+        if error:
+            result['errors'].append({'row': number, 'errors': error})
+            continue
+        serializer = ProductImportSerializer(data=row)
+        if serializer.is_valid():
+            valid.append((number, serializer.validated_data))
+        else:
+            result['errors'].append({'row': number, 'errors': serializer.errors})
+
+    slugs = {data['category'] for _, data in valid if data.get('category')}
+    categories = dict(Category.objects.filter(slug__in=slugs).values_list('slug', 'id'))
+    urls = [data['url'] for _, data in valid]
+    owners = dict(Product.objects.filter(url__in=urls).values_list('url', 'user_id'))
+
+    new_products, own_products, seen = [], [], set()
+    for number, data in valid:
+        url = data['url']
+        slug = data.get('category')
+        if url in seen:
+            result['errors'].append({'row': number, 'errors': {'url': ['Duplicate url in this batch']}})
+            continue
+        if slug and slug not in categories:
+            result['errors'].append({'row': number, 'errors': {'category': [f'Unknown category "{slug}"']}})
+            continue
+        owner_id = owners.get(url)
+        if owner_id is not None and owner_id != user.pk:
+            result['errors'].append({'row': number, 'errors': {'url': ['Product with this url already exists']}})
+            continue
+        seen.add(url)
+        product = Product(
+            name=data['name'],
+            price=data['price'],
+            url=url,
+            category_id=categories.get(slug),
+            user=user
+        )
+        if owner_id is None:
+            new_products.append(product)
+        elif update_existing:
+            own_products.append(product)
+        else:
+            result['skipped'] += 1
+
+    with transaction.atomic():
+        prices = []
+        if new_products:
+            # A concurrent insert of the same url loses quietly instead of failing the batch
+            Product.objects.bulk_create(new_products, ignore_conflicts=True)
+            prices = list(Product.objects.filter(
+                user=user, url__in=[p.url for p in new_products]
+            ).values_list('id', 'price'))
+            created = len(prices)
+            result['created'] += created
+            result['skipped'] += len(new_products) - created
+            # bulk_create bypasses post_save, so maintain the counter here
+            adjust_products_count(user.pk, created)
+        if own_products:
+            # The url already belongs to this user, so the upsert only touches their rows
+            Product.objects.bulk_create(
+                own_products,
+                update_conflicts=True,
+                unique_fields=['url'],
+                update_fields=['name', 'price', 'category', 'updated_at'],
+            )
+            result['updated'] += len(own_products)
+            prices.extend(Product.objects.filter(
+                url__in=[p.url for p in own_products]
+            ).values_list('id', 'price'))
+        # Unchanged prices are deduplicated by the recorder
+        record_prices(prices)
+
+
+def import_products(rows, user, batch_size=DEFAULT_BATCH_SIZE, update_existing=True):
+    """Validate and upsert products for user in batches.
+
+    rows is an iterable of (row_number, row, error) as produced by iter_rows().
+    Returns counts of created/updated/skipped rows and per-row errors.
+    """
+    result = {'created': 0, 'updated': 0, 'skipped': 0, 'errors': []}
+    try:
+        for batch in _batched(rows, batch_size):
+            _import_batch(batch, user, update_existing, result)
+    finally:
+        # Each batch commits on its own, so a failing one leaves the earlier ones saved
+        if result['created'] or result['updated']:
+            invalidate_products_cache()
+            invalidate_user_cache(user.pk)
+    return result
+
+
+class _Echo:
+    """File-like object whose write() hands back the value (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def export_products(queryset, file_format):
+    """Yield the serialized products one line at a time.
+
+    Rows are streamed from a server-side cursor in chunks, so memory stays
+    flat regardless of how many products are exported.
+    """
+    rows = (
+        queryset
+        .order_by('id')
+        .values_list('name', 'price', 'url', 'category__slug')
+        .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    )
+    if file_format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for name, price, url, category in rows:
+            yield writer.writerow((name, price, url, category or ''))
+    elif file_format == 'jsonl':
+        for name, price, url, category in rows:
+            yield json.dumps({
+                'name': name,
+                'price': str(price),
+                'url': url,
+                'category': category,
+            }, ensure_ascii=False) + '\n'
+    else:
+        raise ImportFormatError(f'Unsupported format: {file_format}')
@@ -1,84 +1,554 @@
 from django.core.cache import cache
 from django.conf import settings
+from apps.core.async_cache import async_cache
+from apps.core.metrics import record_cache_lookup
+from apps.core.routers import afresh_reads, fresh_reads, note_write
+from collections import Counter
+import asyncio
+import hashlib
 import json
 import logging
+import math
+import random
+import threading
+import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
+# Namespaces folded into every versioned cache key. Bumping a namespace
+# version makes every key built with the old version unreachable, so a single
+# O(1) increment retires a whole family of entries without SCAN/KEYS.
+GLOBAL_NAMESPACE = 'global'
+PRODUCTS_NAMESPACE = 'products'
+CATEGORIES_NAMESPACE = 'categories'
+
+# Query parameters that change the body of a list response
+LIST_QUERY_PARAMS = ('q', 'search', 'category', 'ordering', 'page', 'page_size', 'pagination', 'cursor')
+
+_MISSING = object()
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+
+def _record_metric(name, amount=1):
+    with _metrics_lock:
+        _metrics[name] += amount
+    # Per-request counts for the request metrics and Server-Timing
+    if name in ('hits', 'stale_hits'):
+        record_cache_lookup(True)
+    elif name == 'misses':
+        record_cache_lookup(False)
+
+
+def get_cache_metrics():
+    """Return a snapshot of cache hit/miss/invalidation counters for this process."""
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    for name in ('hits', 'misses', 'stale_hits', 'early_refreshes', 'lock_waits',
+                 'sets', 'invalidations', 'errors'):
+        snapshot.setdefault(name, 0)
+    lookups = snapshot['hits'] + snapshot['misses']
+    snapshot['hit_ratio'] = snapshot['hits'] / lookups if lookups else 0.0
+    return snapshot
+
+
+def reset_cache_metrics():
+    """Reset the cache counters (used by tests and benchmarks)."""
+    with _metrics_lock:
+        _metrics.clear()
+
+
 def get_cache_key(prefix, *args):
     """Generate a cache key from prefix and arguments."""
     key_parts = [str(prefix)] + [str(arg) for arg in args]
     return ':'.join(key_parts)
 
+
+def user_namespace(user_id):
+    """Namespace holding every cache entry that belongs to one user."""
+    return get_cache_key('user', user_id if user_id is not None else 'anon')
+
+
+def _namespace_version_key(namespace):
+    return get_cache_key('ns', namespace)
+
+
+def _initial_version():
+    # Seed from the clock so that a version key evicted by Redis never comes
+    # back with a value that was already used, which would resurrect stale entries.
+    return time.time_ns()
+
+
+def get_namespace_versions(*namespaces):
+    """Return the current versions of the given namespaces in one round trip."""
+    keys = [_namespace_version_key(namespace) for namespace in namespaces]
+    try:
+        found = cache.get_many(keys)
+        versions = []
+        for key in keys:
+            version = found.get(key)
+            if version is None:
+                cache.add(key, _initial_version(), None)
+                version = cache.get(key)
+            versions.append(version)
+        return versions
+    except Exception as e:
+        _record_metric('errors')
+        logger.error(f"Failed to read namespace versions: {e}")
+        return [0] * len(namespaces)
+
+
+async def aget_namespace_versions(*namespaces):
+    """Async counterpart of get_namespace_versions()."""
+    keys = [_namespace_version_key(namespace) for namespace in namespaces]
+    try:
+        found = await async_cache.get_many(keys)
+        versions = []
+        for key in keys:
+            version = found.get(key)
+            if version is None:
+                await async_cache.add(key, _initial_version(), None)
+                version = await async_cache.get(key)
+            versions.append(version)
+        return versions
+    except Exception as e:
+        _record_metric('errors')
+        logger.error(f"Failed to read namespace versions: {e}")
+        return [0] * len(namespaces)
+
+
+def _format_validator(versions):
+    if not all(versions):
+        return None
+    return '.'.join(str(version) for version in versions)
+
+
+def get_namespace_validator(*namespaces):
+    """Current namespace versions as an HTTP validator string.
+
+    Returns None when the cache is unreachable, since a constant fallback
+    version would make every response look unchanged.
+    """
+    return _format_validator(get_namespace_versions(GLOBAL_NAMESPACE, *namespaces))
+
+
+async def aget_namespace_validator(*namespaces):
+    """Async counterpart of get_namespace_validator()."""
+    return _format_validator(await aget_namespace_versions(GLOBAL_NAMESPACE, *namespaces))
+
+
+def invalidate_namespace(namespace):
+    """Retire every cache entry built under a namespace by bumping its version."""
+    key = _namespace_version_key(namespace)
+    try:
+        note_write()
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Version key does not exist yet (or was evicted): start a fresh one.
+            if not cache.add(key, _initial_version(), None):
+                cache.incr(key)
+        _record_metric('invalidations')
+        logger.debug(f"Cache namespace invalidated: {namespace}")
+    except Exception as e:
+        _record_metric('errors')
+        logger.error(f"Failed to invalidate cache namespace {namespace}: {e}")
+
+
+def _build_versioned_key(prefix, namespaces, versions, args):
+    version_parts = [f'{namespace}.{version}' for namespace, version in zip(namespaces, versions)]
+    return get_cache_key(prefix, *version_parts, *args)
+
+
+def get_versioned_key(prefix, namespaces, *args):
+    """Generate a cache key with the current version of each namespace folded in."""
+    namespaces = (GLOBAL_NAMESPACE,) + tuple(namespaces)
+    return _build_versioned_key(prefix, namespaces, get_namespace_versions(*namespaces), args)
+
+
+async def aget_versioned_key(prefix, namespaces, *args):
+    """Async counterpart of get_versioned_key()."""
+    namespaces = (GLOBAL_NAMESPACE,) + tuple(namespaces)
+    return _build_versioned_key(prefix, namespaces, await aget_namespace_versions(*namespaces), args)
+
+
 def cache_data(key, data, timeout=None):
     """Cache data with optional timeout."""
     if timeout is None:
         timeout = getattr(settings, 'CACHE_TTL', 900)
-    
+
     try:
         cache.set(key, data, timeout)
+        _record_metric('sets')
         logger.debug(f"Data cached with key: {key}")
     except Exception as e:
+        _record_metric('errors')
         logger.error(f"Failed to cache data: {e}")
 
+
 def get_cached_data(key):
     """Retrieve cached data."""
     try:
-        data = cache.get(key)
-        if data:
-            logger.debug(f"Cache hit for key: {key}")
-        else:
+        data = cache.get(key, _MISSING)
+        if data is _MISSING:
+            _record_metric('misses')
             logger.debug(f"Cache miss for key: {key}")
+            return None
+        _record_metric('hits')
+        logger.debug(f"Cache hit for key: {key}")
         return data
     except Exception as e:
+        _record_metric('errors')
         logger.error(f"Failed to retrieve cached data: {e}")
         return None
 
-def invalidate_cache_pattern(pattern):
-    """Invalidate cache entries matching a pattern."""
+
+def _normalize_text(value):
+    # Search lookups are whitespace-delimited and case-insensitive the way
+    # LOWER()/ILIKE are; casefold() would also merge e.g. "ß" with "ss"
+    return ' '.join(str(value).split()).lower()
+
+
+def _normalize_positive_int(value, default=''):
+    # Anything but a positive int is kept verbatim, so it misses the cache
+    # and gets the view's own validation error every time
+    if value == '':
+        return default
+    try:
+        number = int(value)
+    except (TypeError, ValueError):
+        return value
+    return number if number > 0 else value
+
+
+def _normalize_ordering(value, ordering_fields, default_ordering):
+    terms = []
+    for term in str(value).split(','):
+        term = term.strip()
+        if term.lstrip('-') in ordering_fields and term not in terms:
+            terms.append(term)
+    return ','.join(terms) or default_ordering
+
+
+def pagination_mode(query_params):
+    """'cursor' when the request gets keyset pagination, else 'page'.
+
+    The list views pick their paginator with this and the cache key stores
+    its result, so the two can never disagree about the response shape.
+    """
+    if query_params.get('pagination', '').strip().lower() == 'cursor' or 'cursor' in query_params:
+        return 'cursor'
+    return 'page'
+
+
+def normalize_list_params(query_params, ordering_fields=(), default_ordering=''):
+    """Normalise list query parameters into a canonical dict.
+
+    Equivalent requests (different parameter order, case or whitespace in
+    search terms, explicit default ordering or page) map to the same dict.
+    """
+    get = query_params.get
+    page = get('page', '')
+    return {
+        'q': _normalize_text(get('q', '')),
+        'search': _normalize_text(get('search', '')),
+        'category': _normalize_positive_int(get('category', '')),
+        'ordering': _normalize_ordering(get('ordering', ''), ordering_fields, default_ordering),
+        # DRF only accepts 'last' exactly
+        'page': page if page == 'last' else _normalize_positive_int(page, 1),
+        'page_size': _normalize_positive_int(get('page_size', '')),
+        'pagination': pagination_mode(query_params),
+        'cursor': get('cursor', '').strip(),
+    }
+
+
+def get_params_digest(params):
+    """Deterministic digest of normalised params, identical across processes."""
+    payload = json.dumps(params, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def _acquire_lock(lock_key):
+    token = uuid.uuid4().hex
+    timeout = getattr(settings, 'CACHE_LOCK_TIMEOUT', 10)
+    # cache.add maps to SET NX EX on Redis, so only one worker wins the lock
+    if cache.add(lock_key, token, timeout):
+        return token
+    return None
+
+
+def _release_lock(lock_key, token):
     try:
-        # This is a simplified version. In production, you might want to use
-        # Redis SCAN command for pattern matching
-        logger.info(f"Cache invalidation requested for pattern: {pattern}")
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
     except Exception as e:
-        logger.error(f"Failed to invalidate cache pattern: {e}")
+        logger.error(f"Failed to release cache lock {lock_key}: {e}")
 
-def cache_products_list(user_id, filters, data):
-    """Cache products list for a user with specific filters."""
-    key = get_cache_key('products_list', user_id, hash(str(filters)))
-    cache_data(key, data)
 
-def get_cached_products_list(user_id, filters):
-    """Get cached products list for a user with specific filters."""
-    key = get_cache_key('products_list', user_id, hash(str(filters)))
-    return get_cached_data(key)
+async def _aacquire_lock(lock_key):
+    token = uuid.uuid4().hex
+    timeout = getattr(settings, 'CACHE_LOCK_TIMEOUT', 10)
+    if await async_cache.add(lock_key, token, timeout):
+        return token
+    return None
+
+
+async def _arelease_lock(lock_key, token):
+    try:
+        if await async_cache.get(lock_key) == token:
+            await async_cache.delete(lock_key)
+    except Exception as e:
+        logger.error(f"Failed to release cache lock {lock_key}: {e}")
 
-def cache_categories_list(data):
-    """Cache categories list."""
-    key = get_cache_key('categories_list')
-    cache_data(key, data)
 
-def get_cached_categories_list():
-    """Get cached categories list."""
-    key = get_cache_key('categories_list')
-    return get_cached_data(key)
+def _should_refresh_early(entry, now, beta):
+    # XFetch: recompute with a probability that grows as expiry approaches,
+    # scaled by how long the value took to compute.
+    jitter = -math.log(1.0 - random.random())
+    return now + entry['delta'] * beta * jitter >= entry['expires_at']
+
+
+def _compute_and_store(key, compute, timeout):
+    started = time.monotonic()
+    # The entry is shared by every client, so never build it from a lagging replica
+    with fresh_reads():
+        value = compute()
+    delta = time.monotonic() - started
+    stale_ttl = getattr(settings, 'CACHE_STALE_TTL', 300)
+    try:
+        cache.set(key, _make_entry(value, delta, timeout), timeout + stale_ttl)
+        _record_metric('sets')
+    except Exception as e:
+        _record_metric('errors')
+        logger.error(f"Failed to cache data: {e}")
+    return value
+
+
+def _make_entry(value, delta, timeout):
+    return {'value': value, 'delta': delta, 'expires_at': time.time() + timeout}
+
+
+async def _acompute_and_store(key, compute, timeout):
+    started = time.monotonic()
+    async with afresh_reads():
+        value = await compute()
+    delta = time.monotonic() - started
+    stale_ttl = getattr(settings, 'CACHE_STALE_TTL', 300)
+    try:
+        await async_cache.set(key, _make_entry(value, delta, timeout), timeout + stale_ttl)
+        _record_metric('sets')
+    except Exception as e:
+        _record_metric('errors')
+        logger.error(f"Failed to cache data: {e}")
+    return value
+
+
+def _valid_entry(entry):
+    if isinstance(entry, dict) and 'expires_at' in entry:
+        return entry
+    return None
+
+
+def _read_entry(key):
+    try:
+        return _valid_entry(cache.get(key))
+    except Exception as e:
+        _record_metric('errors')
+        logger.error(f"Failed to retrieve cached data: {e}")
+        return None
+
+
+async def _aread_entry(key):
+    try:
+        return _valid_entry(await async_cache.get(key))
+    except Exception as e:
+        _record_metric('errors')
+        logger.error(f"Failed to retrieve cached data: {e}")
+        return None
+
+
+def get_or_compute(key, compute, timeout=None, beta=None):
+    """Return the cached value for key, computing it at most once per expiry.
+
+    Only the worker holding the rebuild lock calls compute(); concurrent
+    callers get the stale value while it is rebuilt, or wait briefly for the
+    winner on a cold miss. Values are refreshed probabilistically before
+    their TTL runs out (XFetch) so popular keys rarely expire under load.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'CACHE_TTL', 900)
+    if beta is None:
+        beta = getattr(settings, 'CACHE_XFETCH_BETA', 1.0)
+    lock_key = get_cache_key('lock', key)
+
+    entry = _read_entry(key)
+    if entry is not None:
+        now = time.time()
+        if not _should_refresh_early(entry, now, beta):
+            _record_metric('hits')
+            return entry['value']
+
+        token = _acquire_lock(lock_key)
+        if token is None:
+            # Someone else is rebuilding: serve the stale value meanwhile
+            _record_metric('stale_hits')
+            return entry['value']
+        _record_metric('early_refreshes' if now < entry['expires_at'] else 'misses')
+        try:
+            return _compute_and_store(key, compute, timeout)
+        finally:
+            _release_lock(lock_key, token)
+
+    _record_metric('misses')
+    token = _acquire_lock(lock_key)
+    if token is None:
+        deadline = time.monotonic() + getattr(settings, 'CACHE_LOCK_WAIT', 2.0)
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = _read_entry(key)
+            if entry is not None:
+                _record_metric('lock_waits')
+                return entry['value']
+        # The winner is too slow or died holding the lock: compute ourselves
+        return compute()
+    try:
+        return _compute_and_store(key, compute, timeout)
+    finally:
+        _release_lock(lock_key, token)
+
+
+async def aget_or_compute(key, compute, timeout=None, beta=None):
+    """Async counterpart of get_or_compute(); compute is a coroutine function."""
+    if timeout is None:
+        timeout = getattr(settings, 'CACHE_TTL', 900)
+    if beta is None:
+        beta = getattr(settings, 'CACHE_XFETCH_BETA', 1.0)
+    lock_key = get_cache_key('lock', key)
+
+    entry = await _aread_entry(key)
+    if entry is not None:
+        now = time.time()
+        if not _should_refresh_early(entry, now, beta):
+            _record_metric('hits')
+            return entry['value']
+
+        token = await _aacquire_lock(lock_key)
+        if token is None:
+            _record_metric('stale_hits')
+            return entry['value']
+        _record_metric('early_refreshes' if now < entry['expires_at'] else 'misses')
+        try:
+            return await _acompute_and_store(key, compute, timeout)
+        finally:
+            await _arelease_lock(lock_key, token)
+
+    _record_metric('misses')
+    token = await _aacquire_lock(lock_key)
+    if token is None:
+        deadline = time.monotonic() + getattr(settings, 'CACHE_LOCK_WAIT', 2.0)
+        while time.monotonic() < deadline:
+            # Unlike the sync path, waiting here does not hold a worker
+            await asyncio.sleep(0.05)
+            entry = await _aread_entry(key)
+            if entry is not None:
+                _record_metric('lock_waits')
+                return entry['value']
+        return await compute()
+    try:
+        return await _acompute_and_store(key, compute, timeout)
+    finally:
+        await _arelease_lock(lock_key, token)
+
+
+def get_products_list_key(user_id, filters, media_type=''):
+    """Build the cache key for a rendered products list page."""
+    return get_versioned_key(
+        'products_page',
+        (PRODUCTS_NAMESPACE, user_namespace(user_id)),
+        get_params_digest(filters),
+        media_type
+    )
+
+
+def get_or_compute_products_list(user_id, filters, compute, media_type=''):
+    """Get a products list page for a user with specific filters, building it on a miss."""
+    return get_or_compute(get_products_list_key(user_id, filters, media_type), compute)
+
+
+async def aget_or_compute_products_list(user_id, filters, compute, media_type=''):
+    """Async counterpart of get_or_compute_products_list(); shares its cache entries."""
+    key = await aget_versioned_key(
+        'products_page',
+        (PRODUCTS_NAMESPACE, user_namespace(user_id)),
+        get_params_digest(filters),
+        media_type
+    )
+    return await aget_or_compute(key, compute)
+
+
+def get_categories_list_key(filters=None, media_type=''):
+    """Build the cache key for a rendered categories list page."""
+    return get_versioned_key(
+        'categories_page',
+        (CATEGORIES_NAMESPACE,),
+        get_params_digest(filters or {}),
+        media_type
+    )
+
+
+def get_or_compute_categories_list(filters, compute, media_type=''):
+    """Get a categories list page, building it on a miss."""
+    return get_or_compute(get_categories_list_key(filters, media_type), compute)
+
+
+async def aget_or_compute_categories_list(filters, compute, media_type=''):
+    """Async counterpart of get_or_compute_categories_list(); shares its cache entries."""
+    key = await aget_versioned_key(
+        'categories_page',
+        (CATEGORIES_NAMESPACE,),
+        get_params_digest(filters or {}),
+        media_type
+    )
+    return await aget_or_compute(key, compute)
+
+
+def invalidate_products_cache():
+    """Invalidate every cached products list.
+
+    Product lists are shared between users and carry per-category counts, so a
+    product write retires the products and categories namespaces.
+    """
+    invalidate_namespace(PRODUCTS_NAMESPACE)
+    invalidate_namespace(CATEGORIES_NAMESPACE)
+
+
+def invalidate_categories_cache():
+    """Invalidate the cached categories list."""
+    invalidate_namespace(CATEGORIES_NAMESPACE)
+
 
 def invalidate_user_cache(user_id):
     """Invalidate all cache entries for a specific user."""
-    patterns = [
-        f'products_list:{user_id}:*',
-        f'user_profile:{user_id}',
-    ]
-    
-    for pattern in patterns:
-        invalidate_cache_pattern(pattern)
+    invalidate_namespace(user_namespace(user_id))
+
+
+def invalidate_all_cache():
+    """Invalidate every versioned cache entry."""
+    invalidate_namespace(GLOBAL_NAMESPACE)
+
+
+def get_user_profile_key(user_id):
+    """Build the cache key for a user profile."""
+    return get_versioned_key('user_profile', (user_namespace(user_id),))
+
 
 def cache_user_profile(user_id, data):
     """Cache user profile data."""
-    key = get_cache_key('user_profile', user_id)
-    cache_data(key, data)
+    cache_data(get_user_profile_key(user_id), data)
+
 
 def get_cached_user_profile(user_id):
     """Get cached user profile data."""
-    key = get_cache_key('user_profile', user_id)
-    return get_cached_data(key)
+    return get_cached_data(get_user_profile_key(user_id))
@@ -0,0 +1,244 @@
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from apps.accounts.authentication import invalidate_user_snapshot
+
+from .cache_utils import invalidate_products_cache, invalidate_user_cache
+
+logger = logging.getLogger(__name__)
+
+# Target widths; smaller originals are never upscaled
+IMAGE_SIZES = {
+    'thumb': 160,
+    'card': 480,
+    'full': 1280,
+}
+IMAGE_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+DERIVATIVES_DIR = 'derivatives'
+# Decompression bomb guard: refuse anything above ~50 megapixels
+MAX_IMAGE_PIXELS = 50_000_000
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def content_hash(file):
+    """sha256 of a file's bytes, read in chunks."""
+    digest = hashlib.sha256()
+    file.open('rb')
+    try:
+        for chunk in file.chunks():
+            digest.update(chunk)
+    finally:
+        file.close()
+    return digest.hexdigest()
+
+
+def derivative_name(digest, size, file_format):
+    extension = IMAGE_FORMATS[file_format][1]
+    return f'{DERIVATIVES_DIR}/{digest[:2]}/{digest}/{size}.{extension}'
+
+
+def derivatives_exist(digest):
+    return all(
+        default_storage.exists(derivative_name(digest, size, file_format))
+        for size in IMAGE_SIZES
+        for file_format in IMAGE_FORMATS
+    )
+
+
+def _resize(image, width):
+    if image.width <= width:
+        return image.copy()
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def generate_derivatives(file, digest):
+    """Write every size/format of an image under its content hash.
+
+    Returns False when the derivatives were already there, which makes a
+    re-upload of the same bytes free.
+    """
+    if derivatives_exist(digest):
+        return False
+
+    file.open('rb')
+    try:
+        with Image.open(file) as source:
+            if source.width * source.height > MAX_IMAGE_PIXELS:
+                raise ValueError(f'Image is too large ({source.width}x{source.height})')
+            # Apply the camera rotation before the EXIF data is dropped
+            image = ImageOps.exif_transpose(source)
+            image.load()
+    finally:
+        file.close()
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+
+    # Largest first so each step resizes an already smaller image
+    for size, width in sorted(IMAGE_SIZES.items(), key=lambda item: -item[1]):
+        image = _resize(image, width)
+        for file_format, (pil_format, _, options) in IMAGE_FORMATS.items():
+            output = image
+            if pil_format == 'JPEG' and output.mode != 'RGB':
+                background = Image.new('RGB', output.size, (255, 255, 255))
+                background.paste(output, mask=output.getchannel('A'))
+                output = background
+            buffer = BytesIO()
+            output.save(buffer, pil_format, **options)
+            name = derivative_name(digest, size, file_format)
+            if not default_storage.exists(name):
+                default_storage.save(name, ContentFile(buffer.getvalue()))
+    return True
+
+
+def get_srcset(digest, request=None):
+    """Map of format -> srcset string, plus a card-size JPEG ``src`` fallback."""
+    if not digest:
+        return None
+
+    def url(name):
+        value = default_storage.url(name)
+        return request.build_absolute_uri(value) if request is not None else value
+
+    srcset = {
+        file_format: ', '.join(
+            f'{url(derivative_name(digest, size, file_format))} {width}w'
+            for size, width in IMAGE_SIZES.items()
+        )
+        for file_format in IMAGE_FORMATS
+    }
+    srcset['src'] = url(derivative_name(digest, 'card', 'jpeg'))
+    return srcset
+
+
+def srcset_builder(request=None):
+    """Return a digest -> get_srcset() function that resolves the URL prefix once.
+
+    Meant for serializing many rows. Only storages whose URLs are derived
+    from the file path qualify; others fall back to get_srcset() per row.
+    """
+    if not isinstance(default_storage, FileSystemStorage):
+        return lambda digest: get_srcset(digest, request)
+
+    prefix = default_storage.url(f'{DERIVATIVES_DIR}/')
+    if request is not None:
+        prefix = request.build_absolute_uri(prefix)
+    variants = [
+        (file_format, [(f'{size}.{extension}', width) for size, width in IMAGE_SIZES.items()])
+        for file_format, (_, extension, _) in IMAGE_FORMATS.items()
+    ]
+    card = f"card.{IMAGE_FORMATS['jpeg'][1]}"
+
+    def build(digest):
+        if not digest:
+            return None
+        base = f'{prefix}{digest[:2]}/{digest}/'
+        srcset = {
+            file_format: ', '.join(f'{base}{name} {width}w' for name, width in names)
+            for file_format, names in variants
+        }
+        srcset['src'] = base + card
+        return srcset
+
+    return build
+
+
+def process_image(model_label, pk, field_name, hash_field):
+    """Hash an instance's image, build its derivatives and store the hash.
+
+    The hash is only written if the image is still the one that was
+    processed, so a newer upload is never overwritten by a slow worker.
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only('pk', field_name).first()
+    if instance is None:
+        return None
+    file = getattr(instance, field_name)
+    if not file:
+        return None
+
+    digest = content_hash(file)
+    generate_derivatives(file, digest)
+    updated = model.objects.filter(pk=pk, **{field_name: file.name}).update(
+        **{hash_field: digest, 'updated_at': timezone.now()}
+    )
+
+    if updated:
+        if model_label == 'tasks.Product':
+            invalidate_products_cache()
+        else:
+            invalidate_user_cache(pk)
+            invalidate_user_snapshot(pk)
+    return digest
+
+
+def _run(model_label, pk, field_name, hash_field):
+    close_old_connections()
+    try:
+        process_image(model_label, pk, field_name, hash_field)
+    except Exception as e:
+        logger.error(f"Failed to process {model_label} {pk} {field_name}: {e}")
+    finally:
+        close_old_connections()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'IMAGE_WORKERS', 2),
+                thread_name_prefix='images'
+            )
+        return _executor
+
+
+def image_changed(instance, field_name, hash_field):
+    """React to a saved instance whose image may have been replaced or removed.
+
+    Clears the stale hash and queues the new file for processing. Needs the
+    ``_loaded_<field>`` name recorded by the model's from_db().
+    """
+    file = getattr(instance, field_name)
+    loaded = getattr(instance, f'_loaded_{field_name}', None)
+    current = file.name if file else None
+    setattr(instance, f'_loaded_{field_name}', current)
+    if current == (loaded or None):
+        return False
+
+    if getattr(instance, hash_field):
+        setattr(instance, hash_field, '')
+        type(instance).objects.filter(pk=instance.pk).update(**{hash_field: ''})
+    if current:
+        schedule_derivatives(instance, field_name, hash_field)
+    return True
+
+
+def schedule_derivatives(instance, field_name, hash_field):
+    """Queue derivative generation for after the current transaction commits."""
+    args = (instance._meta.label, instance.pk, field_name, hash_field)
+
+    def submit():
+        if getattr(settings, 'IMAGE_PROCESSING_SYNC', False):
+            process_image(*args)
+        else:
+            get_executor().submit(_run, *args)
+
+    transaction.on_commit(submit)
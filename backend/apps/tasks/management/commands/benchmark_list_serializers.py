@@ -0,0 +1,90 @@
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.test import APIRequestFactory
+
+from apps.tasks.models import Category, Product
+from apps.tasks.serializers import ProductListRowSerializer, ProductListSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Per-row cost of ProductListSerializer vs the values_list row serializer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Number of products to serialize per run'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per variant; the best one is reported'
+        )
+
+    def best_of(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        host = next((h.lstrip('.') for h in settings.ALLOWED_HOSTS if h != '*'), 'localhost')
+        context = {'request': APIRequestFactory().get('/api/v1/tasks/products/', HTTP_HOST=host)}
+
+        # Benchmark rows live only inside this transaction
+        try:
+            with transaction.atomic():
+                user = get_user_model().objects.create_user(
+                    username='benchmark', email='benchmark@example.invalid', password=None
+                )
+                category = Category.objects.create(name='Benchmark', slug='benchmark-serializers')
+                Product.objects.bulk_create(
+                    Product(
+                        name=f'Product {i}', price=Decimal('10.00') + i,
+                        url=f'https://benchmark.invalid/{i}', user=user, category=category,
+                        image=f'products/{i}.jpg', image_hash=f'{i:064x}'
+                    )
+                    for i in range(rows)
+                )
+                queryset = Product.objects.filter(user=user).order_by('id')
+                instances = queryset.select_related('user', 'category')
+                values = ProductListRowSerializer.values(queryset)
+
+                loaded_instances = list(instances)
+                loaded_values = list(values)
+                results = (
+                    ('model serializer', 'serialize only',
+                     lambda: ProductListSerializer(loaded_instances, many=True, context=context).data),
+                    ('row serializer', 'serialize only',
+                     lambda: ProductListRowSerializer(loaded_values, context=context).data),
+                    ('model serializer', 'query + serialize',
+                     lambda: ProductListSerializer(instances.all(), many=True, context=context).data),
+                    ('row serializer', 'query + serialize',
+                     lambda: ProductListRowSerializer(values.all(), context=context).data),
+                )
+
+                self.stdout.write(f'{rows} rows, best of {repeat}')
+                self.stdout.write(f"{'variant':<18} {'scope':<18} {'total ms':>9} {'µs/row':>8}")
+                for variant, scope, func in results:
+                    elapsed = self.best_of(func, repeat)
+                    self.stdout.write(
+                        f'{variant:<18} {scope:<18} {elapsed * 1e3:>9.2f} {elapsed * 1e6 / rows:>8.2f}'
+                    )
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(self.style.SUCCESS('✓ Done'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.tasks.prices import compact_price_history
+
+
+class Command(BaseCommand):
+    help = 'Downsample old raw price points into daily min/max buckets'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--raw-days',
+            type=int,
+            default=30,
+            help='Keep raw points for this many days'
+        )
+
+    def handle(self, *args, **options):
+        removed, buckets = compact_price_history(raw_days=options['raw_days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Compacted {removed} raw point(s) into {buckets} daily bucket(s)'
+        ))
@@ -0,0 +1,38 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from apps.tasks.images import process_image
+from apps.tasks.models import Product
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnail/card/full WebP and JPEG derivatives for product images and avatars'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Also re-hash images that already have derivatives'
+        )
+
+    def handle(self, *args, **options):
+        targets = (
+            (Product, 'image', 'image_hash'),
+            (get_user_model(), 'avatar', 'avatar_hash'),
+        )
+        for model, field_name, hash_field in targets:
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            if not options['force']:
+                queryset = queryset.filter(**{hash_field: ''})
+
+            done = failed = 0
+            for pk in queryset.values_list('pk', flat=True).iterator():
+                try:
+                    process_image(model._meta.label, pk, field_name, hash_field)
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stdout.write(self.style.WARNING(f'  ✗ {model.__name__} {pk}: {e}'))
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {model.__name__}.{field_name}: processed {done}, failed {failed}'
+            ))
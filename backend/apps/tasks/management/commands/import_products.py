@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+
+from apps.tasks.bulk import DEFAULT_BATCH_SIZE, IMPORT_FORMATS, import_products, iter_rows
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Bulk import products for a user from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='CSV or JSONL file to import')
+        parser.add_argument(
+            '--user',
+            type=str,
+            required=True,
+            help='Email of the user who will own the products'
+        )
+        parser.add_argument(
+            '--format',
+            choices=IMPORT_FORMATS,
+            help='File format (defaults to the file extension)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Rows validated and written per transaction'
+        )
+        parser.add_argument(
+            '--skip-existing',
+            action='store_true',
+            help='Leave products whose url already exists untouched'
+        )
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in IMPORT_FORMATS:
+            raise CommandError(f'Cannot infer format from "{path.name}", use --format')
+
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" does not exist')
+
+        with path.open(encoding='utf-8-sig', newline='') as lines:
+            result = import_products(
+                iter_rows(lines, file_format),
+                user,
+                batch_size=options['batch_size'],
+                update_existing=not options['skip_existing']
+            )
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f'  Row {error["row"]}: {error["errors"]}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {result["created"]}, updated {result["updated"]}, '
+            f'skipped {result["skipped"]}, failed {len(result["errors"])}'
+        ))
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+from django.utils import timezone
+
+from apps.tasks.models import Product
+from apps.tasks.scraper import ProductScraper, apply_results
+
+
+class Command(BaseCommand):
+    help = 'Fetch product pages and store title, price, currency and image'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ids',
+            type=int,
+            nargs='+',
+            help='Only scrape these product ids'
+        )
+        parser.add_argument(
+            '--stale-hours',
+            type=int,
+            default=24,
+            help='Re-scrape products last scraped more than this many hours ago'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=1000,
+            help='Maximum number of products per run'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            help='Size of the fetch thread pool'
+        )
+        parser.add_argument(
+            '--per-domain',
+            type=int,
+            help='Maximum concurrent requests per domain'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Product.objects.all()
+        if options['ids']:
+            queryset = queryset.filter(pk__in=options['ids'])
+        else:
+            cutoff = timezone.now() - timedelta(hours=options['stale_hours'])
+            queryset = queryset.filter(Q(scraped_at__isnull=True) | Q(scraped_at__lt=cutoff))
+        pairs = list(queryset.order_by(F('scraped_at').asc(nulls_first=True), 'id').values_list('id', 'url')[:options['limit']])
+
+        self.stdout.write(f'Scraping {len(pairs)} product(s)...')
+        scraper = ProductScraper(max_workers=options['workers'], per_domain=options['per_domain'])
+        results = scraper.scrape(pairs)
+        updated = apply_results(results)
+
+        for result in results:
+            if result.status == 'error':
+                self.stdout.write(self.style.WARNING(f'  ✗ {result.url}: {result.error}'))
+        not_modified = sum(result.status == 'not_modified' for result in results)
+        self.stdout.write(self.style.SUCCESS(
+            f'✓ Updated {updated} product(s), {not_modified} unchanged since last fetch'
+        ))
@@ -0,0 +1,162 @@
+import math
+import random
+import time
+from collections import Counter
+from decimal import Decimal
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.text import slugify
+
+from apps.tasks.models import Category, Product
+
+User = get_user_model()
+
+# Seeded rows are recognisable by these, so --clear never touches real data
+EMAIL_DOMAIN = 'benchmark.invalid'
+URL_PREFIX = f'https://{EMAIL_DOMAIN}/products/'
+CATEGORY_PREFIX = 'bench-'
+
+ADJECTIVES = [
+    'Wireless', 'Compact', 'Portable', 'Ergonomic', 'Smart', 'Vintage', 'Waterproof', 'Silent',
+    'Бездротовий', 'Компактний', 'Розумний', 'Легкий',
+]
+NOUNS = [
+    'Headphones', 'Keyboard', 'Lamp', 'Backpack', 'Kettle', 'Watch', 'Camera', 'Speaker',
+    'Chair', 'Monitor', 'Blender', 'Jacket', 'Навушники', 'Рюкзак', 'Чайник', 'Годинник',
+]
+BRANDS = ['Acme', 'Nordic', 'Zenith', 'Orbit', 'Kyivtech', 'Lumo', 'Polar', 'Vega']
+CATEGORY_NAMES = [
+    'Electronics', 'Books', 'Home', 'Kitchen', 'Garden', 'Sports', 'Toys', 'Fashion',
+    'Beauty', 'Health', 'Music', 'Games', 'Office', 'Travel', 'Pets', 'Tools',
+]
+
+
+def zipf_weights(count, exponent):
+    """Weights of a Zipf distribution: a few heavy hitters and a long tail."""
+    return [1 / (rank + 1) ** exponent for rank in range(count)]
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-create users, categories and products for benchmarking. '
+        'Ownership and categories follow Zipf distributions, so a few users own '
+        'most products, as in real wish lists. Every user has the same password.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Number of users')
+        parser.add_argument('--categories', type=int, default=30, help='Number of categories')
+        parser.add_argument('--products', type=int, default=20000, help='Number of products')
+        parser.add_argument(
+            '--skew', type=float, default=1.1,
+            help='Zipf exponent of products per user and per category (0 spreads them evenly)'
+        )
+        parser.add_argument(
+            '--uncategorized', type=float, default=0.1, help='Share of products without a category'
+        )
+        parser.add_argument('--password', default='benchmark', help='Password of every seeded user')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed, for repeatable data')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per INSERT')
+        parser.add_argument(
+            '--clear', action='store_true', help='Delete previously seeded data first'
+        )
+
+    def handle(self, *args, **options):
+        seeded_users = User.objects.filter(email__endswith=f'@{EMAIL_DOMAIN}')
+        if options['clear']:
+            self.clear(seeded_users)
+        elif seeded_users.exists():
+            raise CommandError('Benchmark data already exists; pass --clear to replace it')
+        if options['users'] < 1 or options['products'] < 0:
+            raise CommandError('Need at least one user and a non-negative product count')
+
+        rng = random.Random(options['seed'])
+        started = time.perf_counter()
+        with transaction.atomic():
+            owners = rng.choices(
+                range(options['users']),
+                weights=zipf_weights(options['users'], options['skew']),
+                k=options['products']
+            )
+            users = self.create_users(options, Counter(owners))
+            categories = self.create_categories(options['categories'])
+            self.create_products(rng, options, [users[i] for i in owners], categories)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Seeded {len(users)} users, {len(categories)} categories and {options['products']} "
+            f"products in {time.perf_counter() - started:.1f}s (password: {options['password']})"
+        ))
+
+    def clear(self, seeded_users):
+        # Deleting the owners cascades to their products
+        deleted, _ = seeded_users.delete()
+        deleted += Category.objects.filter(slug__startswith=CATEGORY_PREFIX).delete()[0]
+        self.stdout.write(f'Deleted {deleted} previously seeded rows')
+
+    def create_users(self, options, products_per_user):
+        # Hashing is deliberately slow; one hash serves every user
+        password = make_password(options['password'])
+        users = [
+            User(
+                username=f'bench_user_{i}',
+                email=f'user{i}@{EMAIL_DOMAIN}',
+                first_name=f'User{i}',
+                last_name='Benchmark',
+                password=password,
+                # bulk_create skips the signals that maintain the counter
+                products_count=products_per_user[i]
+            )
+            for i in range(options['users'])
+        ]
+        created = []
+        for batch in batched(users, options['batch_size']):
+            created.extend(User.objects.bulk_create(batch))
+        self.stdout.write(f'  {len(created)} users')
+        return created
+
+    def create_categories(self, count):
+        categories = []
+        for i in range(count):
+            name = CATEGORY_NAMES[i % len(CATEGORY_NAMES)]
+            if i >= len(CATEGORY_NAMES):
+                name = f'{name} {i // len(CATEGORY_NAMES) + 1}'
+            categories.append(Category(name=f'Bench {name}', slug=f'{CATEGORY_PREFIX}{slugify(name)}'))
+        categories = Category.objects.bulk_create(categories)
+        self.stdout.write(f'  {len(categories)} categories')
+        return categories
+
+    def create_products(self, rng, options, owners, categories):
+        category_weights = zipf_weights(len(categories), options['skew'])
+
+        def products():
+            for i, owner in enumerate(owners):
+                category = None
+                if categories and rng.random() >= options['uncategorized']:
+                    category = rng.choices(categories, weights=category_weights)[0]
+                # Log-normal prices: mostly tens, with a long expensive tail
+                price = max(Decimal('0.99'), Decimal(str(round(math.exp(rng.gauss(3.5, 1.2)), 2))))
+                yield Product(
+                    name=f'{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {i}',
+                    price=price,
+                    url=f'{URL_PREFIX}{i}',
+                    user=owner,
+                    category=category,
+                    currency='UAH'
+                )
+
+        created = 0
+        for batch in batched(products(), options['batch_size']):
+            Product.objects.bulk_create(batch)
+            created += len(batch)
+            self.stdout.write(f'  {created} products', ending='\r')
+        self.stdout.write(f'  {created} products')
@@ -0,0 +1,71 @@
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Full-text and trigram indexes only exist on PostgreSQL; on other backends
+# search falls back to icontains (see apps.tasks.search).
+POSTGRES_FORWARD_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+    """
+    CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(NEW.url, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER products_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, url ON products
+    FOR EACH ROW EXECUTE FUNCTION products_search_vector_update();
+    """,
+    # Backfill existing rows through the trigger
+    "UPDATE products SET name = name;",
+    "CREATE INDEX products_search_vector_gin ON products USING gin (search_vector);",
+    "CREATE INDEX products_name_trgm ON products USING gin (name gin_trgm_ops);",
+    "CREATE INDEX category_name_trgm ON category USING gin (name gin_trgm_ops);",
+    "CREATE INDEX users_username_trgm ON users USING gin (username gin_trgm_ops);",
+]
+
+POSTGRES_REVERSE_SQL = [
+    "DROP INDEX IF EXISTS users_username_trgm;",
+    "DROP INDEX IF EXISTS category_name_trgm;",
+    "DROP INDEX IF EXISTS products_name_trgm;",
+    "DROP INDEX IF EXISTS products_search_vector_gin;",
+    "DROP TRIGGER IF EXISTS products_search_vector_trigger ON products;",
+    "DROP FUNCTION IF EXISTS products_search_vector_update();",
+    "DROP EXTENSION IF EXISTS pg_trgm;",
+]
+
+
+def _run_on_postgres(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_user_products_count'),
+        ('tasks', '0002_sync_models_keyset_indexes'),
+    ]
+
+    # pg_trgm is created in the RunPython below rather than with TrigramExtension(),
+    # whose reverse queries pg_extension even on SQLite
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(
+            _run_on_postgres(POSTGRES_FORWARD_SQL),
+            _run_on_postgres(POSTGRES_REVERSE_SQL),
+        ),
+    ]
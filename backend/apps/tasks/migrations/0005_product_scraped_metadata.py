@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_product_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='currency',
+            field=models.CharField(blank=True, max_length=3, verbose_name='Currency'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='image_url',
+            field=models.URLField(blank=True, max_length=500, verbose_name='Remote image url'),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='scraped_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='product',
+            name='scraped_title',
+            field=models.CharField(blank=True, max_length=255, verbose_name='Scraped title'),
+        ),
+    ]
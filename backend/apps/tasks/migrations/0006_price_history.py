@@ -0,0 +1,50 @@
+# Generated by Django 5.2.6 on 2026-10-17 23:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def seed_current_prices(apps, schema_editor):
+    # Start every series from the price products have today
+    Product = apps.get_model('tasks', 'Product')
+    PriceHistory = apps.get_model('tasks', 'PriceHistory')
+    db_alias = schema_editor.connection.alias
+    now = timezone.now()
+    batch = []
+    for product_id, price, updated_at in Product.objects.using(db_alias).values_list('id', 'price', 'updated_at').iterator(chunk_size=2000):
+        batch.append(PriceHistory(product_id=product_id, price=price, observed_at=updated_at or now))
+        if len(batch) >= 2000:
+            PriceHistory.objects.using(db_alias).bulk_create(batch)
+            batch = []
+    PriceHistory.objects.using(db_alias).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_product_scraped_metadata'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('observed_at', models.DateTimeField()),
+                ('resolution', models.CharField(choices=[('raw', 'Raw'), ('day', 'Day')], default='raw', max_length=3)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('price_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='price_history', to='tasks.product')),
+            ],
+            options={
+                'verbose_name': 'Price observation',
+                'verbose_name_plural': 'Price history',
+                'db_table': 'price_history',
+                'ordering': ['observed_at'],
+                'indexes': [models.Index(fields=['product', 'observed_at'], name='price_history_product_time_idx')],
+            },
+        ),
+        migrations.RunPython(seed_current_prices, migrations.RunPython.noop),
+    ]
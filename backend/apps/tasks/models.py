@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.contrib.postgres.search import SearchVectorField
 from django.conf import settings
 from django.utils.text import slugify
 from django.urls import reverse
@@ -33,31 +34,64 @@ class Product(models.Model):
     price = models.DecimalField(verbose_name='Product price', max_digits=10, decimal_places=2)
     url = models.URLField(unique=True, max_length=255, verbose_name="Product url")
     image = models.ImageField(upload_to='products/', blank=True, null=True)
+    # sha256 of the image; names its derivatives, see apps.tasks.images
+    image_hash = models.CharField(max_length=64, blank=True, editable=False)
     
+    # FK lookups are served by the (fk, -created_at) composite indexes below,
+    # so the single-column FK indexes would only add write cost.
     category = models.ForeignKey(
         Category,
         null=True,
         blank=True, 
         related_name='products',
-        on_delete=models.SET_NULL
+        on_delete=models.SET_NULL,
+        db_index=False
     )
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
-        related_name='products'
+        related_name='products',
+        db_index=False
     )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Filled in from the product page by apps.tasks.scraper
+    scraped_title = models.CharField(verbose_name='Scraped title', max_length=255, blank=True)
+    currency = models.CharField(verbose_name='Currency', max_length=3, blank=True)
+    image_url = models.URLField(verbose_name='Remote image url', max_length=500, blank=True)
+    scraped_at = models.DateTimeField(null=True, blank=True)
+    # Maintained by a database trigger on PostgreSQL, see migration 0003
+    search_vector = SearchVectorField(null=True, editable=False)
     
     class Meta:
         db_table = 'products'
         verbose_name = 'Product'
         verbose_name_plural = 'Products'
         ordering = ['-created_at']
+        indexes = [
+            # List hot path: filter by owner or category, newest first
+            models.Index(fields=['user', '-created_at'], name='products_user_created_idx'),
+            models.Index(fields=['category', '-created_at'], name='products_category_created_idx'),
+            # Keyset pagination seeks on (ordering field, id); the (price, id)
+            # index also serves plain price ordering and range filters
+            models.Index(fields=['created_at', 'id'], name='products_created_id_idx'),
+            models.Index(fields=['updated_at', 'id'], name='products_updated_id_idx'),
+            models.Index(fields=['name', 'id'], name='products_name_id_idx'),
+            models.Index(fields=['price', 'id'], name='products_price_id_idx'),
+        ]
         
         
     def __str__(self):
         return self.name
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember owner, price and image as loaded so signals can detect changes
+        instance._loaded_user_id = instance.__dict__.get('user_id')
+        instance._loaded_price = instance.__dict__.get('price')
+        instance._loaded_image = instance.__dict__.get('image')
+        return instance
     
     def clean(self):
         from django.core.exceptions import ValidationError
@@ -66,5 +100,54 @@ class Product(models.Model):
     
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
-    
\ No newline at end of file
+        # Counter updates in post_save must commit together with the row
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+    
+
+
+class PriceHistory(models.Model):
+    """A price observation for a product.
+
+    Recent history is kept as raw points (one row per price change, with
+    unchanged prices deduplicated). Older history is compacted into one
+    ``day`` row per product and day that keeps the min, max and closing
+    price, see apps.tasks.prices.
+    """
+    RESOLUTION_RAW = 'raw'
+    RESOLUTION_DAY = 'day'
+    RESOLUTION_CHOICES = (
+        (RESOLUTION_RAW, 'Raw'),
+        (RESOLUTION_DAY, 'Day'),
+    )
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name='price_history',
+        # Served by the (product, observed_at) index
+        db_index=False
+    )
+    observed_at = models.DateTimeField()
+    resolution = models.CharField(max_length=3, choices=RESOLUTION_CHOICES, default=RESOLUTION_RAW)
+    # Observed price, or the closing price of a day bucket
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Only set on day buckets
+    price_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    price_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+
+    class Meta:
+        db_table = 'price_history'
+        verbose_name = 'Price observation'
+        verbose_name_plural = 'Price history'
+        ordering = ['observed_at']
+        indexes = [
+            models.Index(fields=['product', 'observed_at'], name='price_history_product_time_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.product_id} {self.price} @ {self.observed_at:%Y-%m-%d %H:%M}'
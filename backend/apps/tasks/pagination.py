@@ -0,0 +1,110 @@
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination keyed on (ordering field, id).
+
+    Each page is fetched with a range condition on a composite index instead
+    of OFFSET, and no COUNT(*) is issued, so page N costs the same as page 1.
+    Only forward (``next``) links are produced, which is all infinite-scroll
+    clients need.
+    """
+    page_size = 20
+    cursor_query_param = 'cursor'
+    ordering_fields = ('created_at', 'updated_at', 'name', 'price')
+    default_ordering = '-created_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get('ordering', '')
+        # Only the first term is used; `id` breaks ties
+        term = ordering.split(',')[0].strip()
+        if term.lstrip('-') in self.ordering_fields:
+            return term
+        return self.default_ordering
+
+    def encode_cursor(self, value, pk):
+        payload = json.dumps([str(value), pk], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, request, field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw_value, pk = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            model_field = self.queryset_model._meta.get_field(field)
+            return model_field.to_python(raw_value), int(pk)
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def get_item_value(item, field):
+        # Pages may hold model instances or .values() dicts
+        if isinstance(item, dict):
+            return item[field]
+        return getattr(item, field)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.queryset_model = queryset.model
+        self.ordering = self.get_ordering(request)
+        field = self.ordering.lstrip('-')
+        descending = self.ordering.startswith('-')
+        id_ordering = '-id' if descending else 'id'
+
+        queryset = queryset.order_by(self.ordering, id_ordering)
+
+        cursor = self.decode_cursor(request, field)
+        if cursor is not None:
+            value, pk = cursor
+            lookup = 'lt' if descending else 'gt'
+            # `field <= value` first gives the planner an index range to seek to
+            queryset = queryset.filter(
+                Q(**{f'{field}__{lookup}e': value}),
+                Q(**{f'{field}__{lookup}': value}) | Q(**{f'id__{lookup}': pk})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        self.field = field
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        cursor = self.encode_cursor(
+            self.get_item_value(last, self.field),
+            self.get_item_value(last, 'id')
+        )
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
@@ -0,0 +1,127 @@
+from datetime import datetime, time, timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from .models import PriceHistory, Product
+
+RECORD_BATCH_SIZE = 1000
+
+
+def _chunks(items, size):
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def get_last_prices(product_ids):
+    """Latest recorded price per product, fetched with one query."""
+    latest = (
+        PriceHistory.objects
+        .filter(product=OuterRef('pk'))
+        .order_by('-observed_at')
+        .values('price')[:1]
+    )
+    return dict(
+        Product.objects
+        .filter(pk__in=product_ids)
+        .annotate(last_price=Subquery(latest))
+        .values_list('pk', 'last_price')
+    )
+
+
+def record_prices(observations, batch_size=RECORD_BATCH_SIZE):
+    """Append price observations, skipping prices that did not change.
+
+    observations is an iterable of (product_id, price) or
+    (product_id, price, observed_at) tuples. Each batch costs one query to
+    load the previous prices and one bulk INSERT, inside a transaction.
+    Returns the number of rows written.
+    """
+    now = timezone.now()
+    written = 0
+    for chunk in _chunks(observations, batch_size):
+        chunk = sorted(
+            ((item[0], item[1], item[2] if len(item) > 2 else now) for item in chunk),
+            key=lambda item: (item[0], item[2])
+        )
+        last_prices = get_last_prices({product_id for product_id, _, _ in chunk})
+
+        rows = []
+        for product_id, price, observed_at in chunk:
+            if product_id not in last_prices or price is None:
+                # Unknown (deleted) product or nothing observed
+                continue
+            if last_prices[product_id] == price:
+                continue
+            last_prices[product_id] = price
+            rows.append(PriceHistory(product_id=product_id, price=price, observed_at=observed_at))
+
+        with transaction.atomic():
+            PriceHistory.objects.bulk_create(rows, batch_size=batch_size)
+        written += len(rows)
+    return written
+
+
+def _day_start(moment):
+    return timezone.make_aware(datetime.combine(timezone.localtime(moment).date(), time.min))
+
+
+def compact_price_history(raw_days=30, batch_size=RECORD_BATCH_SIZE):
+    """Downsample raw points older than raw_days into daily min/max buckets.
+
+    The cutoff is aligned to the start of a day so no day is ever split
+    between raw points and a bucket. Returns (raw rows removed, buckets written).
+    """
+    cutoff = _day_start(timezone.now() - timedelta(days=raw_days))
+    raw = (
+        PriceHistory.objects
+        .filter(resolution=PriceHistory.RESOLUTION_RAW, observed_at__lt=cutoff)
+        .order_by('product_id', 'observed_at')
+        .values_list('product_id', 'observed_at', 'price')
+    )
+
+    buckets, current = [], None
+    for product_id, observed_at, price in raw.iterator(chunk_size=batch_size):
+        day = _day_start(observed_at)
+        if current is None or current.product_id != product_id or current.observed_at != day:
+            current = PriceHistory(
+                product_id=product_id,
+                observed_at=day,
+                resolution=PriceHistory.RESOLUTION_DAY,
+                price=price,
+                price_min=price,
+                price_max=price
+            )
+            buckets.append(current)
+        else:
+            current.price = price
+            current.price_min = min(current.price_min, price)
+            current.price_max = max(current.price_max, price)
+
+    with transaction.atomic():
+        removed, _ = PriceHistory.objects.filter(
+            resolution=PriceHistory.RESOLUTION_RAW, observed_at__lt=cutoff
+        ).delete()
+        PriceHistory.objects.bulk_create(buckets, batch_size=batch_size)
+    return removed, len(buckets)
+
+
+def get_price_series(product_id, since=None, until=None):
+    """Price series for a product: day buckets for old data, raw points for recent.
+
+    A single range query over the (product, observed_at) index.
+    """
+    queryset = PriceHistory.objects.filter(product_id=product_id)
+    if since is not None:
+        queryset = queryset.filter(observed_at__gte=since)
+    if until is not None:
+        queryset = queryset.filter(observed_at__lt=until)
+    return queryset.order_by('observed_at').values(
+        'observed_at', 'resolution', 'price', 'price_min', 'price_max'
+    )
@@ -0,0 +1,368 @@
+import hashlib
+import ipaddress
+import json
+import logging
+import re
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from typing import Optional
+from urllib.parse import urljoin, urlsplit
+
+import lxml.html
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from django.core.cache import cache
+from django.utils import timezone
+
+from .cache_utils import get_cache_key, invalidate_products_cache
+from .models import Product
+from .prices import record_prices
+
+logger = logging.getLogger(__name__)
+
+PRICE_META_NAMES = ('product:price:amount', 'og:price:amount')
+MAX_REDIRECTS = 5
+CURRENCY_META_NAMES = ('product:price:currency', 'og:price:currency')
+
+
+@dataclass
+class ProductMetadata:
+    title: str = ''
+    price: Optional[Decimal] = None
+    currency: str = ''
+    image_url: str = ''
+
+
+@dataclass
+class ScrapeResult:
+    product_id: int
+    url: str
+    status: str  # 'ok', 'not_modified' or 'error'
+    metadata: Optional[ProductMetadata] = None
+    error: str = ''
+
+
+@dataclass
+class _CachedResponse:
+    etag: str = ''
+    last_modified: str = ''
+    metadata: ProductMetadata = field(default_factory=ProductMetadata)
+
+
+def parse_price(text):
+    """Parse '1 299,00 грн' or '$1,299.00' into a Decimal, or None."""
+    if text is None:
+        return None
+    cleaned = re.sub(r'[^\d,.]', '', str(text))
+    if not cleaned:
+        return None
+    if ',' in cleaned and '.' in cleaned:
+        # Whichever separator comes last is the decimal point
+        if cleaned.rfind(',') > cleaned.rfind('.'):
+            cleaned = cleaned.replace('.', '').replace(',', '.')
+        else:
+            cleaned = cleaned.replace(',', '')
+    elif ',' in cleaned:
+        whole, _, fraction = cleaned.rpartition(',')
+        if len(fraction) == 2:
+            cleaned = whole.replace(',', '') + '.' + fraction
+        else:
+            cleaned = cleaned.replace(',', '')
+    try:
+        price = Decimal(cleaned).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+    return price if price >= 0 else None
+
+
+def _meta_content(document, *names):
+    for name in names:
+        values = document.xpath(
+            '//meta[@property=$name or @name=$name or @itemprop=$name]/@content', name=name
+        )
+        for value in values:
+            if value.strip():
+                return value.strip()
+    return ''
+
+
+def _json_ld_offer(document):
+    for script in document.xpath('//script[@type="application/ld+json"]/text()'):
+        try:
+            data = json.loads(script)
+        except ValueError:
+            continue
+        candidates = data if isinstance(data, list) else [data]
+        for item in candidates:
+            if not isinstance(item, dict) or item.get('@type') != 'Product':
+                continue
+            offers = item.get('offers') or {}
+            if isinstance(offers, list):
+                offers = offers[0] if offers else {}
+            if isinstance(offers, dict):
+                return item, offers
+    return {}, {}
+
+
+def parse_metadata(html, base_url):
+    """Extract title, price, currency and image from a product page."""
+    document = lxml.html.fromstring(html)
+    product, offer = _json_ld_offer(document)
+
+    title = _meta_content(document, 'og:title') or product.get('name', '')
+    if not title:
+        title = (document.findtext('.//title') or '').strip()
+
+    price = parse_price(_meta_content(document, *PRICE_META_NAMES, 'price'))
+    if price is None:
+        price = parse_price(offer.get('price'))
+    if price is None:
+        # Microdata with the price as element text rather than a content attribute
+        texts = document.xpath('//*[@itemprop="price"]/text()')
+        price = parse_price(texts[0]) if texts else None
+
+    currency = _meta_content(document, *CURRENCY_META_NAMES, 'priceCurrency')
+    currency = currency or offer.get('priceCurrency', '')
+
+    image = _meta_content(document, 'og:image', 'image')
+    if not image and isinstance(product.get('image'), str):
+        image = product['image']
+
+    return ProductMetadata(
+        title=' '.join(title.split())[:255],
+        price=price,
+        currency=currency.strip().upper()[:3],
+        image_url=urljoin(base_url, image)[:500] if image else '',
+    )
+
+
+def _address_allowed(address):
+    allow = getattr(settings, 'SCRAPER_ALLOW_PRIVATE_HOSTS', False)
+    if allow is True or address.is_global:
+        return True
+    return bool(allow) and str(address) in allow
+
+
+def public_address(hostname):
+    """The address to connect to for hostname, or None if it is not publicly routable.
+
+    Every resolved address must be public (SSRF guard); loopback, private
+    and link-local ones are refused unless SCRAPER_ALLOW_PRIVATE_HOSTS
+    is True or lists them.
+    """
+    try:
+        addresses = [ipaddress.ip_address(info[4][0]) for info in socket.getaddrinfo(hostname, None)]
+    except (socket.gaierror, UnicodeError, ValueError):
+        return None
+    if not addresses or not all(_address_allowed(address) for address in addresses):
+        return None
+    return str(addresses[0])
+
+
+# hostname -> checked address for the current thread's request, see _PinnedConnectionMixin
+_pins = threading.local()
+
+
+class _PinnedConnectionMixin:
+    """Connect to the address public_address() checked, never resolving again.
+
+    A second lookup could return another address (DNS rebinding). Only the
+    socket target changes; Host, SNI and certificate checks keep the name.
+    """
+
+    def _new_conn(self):
+        address = getattr(_pins, 'addresses', {}).get(self.host)
+        if address is None:
+            raise OSError(f'Refusing to connect to unchecked host {self.host}')
+        host, self._dns_host = self._dns_host, address
+        try:
+            return super()._new_conn()
+        finally:
+            self._dns_host = host
+
+
+class _PinnedHTTPConnection(_PinnedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _PinnedHTTPSConnection(_PinnedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _PinnedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _PinnedHTTPConnection
+
+
+class _PinnedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _PinnedHTTPSConnection
+
+
+class PinnedAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _PinnedHTTPConnectionPool,
+            'https': _PinnedHTTPSConnectionPool,
+        }
+
+
+class ProductScraper:
+    """Fetch product pages concurrently and parse their metadata.
+
+    A bounded thread pool does the I/O, a semaphore per domain caps how many
+    requests hit one shop at a time, and ETag/Last-Modified validators plus
+    the parsed metadata are kept in the cache so unchanged pages cost a 304.
+    """
+
+    def __init__(self, max_workers=None, per_domain=None, timeout=None):
+        self.max_workers = max_workers or getattr(settings, 'SCRAPER_MAX_WORKERS', 8)
+        self.per_domain = per_domain or getattr(settings, 'SCRAPER_PER_DOMAIN', 2)
+        self.timeout = timeout or getattr(settings, 'SCRAPER_TIMEOUT', 10)
+        self.max_bytes = getattr(settings, 'SCRAPER_MAX_BYTES', 2 * 1024 * 1024)
+        self.cache_ttl = getattr(settings, 'SCRAPER_CACHE_TTL', 60 * 60 * 24 * 7)
+        self.user_agent = getattr(settings, 'SCRAPER_USER_AGENT', 'WishlistBot/1.0')
+        self._domain_limits = {}
+        self._domain_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers['User-Agent'] = self.user_agent
+            # A proxy would resolve hosts itself, around the pinning
+            session.trust_env = False
+            adapter = PinnedAdapter()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._local.session = session
+        return session
+
+    def _domain_limit(self, domain):
+        with self._domain_lock:
+            if domain not in self._domain_limits:
+                self._domain_limits[domain] = threading.BoundedSemaphore(self.per_domain)
+            return self._domain_limits[domain]
+
+    def _cache_key(self, url):
+        return get_cache_key('scrape', hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    def _read_body(self, response):
+        chunks, size = [], 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            size += len(chunk)
+            if size > self.max_bytes:
+                raise ValueError(f'Response larger than {self.max_bytes} bytes')
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def _open(self, url, headers):
+        """GET url as a stream, following redirects by hand.
+
+        Every hop's host goes through public_address() and the connection is
+        pinned to the checked address, so neither a redirect nor a changed
+        DNS answer can point the scraper at an internal service.
+        """
+        session = self._session()
+        for _ in range(MAX_REDIRECTS + 1):
+            hostname = urlsplit(url).hostname or ''
+            address = public_address(hostname)
+            if address is None:
+                raise ValueError(f'Host {hostname or url} is not publicly routable')
+            _pins.addresses = {hostname: address}
+            response = session.get(url, headers=headers, timeout=self.timeout, stream=True, allow_redirects=False)
+            if not response.is_redirect:
+                return response
+            response.close()
+            url = urljoin(response.url, response.headers['Location'])
+        raise ValueError(f'More than {MAX_REDIRECTS} redirects')
+
+    def fetch(self, product_id, url):
+        """Fetch and parse one product page."""
+        hostname = urlsplit(url).hostname or ''
+        if public_address(hostname) is None:
+            return ScrapeResult(product_id, url, 'error', error='Host is not publicly routable')
+
+        cache_key = self._cache_key(url)
+        cached = cache.get(cache_key)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers['If-None-Match'] = cached.etag
+            if cached.last_modified:
+                headers['If-Modified-Since'] = cached.last_modified
+
+        try:
+            with self._domain_limit(hostname):
+                with self._open(url, headers) as response:
+                    if response.status_code == 304 and cached is not None:
+                        return ScrapeResult(product_id, url, 'not_modified', metadata=cached.metadata)
+                    response.raise_for_status()
+                    body = self._read_body(response)
+                    etag = response.headers.get('ETag', '')
+                    last_modified = response.headers.get('Last-Modified', '')
+                    base_url = response.url
+            metadata = parse_metadata(body, base_url)
+        except Exception as e:
+            logger.info(f"Failed to scrape {url}: {e}")
+            return ScrapeResult(product_id, url, 'error', error=str(e))
+
+        if etag or last_modified:
+            cache.set(cache_key, _CachedResponse(etag, last_modified, metadata), self.cache_ttl)
+        return ScrapeResult(product_id, url, 'ok', metadata=metadata)
+
+    def scrape(self, products):
+        """Fetch (product_id, url) pairs concurrently; returns results in input order."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.fetch, product_id, url) for product_id, url in products]
+            return [future.result() for future in futures]
+
+
+def apply_results(results):
+    """Write scraped metadata back to products in one bulk update.
+
+    Database writes happen here, on the calling thread, never in the pool.
+    """
+    successful = {result.product_id: result for result in results if result.metadata is not None}
+    if not successful:
+        return 0
+
+    now = timezone.now()
+    price_changes = []
+    products = list(Product.objects.filter(pk__in=successful).only(
+        'id', 'price', 'scraped_title', 'currency', 'image_url', 'scraped_at', 'updated_at'
+    ))
+    for product in products:
+        metadata = successful[product.pk].metadata
+        product.scraped_title = metadata.title or product.scraped_title
+        product.currency = metadata.currency or product.currency
+        product.image_url = metadata.image_url or product.image_url
+        if metadata.price is not None and metadata.price != product.price:
+            product.price = metadata.price
+            product.updated_at = now
+            price_changes.append((product.pk, metadata.price, now))
+        product.scraped_at = now
+
+    Product.objects.bulk_update(
+        products,
+        ['price', 'scraped_title', 'currency', 'image_url', 'scraped_at', 'updated_at'],
+        batch_size=500
+    )
+    # bulk_update bypasses post_save, so record the new prices here
+    record_prices(price_changes)
+    invalidate_products_cache()
+    return len(products)
+
+
+def scrape_products(queryset, **scraper_options):
+    """Scrape every product in queryset and store the results."""
+    pairs = list(queryset.values_list('id', 'url'))
+    results = ProductScraper(**scraper_options).scrape(pairs)
+    apply_results(results)
+    return results
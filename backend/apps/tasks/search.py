@@ -0,0 +1,59 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+
+from .models import Category
+
+
+# Text search configuration shared by the search_vector trigger (migration
+# 0003) and the queries below; 'simple' does not stem, which suits product
+# names written in several languages.
+SEARCH_CONFIG = 'simple'
+
+
+def is_full_text_search_available():
+    """Full-text and trigram search need PostgreSQL; other backends fall back."""
+    return connection.vendor == 'postgresql'
+
+
+def search_products(queryset, query):
+    """Filter products by a free-text query and annotate ``search_rank``.
+
+    On PostgreSQL this matches the GIN-indexed ``search_vector`` (name and
+    url) plus trigram similarity on product, category and owner names, and
+    ranks the results. Each table is searched on its own and the product
+    ids are combined with UNION. Elsewhere it falls back to the case-insensitive
+    substring match so the test suite runs on SQLite.
+    """
+    query = ' '.join(query.split())
+    if not query:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    if not is_full_text_search_available():
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(url__icontains=query) |
+            Q(category__name__icontains=query) |
+            Q(user__username__icontains=query)
+        ).annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    # One id lookup per table, each answered by that table's GIN index. ORing
+    # the category and owner names into one WHERE over the joins would make
+    # Postgres join and filter every product instead.
+    products = queryset.model.objects.order_by()
+    matching_ids = products.filter(
+        Q(search_vector=search_query) | Q(name__trigram_similar=query)
+    ).values('pk').union(
+        products.filter(
+            category_id__in=Category.objects.filter(name__trigram_similar=query).values('pk')
+        ).values('pk'),
+        products.filter(
+            user_id__in=get_user_model().objects.filter(username__trigram_similar=query).values('pk')
+        ).values('pk'),
+    )
+    return queryset.filter(pk__in=matching_ids).annotate(
+        search_rank=SearchRank(F('search_vector'), search_query) + TrigramSimilarity('name', query)
+    )
@@ -1,6 +1,9 @@
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from django.contrib.auth import get_user_model
 from django.utils.text import slugify
-from .models import Category, Product 
+from .images import get_srcset, srcset_builder
+from .models import Category, PriceHistory, Product 
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -12,36 +15,106 @@ class CategorySerializer(serializers.ModelSerializer):
         read_only_fields = ['slug', 'created_at']
 
     def get_posts_count(self, obj):
-        return obj.products.count()
+        # Views annotate the count in the list query; fall back for fresh instances
+        count = getattr(obj, 'products_count', None)
+        if count is None:
+            count = obj.products.count()
+        return count
     
     def create(self, validated_data):
         validated_data['slug'] = slugify(validated_data['name'])
         return super().create(validated_data)
     
     
+class ImageSrcsetField(serializers.ReadOnlyField):
+    """Derivative URLs for a content hash, or None until they are generated."""
+
+    def to_representation(self, value):
+        return get_srcset(value, self.context.get('request'))
+
+
 class ProductListSerializer(serializers.ModelSerializer):
     user = serializers.StringRelatedField()
     category = serializers.StringRelatedField()
+    image_srcset = ImageSrcsetField(source='image_hash')
     
     class Meta:
         model = Product
         fields = [
-            'id', 'name', 'user', 'category', 'image', 'price'
+            'id', 'name', 'user', 'category', 'image', 'image_srcset', 'price'
         ]
         read_only_fields = ['user']
 
 
+class ProductListRowSerializer:
+    """Read-only fast path producing exactly ProductListSerializer's output.
+
+    Rows come from ``queryset.values_list(*ProductListRowSerializer.columns(),
+    named=True)`` (see values()), so no model instances are built and no DRF
+    field objects run per row. Keep in step with ProductListSerializer; the
+    parity test in tests.py compares the two.
+    """
+    # Keyset pagination reads its ordering field from the row
+    extra_columns = ('created_at', 'updated_at')
+
+    def __init__(self, rows, many=True, context=None):
+        self.rows = rows
+        self.context = context or {}
+
+    @staticmethod
+    def user_column():
+        # User.__str__ is the USERNAME_FIELD (AbstractUser.get_username)
+        return f'user__{get_user_model().USERNAME_FIELD}'
+
+    @classmethod
+    def columns(cls):
+        return (
+            'id', 'name', cls.user_column(), 'category__name', 'image', 'image_hash', 'price'
+        ) + cls.extra_columns
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values_list(*cls.columns(), named=True)
+
+    @property
+    def data(self):
+        request = self.context.get('request')
+        storage = Product._meta.get_field('image').storage
+        build_uri = request.build_absolute_uri if request is not None else (lambda url: url)
+        coerce_price = api_settings.COERCE_DECIMAL_TO_STRING
+        user_column = self.user_column()
+        build_srcset = srcset_builder(request)
+
+        data = []
+        for row in self.rows:
+            price = row.price
+            data.append({
+                'id': row.id,
+                'name': row.name,
+                'user': getattr(row, user_column),
+                # Category.__str__
+                'category': f'Category {row.category__name}' if row.category__name is not None else None,
+                'image': build_uri(storage.url(row.image)) if row.image else None,
+                'image_srcset': build_srcset(row.image_hash),
+                'price': (f'{price:f}' if coerce_price else price) if price is not None else None,
+            })
+        return data
+
+
 class ProductDetailSerializer(serializers.ModelSerializer):
     user_info = serializers.SerializerMethodField()
     category_info = serializers.SerializerMethodField()
+    image_srcset = ImageSrcsetField(source='image_hash')
     
     class Meta:
         model = Product
         fields = [
             'id', 'name', 'price', 'url', 'user', 'user_info', 'category', 'category_info', 
-            'image', 'created_at', 'updated_at'
+            'image', 'image_srcset', 'scraped_title', 'currency', 'image_url', 'scraped_at',
+            'created_at', 'updated_at'
         ]
-        read_only_fields = ['user', 'created_at', 'updated_at']
+        read_only_fields = ['user', 'scraped_title', 'currency', 'image_url', 'scraped_at',
+                            'created_at', 'updated_at']
     
     def get_user_info(self, obj):
         user = obj.user
@@ -49,7 +122,8 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'id': user.id,
             'username': user.username,
             'full_name': user.full_name,
-            'avatar': user.avatar.url if user.avatar else None
+            'avatar': user.avatar.url if user.avatar else None,
+            'avatar_srcset': get_srcset(user.avatar_hash, self.context.get('request'))
         } 
         
     def get_category_info(self, obj):
@@ -78,4 +152,32 @@ class ProductCreateUpdateSerializer(serializers.ModelSerializer):
     
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+class ProductImportSerializer(serializers.Serializer):
+    """Validates one bulk-import row without touching the database.
+
+    The url uniqueness check is left to the batch upsert, and the category
+    slug is resolved by the importer with one query per batch.
+    """
+    name = serializers.CharField(max_length=100)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    url = serializers.URLField(max_length=255)
+    category = serializers.SlugField(max_length=100, required=False, allow_blank=True, allow_null=True)
+
+    def validate_price(self, value):
+        if value < 0:
+            raise serializers.ValidationError("Price cannot be negative")
+        return value
+
+    def validate_url(self, value):
+        if not value.startswith(('http://', 'https://')):
+            raise serializers.ValidationError("URL must start with http:// or https://")
+        return value
+
+
+class PriceHistorySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PriceHistory
+        fields = ['observed_at', 'resolution', 'price', 'price_min', 'price_max']
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from apps.accounts.authentication import invalidate_user_snapshot
+
+from .cache_utils import (
+    invalidate_all_cache, invalidate_categories_cache, invalidate_products_cache, invalidate_user_cache
+)
+from .images import image_changed
+from .models import Category, Product
+from .prices import record_prices
+
+
+def adjust_products_count(user_id, delta):
+    """Atomically shift a user's denormalised product counter."""
+    if user_id is None or not delta:
+        return
+    # updated_at moves too, so it stays a valid Last-Modified for the profile
+    get_user_model().objects.filter(pk=user_id).update(
+        products_count=F('products_count') + delta,
+        updated_at=timezone.now()
+    )
+    invalidate_user_snapshot(user_id)
+
+
+def invalidate_product_lists(*user_ids):
+    """Retire cached product lists and validators after a product write."""
+    invalidate_products_cache()
+    for user_id in {user_id for user_id in user_ids if user_id is not None}:
+        invalidate_user_cache(user_id)
+
+
+# Saves and deletes from anywhere (API, admin, shell, fixtures) invalidate
+# here. Queryset update()/bulk_*() send no signals, so their callers (bulk
+# import, scraper, image pipeline) invalidate explicitly.
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, raw=False, **kwargs):
+    previous_user_id = getattr(instance, '_loaded_user_id', None)
+    invalidate_product_lists(instance.user_id, previous_user_id)
+    if raw:
+        return
+    if created:
+        adjust_products_count(instance.user_id, 1)
+    elif previous_user_id is not None and previous_user_id != instance.user_id:
+        adjust_products_count(previous_user_id, -1)
+        adjust_products_count(instance.user_id, 1)
+    instance._loaded_user_id = instance.user_id
+
+    # Unsaved-then-saved instances have no loaded price; record_prices dedups those
+    if created or getattr(instance, '_loaded_price', None) != instance.price:
+        record_prices([(instance.pk, instance.price)])
+    instance._loaded_price = instance.price
+
+    image_changed(instance, 'image', 'image_hash')
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    adjust_products_count(instance.user_id, -1)
+    invalidate_product_lists(instance.user_id)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, **kwargs):
+    # Product lists render the category name and deleting one nulls products' category
+    invalidate_categories_cache()
+    invalidate_products_cache()
+
+
+@receiver(post_migrate)
+def migrations_applied(sender, plan=None, **kwargs):
+    # Data migrations write through historical models, which send no model signals.
+    # The plan is the same for every app; invalidate once, and only if anything ran.
+    if plan and sender.name == 'apps.tasks':
+        invalidate_all_cache()
@@ -1,12 +1,45 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+from unittest import mock
+from urllib.parse import parse_qs, quote, urlencode
+import requests
+from PIL import Image
+from django.test import TestCase, override_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.storage import default_storage
+from django.http import QueryDict
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection, transaction
 from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework import status
 from django.urls import reverse
-from .models import Category, Product
+from django.utils import timezone
+from apps.core.testing import QueryBudgetMixin
+from .models import Category, PriceHistory, Product
+from . import cache_utils
 
 User = get_user_model()
 
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tasks-tests',
+    },
+    'tokens': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tasks-tests-tokens',
+    },
+}
+
 
 class CategoryModelTest(TestCase):
     def setUp(self):
@@ -99,7 +132,7 @@ class CategoryAPITest(APITestCase):
         Category.objects.create(**self.category_data)
         response = self.client.get(self.category_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.json()), 1)
 
 
 class ProductAPITest(APITestCase):
@@ -141,7 +174,7 @@ class ProductAPITest(APITestCase):
         )
         response = self.client.get(self.product_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.json()), 1)
 
     def test_product_validation(self):
         self.client.force_authenticate(user=self.user)
@@ -158,3 +191,1369 @@ class ProductAPITest(APITestCase):
         invalid_data['url'] = 'invalid-url'
         response = self.client.post(self.product_url, invalid_data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CacheUtilsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_utils.reset_cache_metrics()
+        self.filters = {'q': '', 'category': '', 'ordering': '-created_at'}
+
+    def products(self, user_id, value):
+        return cache_utils.get_or_compute_products_list(user_id, self.filters, lambda: value)
+
+    def categories(self, value):
+        return cache_utils.get_or_compute_categories_list(self.filters, lambda: value)
+
+    def test_user_invalidation_retires_products_lists(self):
+        self.products(1, ['cached'])
+        self.products(2, ['other'])
+        self.assertEqual(self.products(1, ['fresh']), ['cached'])
+
+        cache_utils.invalidate_user_cache(1)
+
+        self.assertEqual(self.products(1, ['fresh']), ['fresh'])
+        self.assertEqual(self.products(2, ['fresh']), ['other'])
+
+    def test_products_invalidation_retires_every_user(self):
+        self.products(1, ['cached'])
+        self.categories(['category'])
+
+        cache_utils.invalidate_products_cache()
+
+        self.assertEqual(self.products(1, ['fresh']), ['fresh'])
+        self.assertEqual(self.categories(['fresh']), ['fresh'])
+
+    def test_global_invalidation(self):
+        cache_utils.cache_user_profile(1, {'id': 1})
+        cache_utils.invalidate_all_cache()
+        self.assertIsNone(cache_utils.get_cached_user_profile(1))
+
+    def test_evicted_version_does_not_resurrect_entries(self):
+        self.categories(['stale'])
+        cache_utils.invalidate_categories_cache()
+        cache.delete('ns:categories')
+        self.assertEqual(self.categories(['fresh']), ['fresh'])
+
+    def test_empty_list_is_a_hit(self):
+        self.categories([])
+        self.assertEqual(self.categories(['fresh']), [])
+        self.assertEqual(cache_utils.get_cache_metrics()['hits'], 1)
+
+    def test_metrics(self):
+        self.categories(['category'])
+        self.categories(['category'])
+        cache_utils.invalidate_categories_cache()
+
+        metrics = cache_utils.get_cache_metrics()
+        self.assertEqual(metrics['misses'], 1)
+        self.assertEqual(metrics['hits'], 1)
+        self.assertEqual(metrics['sets'], 1)
+        self.assertEqual(metrics['invalidations'], 1)
+        self.assertEqual(metrics['hit_ratio'], 0.5)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CACHE_LOCK_WAIT=0.2)
+class CacheStampedeTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_utils.reset_cache_metrics()
+        self.calls = 0
+
+    def compute(self):
+        self.calls += 1
+        return self.calls
+
+    def test_stale_value_served_while_another_worker_rebuilds(self):
+        cache_utils.get_or_compute('popular', self.compute, timeout=60)
+        entry = cache.get('popular')
+        entry['expires_at'] = time.time() - 1
+        cache.set('popular', entry, 60)
+        cache.add(cache_utils.get_cache_key('lock', 'popular'), 'other-worker', 10)
+
+        self.assertEqual(cache_utils.get_or_compute('popular', self.compute, timeout=60), 1)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cache_utils.get_cache_metrics()['stale_hits'], 1)
+
+    def test_expired_value_rebuilt_by_lock_holder(self):
+        cache_utils.get_or_compute('popular', self.compute, timeout=60)
+        entry = cache.get('popular')
+        entry['expires_at'] = time.time() - 1
+        cache.set('popular', entry, 60)
+
+        self.assertEqual(cache_utils.get_or_compute('popular', self.compute, timeout=60), 2)
+        self.assertIsNone(cache.get(cache_utils.get_cache_key('lock', 'popular')))
+
+    def test_early_refresh_close_to_expiry(self):
+        cache_utils.get_or_compute('popular', self.compute, timeout=60)
+        entry = cache.get('popular')
+        entry['delta'] = 10.0
+        entry['expires_at'] = time.time() + 0.001
+        cache.set('popular', entry, 60)
+
+        self.assertEqual(cache_utils.get_or_compute('popular', self.compute, timeout=60), 2)
+        self.assertEqual(cache_utils.get_cache_metrics()['early_refreshes'], 1)
+
+    def test_cold_miss_waits_for_lock_holder(self):
+        cache.add(cache_utils.get_cache_key('lock', 'cold'), 'other-worker', 10)
+        # The lock holder never finishes, so the caller computes after waiting
+        self.assertEqual(cache_utils.get_or_compute('cold', self.compute, timeout=60), 1)
+        self.assertIsNone(cache.get('cold'))
+
+    def test_lock_released_when_compute_fails(self):
+        def failing():
+            raise RuntimeError('database unavailable')
+
+        with self.assertRaises(RuntimeError):
+            cache_utils.get_or_compute('broken', failing, timeout=60)
+        self.assertIsNone(cache.get(cache_utils.get_cache_key('lock', 'broken')))
+
+
+class ListParamsNormalizationTest(TestCase):
+    ordering_fields = ['created_at', 'updated_at', 'name', 'price']
+
+    def normalize(self, query_string):
+        return cache_utils.normalize_list_params(
+            QueryDict(query_string), self.ordering_fields, '-created_at'
+        )
+
+    def test_equivalent_queries_share_a_digest(self):
+        first = self.normalize('q=Phone%20%20Case&page=1&ordering=-created_at')
+        second = self.normalize('ordering=&q=phone case')
+        self.assertEqual(first, second)
+        self.assertEqual(cache_utils.get_params_digest(first), cache_utils.get_params_digest(second))
+
+    def test_pagination_is_part_of_the_digest(self):
+        first = cache_utils.get_params_digest(self.normalize('page=1'))
+        second = cache_utils.get_params_digest(self.normalize('page=2'))
+        self.assertNotEqual(first, second)
+        self.assertNotEqual(
+            cache_utils.get_params_digest(self.normalize('page_size=50')),
+            first
+        )
+
+    def test_lookups_that_differ_in_the_database_do_not_share_a_key(self):
+        # ILIKE does not equate "ß" with "ss"
+        self.assertNotEqual(self.normalize('q=Stra%C3%9Fe'), self.normalize('q=strasse'))
+        self.assertEqual(self.normalize('q=STRASSE'), self.normalize('q=strasse'))
+        # Invalid values fail validation; they must not look like no filter or the first page
+        for query_string in ('category=0', 'category=-1', 'category=abc'):
+            self.assertNotEqual(self.normalize(query_string), self.normalize(''), query_string)
+        self.assertEqual(self.normalize('category=%203'), self.normalize('category=3'))
+        self.assertNotEqual(self.normalize('page=0'), self.normalize('page=1'))
+        self.assertNotEqual(self.normalize('page=%20last'), self.normalize('page=last'))
+
+    def test_invalid_category_is_rejected_whatever_is_cached(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user(username='u', email='u@example.com', password='x'))
+        url = reverse('product-list-create')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        for category in ('0', '-1'):
+            response = self.client.get(url, {'category': category})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, category)
+
+    def test_invalid_ordering_falls_back_to_default(self):
+        self.assertEqual(self.normalize('ordering=password')['ordering'], '-created_at')
+        self.assertEqual(self.normalize('ordering=price,-name,bogus')['ordering'], 'price,-name')
+
+    def test_digest_is_deterministic(self):
+        params = self.normalize('category=3&search=tv')
+        self.assertEqual(cache_utils.get_params_digest(params), cache_utils.get_params_digest(dict(params)))
+        self.assertEqual(len(cache_utils.get_params_digest(params)), 32)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProductListCacheInvalidationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.product_url = reverse('product-list-create')
+
+    def test_create_product_invalidates_cached_list(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(self.product_url)
+        self.assertEqual(response.json()['count'], 0)
+
+        response = self.client.post(self.product_url, {
+            'name': 'Test Product',
+            'price': '99.99',
+            'url': 'https://example.com/product',
+        })
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(self.product_url)
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_cached_pages_do_not_collide(self):
+        for i in range(25):
+            Product.objects.create(
+                name=f'Product {i}',
+                price=Decimal('9.99'),
+                url=f'https://example.com/product/{i}',
+                user=self.user
+            )
+        first = self.client.get(self.product_url)
+        second = self.client.get(self.product_url, {'page': 2})
+        self.assertEqual(len(first.json()['results']), 20)
+        self.assertEqual(len(second.json()['results']), 5)
+        # Served from cache the second time round
+        self.assertEqual(self.client.get(self.product_url, {'page': 2}).json(), second.json())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class CategoryProductCountTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.categories = [
+            Category.objects.create(name=f'Category {i}') for i in range(5)
+        ]
+        for i, category in enumerate(self.categories):
+            for j in range(i):
+                Product.objects.create(
+                    name=f'Product {i}-{j}',
+                    price=Decimal('1.00'),
+                    url=f'https://example.com/{i}/{j}',
+                    user=self.user,
+                    category=category
+                )
+
+    def test_list_counts_in_constant_queries(self):
+        # One COUNT for pagination and one annotated SELECT, whatever the row count
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('category-list-create'))
+        counts = {item['name']: item['posts_count'] for item in response.json()['results']}
+        self.assertEqual(counts, {f'Category {i}': i for i in range(5)})
+
+    def test_detail_count(self):
+        category = self.categories[3]
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('category-detail', args=[category.slug]))
+        self.assertEqual(response.data['posts_count'], 3)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        # Duplicate prices force the id tie-breaker to do its job
+        for i in range(45):
+            Product.objects.create(
+                name=f'Product {i:02d}',
+                price=Decimal(i % 4),
+                url=f'https://example.com/product/{i}',
+                user=self.user
+            )
+        self.product_url = reverse('product-list-create')
+
+    def collect(self, params):
+        ids, url, pages = [], self.product_url, 0
+        response = self.client.get(url, params)
+        while True:
+            pages += 1
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.json())
+            ids.extend(item['id'] for item in response.json()['results'])
+            if not response.json()['next']:
+                return ids, pages
+            response = self.client.get(response.json()['next'])
+
+    def test_walks_every_row_once_in_order(self):
+        for ordering in ['-created_at', 'created_at', 'price', '-price', 'name', '-updated_at']:
+            ids, pages = self.collect({'pagination': 'cursor', 'ordering': ordering})
+            field = ordering.lstrip('-')
+            prefix = '-' if ordering.startswith('-') else ''
+            expected = list(
+                Product.objects.order_by(ordering, f'{prefix}id').values_list('id', flat=True)
+            )
+            self.assertEqual(ids, expected, field)
+            self.assertEqual(pages, 3)
+
+    def test_page_costs_no_count_query(self):
+        first = self.client.get(self.product_url, {'pagination': 'cursor'})
+        cache.clear()
+        with self.assertNumQueries(1):
+            self.client.get(first.json()['next'])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.product_url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_page_number_pagination_is_still_the_default(self):
+        response = self.client.get(self.product_url)
+        self.assertEqual(response.json()['count'], 45)
+
+    def test_cache_key_follows_the_paginator(self):
+        # Served in this order, any key collision would hand out the wrong shape
+        cases = [
+            ({'cursor': ''}, True),
+            ({}, False),
+            ({'pagination': 'Cursor'}, True),
+            ({'pagination': ' cursor'}, True),
+            ({'pagination': 'page'}, False),
+            ({'pagination': 'cursor'}, True),
+        ]
+        for params, keyset in cases:
+            with self.subTest(params=params):
+                response = self.client.get(self.product_url, params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual('count' not in response.json(), keyset)
+                mode = cache_utils.normalize_list_params(QueryDict(urlencode(params)))['pagination']
+                self.assertEqual(mode, 'cursor' if keyset else 'page')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProductSearchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.alice = User.objects.create_user(
+            username='alice',
+            email='alice@example.com',
+            password='testpass123'
+        )
+        self.bob = User.objects.create_user(
+            username='bob',
+            email='bob@example.com',
+            password='testpass123'
+        )
+        books = Category.objects.create(name='Books')
+        Product.objects.create(
+            name='Mechanical keyboard', price=Decimal('80.00'),
+            url='https://shop.example.com/keyboard', user=self.alice
+        )
+        Product.objects.create(
+            name='Python cookbook', price=Decimal('30.00'),
+            url='https://books.example.com/python', user=self.bob, category=books
+        )
+        self.product_url = reverse('product-list-create')
+
+    def search(self, q):
+        response = self.client.get(self.product_url, {'q': q})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(item['name'] for item in response.json()['results'])
+
+    def test_matches_product_name(self):
+        self.assertEqual(self.search('keyboard'), ['Mechanical keyboard'])
+
+    def test_matches_category_and_owner(self):
+        self.assertEqual(self.search('books'), ['Python cookbook'])
+        self.assertEqual(self.search('alice'), ['Mechanical keyboard'])
+
+    def test_blank_query_returns_everything(self):
+        self.assertEqual(len(self.search('   ')), 2)
+
+    def test_results_are_annotated_with_rank(self):
+        from .search import search_products
+        results = search_products(Product.objects.all(), 'cookbook')
+        self.assertEqual([p.name for p in results], ['Python cookbook'])
+        self.assertIsNotNone(results[0].search_rank)
+
+    def test_each_table_is_searched_through_its_own_index(self):
+        from .search import search_products
+        if connection.vendor != 'postgresql':
+            self.skipTest('the SQLite fallback has no search indexes')
+        sql = str(search_products(Product.objects.all(), 'books').query)
+        # Category and owner names are id lookups combined by UNION, not joins
+        self.assertIn('UNION', sql)
+        self.assertNotIn('JOIN', sql)
+
+
+class ProductQueryPlanTest(TestCase):
+    """The list hot path must be answered by index scans, not sort-over-seqscan."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.category = Category.objects.create(name='Electronics')
+        self.base = Product.objects.select_related('user', 'category').defer('search_vector')
+
+    def explain(self, queryset):
+        if connection.vendor == 'postgresql':
+            # Tiny test tables would otherwise always be seq-scanned
+            with transaction.atomic():
+                with connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+                return queryset.explain()
+        return queryset.explain()
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = self.explain(queryset)
+        self.assertIn(index_name, plan)
+        if connection.vendor == 'postgresql':
+            self.assertNotIn('Seq Scan on products', plan)
+            self.assertNotIn('Sort', plan)
+        elif connection.vendor == 'sqlite':
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_owner_list(self):
+        self.assertUsesIndex(
+            self.base.filter(user=self.user).order_by('-created_at')[:20],
+            'products_user_created_idx'
+        )
+
+    def test_category_list(self):
+        self.assertUsesIndex(
+            self.base.filter(category=self.category).order_by('-created_at')[:20],
+            'products_category_created_idx'
+        )
+
+    def test_default_list(self):
+        self.assertUsesIndex(self.base.order_by('-created_at')[:20], 'products_created_id_idx')
+
+    def test_price_ordering(self):
+        self.assertUsesIndex(self.base.order_by('price')[:20], 'products_price_id_idx')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ProductBulkTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.other = User.objects.create_user(
+            username='other',
+            email='other@example.com',
+            password='testpass123'
+        )
+        Category.objects.create(name='Books')
+        Product.objects.create(
+            name='Taken', price=Decimal('1.00'),
+            url='https://example.com/taken', user=self.other
+        )
+        self.bulk_url = reverse('product-bulk')
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, body, content_type, **params):
+        url = self.bulk_url
+        if params:
+            url += '?' + '&'.join(f'{k}={v}' for k, v in params.items())
+        return self.client.generic('POST', url, body.encode('utf-8'), content_type=content_type)
+
+    def test_csv_import_reports_row_errors(self):
+        body = (
+            'name,price,url,category\n'
+            'Novel,12.50,https://example.com/novel,books\n'
+            'Lamp,-1,https://example.com/lamp,\n'
+            'Copy,3.00,https://example.com/taken,\n'
+            'Pen,2.00,https://example.com/pen,unknown\n'
+            'Mug,4.00,https://example.com/mug,\n'
+        )
+        response = self.post(body, 'text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4])
+        self.assertEqual(Product.objects.get(url='https://example.com/novel').category.slug, 'books')
+        self.assertEqual(Product.objects.get(url='https://example.com/taken').user, self.other)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.products_count, 2)
+
+    def test_csv_with_a_byte_order_mark(self):
+        # As exported by Excel
+        body = '\ufeffname,price,url,category\nNovel,12.50,https://example.com/novel,books\n'
+        response = self.post(body, 'text/csv')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['errors'], [])
+
+    def test_undecodable_body_stops_with_a_row_error(self):
+        body = 'name,price,url,category\nNovel,12.50,https://example.com/novel,\nCaf\xe9,3.00,https://example.com/cafe,\n'
+        for content_type, body in (
+            ('text/csv', body),
+            ('application/x-ndjson', '{"name": "Lamp", "price": "1.00", "url": "https://example.com/lamp"}\n"Caf\xe9"\n'),
+        ):
+            response = self.client.generic('POST', self.bulk_url, body.encode('latin-1'), content_type=content_type)
+            self.assertEqual(response.status_code, status.HTTP_200_OK, content_type)
+            self.assertEqual(response.data['created'], 1, content_type)
+            self.assertEqual([error['row'] for error in response.data['errors']], [2], content_type)
+
+    def test_oversized_csv_field_stops_with_a_row_error(self):
+        body = (
+            'name,price,url,category\n'
+            'Novel,12.50,https://example.com/novel,\n'
+            f'{"x" * 200000},3.00,https://example.com/long,\n'
+            'Mug,4.00,https://example.com/mug,\n'
+        )
+        response = self.post(body, 'text/csv')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2])
+        self.assertFalse(Product.objects.filter(url='https://example.com/mug').exists())
+
+    def test_jsonl_import_updates_existing_products(self):
+        Product.objects.create(
+            name='Old name', price=Decimal('5.00'),
+            url='https://example.com/mine', user=self.user
+        )
+        body = (
+            '{"name": "New name", "price": "6.00", "url": "https://example.com/mine"}\n'
+            '\n'
+            'not json\n'
+            '{"name": "Fresh", "price": "1.00", "url": "https://example.com/fresh"}\n'
+        )
+        response = self.post(body, 'application/x-ndjson')
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(response.data['updated'], 1)
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+        product = Product.objects.get(url='https://example.com/mine')
+        self.assertEqual((product.name, product.price), ('New name', Decimal('6.00')))
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.products_count, 2)
+
+    def test_skip_existing(self):
+        Product.objects.create(
+            name='Keep', price=Decimal('5.00'),
+            url='https://example.com/mine', user=self.user
+        )
+        body = '{"name": "Changed", "price": "6.00", "url": "https://example.com/mine"}\n'
+        response = self.post(body, 'application/x-ndjson', on_conflict='skip')
+        self.assertEqual(response.data['skipped'], 1)
+        self.assertEqual(Product.objects.get(url='https://example.com/mine').name, 'Keep')
+
+    def test_failed_import_invalidates_the_committed_batches(self):
+        from . import bulk
+        list_url = reverse('product-list-create')
+        before = self.client.get(list_url).json()['count']
+        lines = [
+            'name,price,url,category\n',
+            'Novel,12.50,https://example.com/novel,\n',
+            'Lamp,20.00,https://example.com/lamp,\n',
+        ]
+        record_prices = bulk.record_prices
+
+        def fail_second_batch(prices):
+            if Product.objects.filter(url='https://example.com/lamp').exists():
+                raise RuntimeError('database went away')
+            record_prices(prices)
+
+        with mock.patch.object(bulk, 'record_prices', fail_second_batch):
+            with self.assertRaises(RuntimeError):
+                bulk.import_products(bulk.iter_rows(lines, 'csv'), self.user, batch_size=1)
+        self.assertEqual(self.client.get(list_url).json()['count'], before + 1)
+
+    def test_unsupported_content_type(self):
+        response = self.post('{}', 'application/xml')
+        self.assertEqual(response.status_code, status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+    def test_streaming_export(self):
+        Product.objects.create(
+            name='Novel, signed', price=Decimal('12.50'),
+            url='https://example.com/novel', user=self.user,
+            category=Category.objects.get(slug='books')
+        )
+        response = self.client.get(self.bulk_url, {'file_format': 'csv'})
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode('utf-8')
+        self.assertEqual(
+            body.splitlines(),
+            ['name,price,url,category', '"Novel, signed",12.50,https://example.com/novel,books']
+        )
+
+        response = self.client.get(self.bulk_url, {'file_format': 'jsonl'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertIn('"price": "12.50"', lines[0])
+
+    def test_import_command(self):
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write('name,price,url,category\nNovel,12.50,https://example.com/novel,books\n')
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command('import_products', handle.name, user='test@example.com', stdout=out)
+        self.assertIn('Created 1', out.getvalue())
+
+
+PRODUCT_PAGE = b"""<html><head>
+<title>Fallback title</title>
+<meta property="og:title" content="Noise cancelling headphones">
+<meta property="product:price:amount" content="1 299,50">
+<meta property="product:price:currency" content="uah">
+<meta property="og:image" content="/images/headphones.jpg">
+</head><body></body></html>"""
+
+JSON_LD_PAGE = b"""<html><head><title>Shop</title>
+<script type="application/ld+json">
+{"@type": "Product", "name": "Desk lamp", "image": "https://cdn.example.com/lamp.png",
+ "offers": {"@type": "Offer", "price": "24.99", "priceCurrency": "USD"}}
+</script></head></html>"""
+
+
+class _StubShopHandler(BaseHTTPRequestHandler):
+    pages = {'/headphones': PRODUCT_PAGE, '/lamp': JSON_LD_PAGE}
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get('If-None-Match')))
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+        try:
+            time.sleep(server.delay)
+            path, _, query = self.path.partition('?')
+            body = self.pages.get(path)
+            if path == '/redirect':
+                self.send_response(302)
+                self.send_header('Location', parse_qs(query)['to'][0])
+                self.end_headers()
+            elif body is None:
+                self.send_response(404)
+                self.end_headers()
+            elif self.headers.get('If-None-Match') == '"v1"':
+                self.send_response(304)
+                self.end_headers()
+            else:
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('ETag', '"v1"')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@override_settings(CACHES=LOCMEM_CACHES, SCRAPER_ALLOW_PRIVATE_HOSTS=True)
+class ProductScraperTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _StubShopHandler)
+        self.server.lock = threading.Lock()
+        self.server.requests = []
+        self.server.active = 0
+        self.server.max_active = 0
+        self.server.delay = 0
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f'http://127.0.0.1:{self.server.server_address[1]}'
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def create_product(self, path, name='Typed name'):
+        return Product.objects.create(
+            name=name, price=Decimal('1.00'), url=f'{self.base_url}{path}', user=self.user
+        )
+
+    def test_parse_price_formats(self):
+        from .scraper import parse_price
+        self.assertEqual(parse_price('1 299,50 грн'), Decimal('1299.50'))
+        self.assertEqual(parse_price('$1,299.00'), Decimal('1299.00'))
+        self.assertEqual(parse_price('1.299,00'), Decimal('1299.00'))
+        self.assertEqual(parse_price('12,999'), Decimal('12999.00'))
+        self.assertIsNone(parse_price('call us'))
+
+    def test_scrape_writes_metadata_back(self):
+        from .scraper import scrape_products
+        headphones = self.create_product('/headphones')
+        lamp = self.create_product('/lamp?ref=1')
+        missing = self.create_product('/missing')
+
+        results = scrape_products(Product.objects.order_by('id'))
+
+        self.assertEqual([r.status for r in results], ['ok', 'ok', 'error'])
+        headphones.refresh_from_db()
+        self.assertEqual(headphones.name, 'Typed name')
+        self.assertEqual(headphones.scraped_title, 'Noise cancelling headphones')
+        self.assertEqual(headphones.price, Decimal('1299.50'))
+        self.assertEqual(headphones.currency, 'UAH')
+        self.assertEqual(headphones.image_url, f'{self.base_url}/images/headphones.jpg')
+        self.assertIsNotNone(headphones.scraped_at)
+        lamp.refresh_from_db()
+        self.assertEqual((lamp.scraped_title, lamp.price, lamp.currency), ('Desk lamp', Decimal('24.99'), 'USD'))
+        self.assertEqual(lamp.image_url, 'https://cdn.example.com/lamp.png')
+        missing.refresh_from_db()
+        self.assertIsNone(missing.scraped_at)
+
+    def test_conditional_get_reuses_cached_metadata(self):
+        from .scraper import scrape_products
+        product = self.create_product('/headphones')
+        scrape_products(Product.objects.all())
+        Product.objects.filter(pk=product.pk).update(price=Decimal('1.00'))
+
+        results = scrape_products(Product.objects.all())
+
+        self.assertEqual(results[0].status, 'not_modified')
+        self.assertEqual(self.server.requests[-1], ('/headphones', '"v1"'))
+        product.refresh_from_db()
+        self.assertEqual(product.price, Decimal('1299.50'))
+
+    def test_per_domain_concurrency_limit(self):
+        from .scraper import ProductScraper
+        self.server.delay = 0.05
+        pairs = [(i, f'{self.base_url}/headphones?i={i}') for i in range(6)]
+
+        ProductScraper(max_workers=6, per_domain=2).scrape(pairs)
+
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertLessEqual(self.server.max_active, 2)
+
+    @override_settings(SCRAPER_ALLOW_PRIVATE_HOSTS=False)
+    def test_private_hosts_are_refused(self):
+        from .scraper import ProductScraper
+        result = ProductScraper().fetch(1, f'{self.base_url}/headphones')
+        self.assertEqual(result.status, 'error')
+        self.assertEqual(self.server.requests, [])
+
+    @override_settings(SCRAPER_ALLOW_PRIVATE_HOSTS=['127.0.0.1'])
+    def test_redirects_are_checked_on_every_hop(self):
+        from .scraper import ProductScraper
+        port = self.server.server_address[1]
+        followed = ProductScraper().fetch(1, f'{self.base_url}/redirect?to=/headphones')
+        self.assertEqual(followed.status, 'ok')
+        self.assertEqual(followed.metadata.title, 'Noise cancelling headphones')
+
+        for target in (f'http://127.0.0.2:{port}/headphones', 'http://169.254.169.254/latest/meta-data/'):
+            with self.subTest(target=target):
+                self.server.requests.clear()
+                result = ProductScraper().fetch(1, f'{self.base_url}/redirect?to={quote(target)}')
+                self.assertEqual(result.status, 'error')
+                self.assertIn('not publicly routable', result.error)
+                self.assertEqual([path for path, _ in self.server.requests], [f'/redirect?to={quote(target)}'])
+
+    def test_connections_go_to_the_checked_address(self):
+        from .scraper import ProductScraper, _pins
+        scraper = ProductScraper()
+        scraper.fetch(1, f'{self.base_url}/headphones')
+        self.assertEqual(_pins.addresses, {'127.0.0.1': '127.0.0.1'})
+        # A connection for a host that was never checked is refused
+        _pins.addresses = {}
+        self.server.requests.clear()
+        with self.assertRaises(requests.ConnectionError):
+            scraper._session().get(f'http://localhost:{self.server.server_address[1]}/headphones')
+        self.assertEqual(self.server.requests, [])
+
+
+class PriceHistoryTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.product = Product.objects.create(
+            name='Headphones', price=Decimal('100.00'),
+            url='https://example.com/headphones', user=self.user
+        )
+
+    def prices(self, product=None):
+        return list(
+            PriceHistory.objects.filter(product=product or self.product)
+            .values_list('resolution', 'price', 'price_min', 'price_max')
+        )
+
+    def test_save_records_only_price_changes(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.name = 'Renamed'
+        product.save()
+        product.price = Decimal('90.00')
+        product.save()
+
+        self.assertEqual(
+            [price for _, price, _, _ in self.prices()],
+            [Decimal('100.00'), Decimal('90.00')]
+        )
+
+    def test_bulk_recorder_deduplicates_in_few_queries(self):
+        from .prices import record_prices
+        start = timezone.now()
+        observations = [
+            (self.product.pk, Decimal(price), start + timedelta(minutes=i))
+            for i, price in enumerate(['100.00', '100.00', '95.00', '95.00', '99.00'])
+        ]
+        with self.assertNumQueries(4):  # last prices, savepoint, insert, release
+            written = record_prices(observations)
+
+        self.assertEqual(written, 2)
+        self.assertEqual(
+            [price for _, price, _, _ in self.prices()],
+            [Decimal('100.00'), Decimal('95.00'), Decimal('99.00')]
+        )
+
+    def test_compaction_builds_daily_min_max_buckets(self):
+        from .prices import compact_price_history, record_prices
+        PriceHistory.objects.all().delete()
+        day = timezone.now() - timedelta(days=40)
+        day = day.replace(hour=8, minute=0, second=0, microsecond=0)
+        record_prices([
+            (self.product.pk, Decimal('100.00'), day),
+            (self.product.pk, Decimal('80.00'), day + timedelta(hours=2)),
+            (self.product.pk, Decimal('90.00'), day + timedelta(hours=4)),
+            (self.product.pk, Decimal('70.00'), day + timedelta(days=1)),
+            (self.product.pk, Decimal('75.00'), timezone.now()),
+        ])
+
+        removed, buckets = compact_price_history(raw_days=30)
+
+        self.assertEqual((removed, buckets), (4, 2))
+        self.assertEqual(self.prices(), [
+            ('day', Decimal('90.00'), Decimal('80.00'), Decimal('100.00')),
+            ('day', Decimal('70.00'), Decimal('70.00'), Decimal('70.00')),
+            ('raw', Decimal('75.00'), None, None),
+        ])
+
+    def test_price_history_endpoint(self):
+        url = reverse('product-price-history', kwargs={'pk': self.product.pk})
+        Product.objects.filter(pk=self.product.pk).update(price=Decimal('80.00'))
+        from .prices import record_prices
+        record_prices([(self.product.pk, Decimal('80.00'))])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['price'] for row in response.data], ['100.00', '80.00'])
+
+        response = self.client.get(url, {'since': (timezone.now() + timedelta(days=1)).date().isoformat()})
+        self.assertEqual(response.data, [])
+        response = self.client.get(url, {'since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        for since in ('2026-13-45', '2026-02-30T10:00:00', '2026-01-01T25:00:00'):
+            response = self.client.get(url, {'since': since})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, since)
+            self.assertIn('since', response.data)
+        response = self.client.get(reverse('product-price-history', kwargs={'pk': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_bulk_import_records_prices(self):
+        from .bulk import import_products, iter_rows
+        lines = [
+            'name,price,url,category\n',
+            'Headphones,85.00,https://example.com/headphones,\n',
+            'Lamp,20.00,https://example.com/lamp,\n',
+        ]
+        import_products(iter_rows(lines, 'csv'), self.user)
+
+        lamp = Product.objects.get(url='https://example.com/lamp')
+        self.assertEqual([price for _, price, _, _ in self.prices()], [Decimal('100.00'), Decimal('85.00')])
+        self.assertEqual([price for _, price, _, _ in self.prices(lamp)], [Decimal('20.00')])
+
+
+def make_image_upload(name='photo.png', size=(2000, 1000), color=(200, 30, 30, 255)):
+    buffer = BytesIO()
+    Image.new('RGBA', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ProductImageTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root, IMAGE_PROCESSING_SYNC=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+
+    def create_product(self, url, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(
+                name='Lamp', price=Decimal('10.00'), url=url, user=self.user, image=image
+            )
+
+    def test_upload_generates_derivatives_keyed_by_hash(self):
+        from .images import IMAGE_SIZES, derivative_name
+        product = self.create_product('https://example.com/lamp', make_image_upload())
+        product.refresh_from_db()
+
+        self.assertEqual(len(product.image_hash), 64)
+        for size, width in IMAGE_SIZES.items():
+            for file_format in ('webp', 'jpeg'):
+                with default_storage.open(derivative_name(product.image_hash, size, file_format)) as file:
+                    with Image.open(file) as derivative:
+                        self.assertEqual(derivative.size, (width, width // 2))
+                        self.assertEqual(derivative.format, file_format.upper())
+
+        response = self.client.get(reverse('product-list-create'))
+        srcset = response.json()['results'][0]['image_srcset']
+        self.assertIn(f'{product.image_hash}/thumb.webp 160w', srcset['webp'])
+        self.assertIn(f'{product.image_hash}/full.jpg 1280w', srcset['jpeg'])
+        self.assertTrue(srcset['src'].endswith(f'{product.image_hash}/card.jpg'))
+
+    def test_same_bytes_reuse_existing_derivatives(self):
+        from .images import generate_derivatives
+        first = self.create_product('https://example.com/a', make_image_upload())
+        second = self.create_product('https://example.com/b', make_image_upload('copy.png'))
+        first.refresh_from_db()
+        second.refresh_from_db()
+
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_hash, second.image_hash)
+        self.assertFalse(generate_derivatives(second.image, second.image_hash))
+
+    def test_replacing_image_clears_stale_hash(self):
+        product = self.create_product('https://example.com/lamp', make_image_upload())
+        product = Product.objects.get(pk=product.pk)
+        old_hash = product.image_hash
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            product.image = make_image_upload(color=(0, 0, 255, 255))
+            product.save()
+        self.assertEqual(Product.objects.get(pk=product.pk).image_hash, '')
+
+        for callback in callbacks:
+            callback()
+        product.refresh_from_db()
+        self.assertNotIn(product.image_hash, ('', old_hash))
+
+    def test_unchanged_image_is_not_reprocessed(self):
+        product = self.create_product('https://example.com/lamp', make_image_upload())
+        product = Product.objects.get(pk=product.pk)
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            product.name = 'Desk lamp'
+            product.save()
+        self.assertEqual(callbacks, [])
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.product_url = reverse('product-list-create')
+        self.category_url = reverse('category-list-create')
+
+    def test_unchanged_product_list_answers_304_without_queries(self):
+        response = self.client.get(self.product_url)
+        etag = response['ETag']
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.product_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+
+        # Other filters are a different representation
+        response = self.client.get(self.product_url, {'ordering': 'price'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_write_changes_the_product_list_etag(self):
+        etag = self.client.get(self.product_url)['ETag']
+        self.client.force_authenticate(user=self.user)
+        self.client.post(self.product_url, {
+            'name': 'Lamp', 'price': '10.00', 'url': 'https://example.com/lamp'
+        })
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get(self.product_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_category_list_etag(self):
+        etag = self.client.get(self.category_url)['ETag']
+        response = self.client.get(self.category_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.client.force_authenticate(user=self.user)
+        self.client.post(self.category_url, {'name': 'Books'})
+        response = self.client.get(self.category_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_orm_writes_outside_the_api_change_the_etags(self):
+        # As the admin, a shell or a fixture would write
+        product_etag = self.client.get(self.product_url)['ETag']
+        category_etag = self.client.get(self.category_url)['ETag']
+        category = Category.objects.create(name='Books', slug='books')
+        product = Product.objects.create(
+            name='Novel', price=Decimal('12.50'), url='https://example.com/novel', user=self.user, category=category
+        )
+
+        for url, etag in ((self.product_url, product_etag), (self.category_url, category_etag)):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response['ETag']
+            if url == self.product_url:
+                product_etag = etag
+            else:
+                category_etag = etag
+
+        category.name = 'Fiction'
+        category.save()
+        response = self.client.get(self.product_url, HTTP_IF_NONE_MATCH=product_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'][0]['category'], 'Category Fiction')
+
+        etag = response['ETag']
+        product.delete()
+        response = self.client.get(self.product_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'], [])
+
+    def test_applied_migrations_change_the_etags(self):
+        from django.apps import apps
+        from django.db.models.signals import post_migrate
+        etag = self.client.get(self.product_url)['ETag']
+        config = apps.get_app_config('tasks')
+        post_migrate.send(sender=config, app_config=config, plan=[])
+        self.assertEqual(self.client.get(self.product_url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        post_migrate.send(sender=config, app_config=config, plan=[('migration', False)])
+        self.assertEqual(self.client.get(self.product_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class RenderedResponseCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        for i in range(30):
+            Product.objects.create(
+                name=f'Product {i}', price=Decimal('10.00'),
+                url=f'https://example.com/p{i}', user=self.user
+            )
+        self.product_url = reverse('product-list-create')
+
+    def test_hit_serves_stored_bytes_without_queries(self):
+        first = self.client.get(self.product_url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.product_url)
+
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+        self.assertEqual(int(second['Content-Length']), len(second.content))
+        self.assertEqual(len(second.json()['results']), 20)
+
+    def test_gzip_clients_get_the_compressed_bytes(self):
+        import gzip
+        plain = self.client.get(self.product_url)
+        compressed = self.client.get(self.product_url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertEqual(compressed['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', compressed['Vary'])
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+
+    def test_media_type_variants_are_cached_separately(self):
+        indented = self.client.get(self.product_url, HTTP_ACCEPT='application/json; indent=2')
+        self.assertEqual(indented['Content-Type'], 'application/json; indent=2')
+        self.assertIn(b'\n  ', indented.content)
+        # The indented body does not poison the compact entry
+        compact = self.client.get(self.product_url)
+        self.assertEqual(compact['Content-Type'], 'application/json')
+        self.assertNotIn(b'\n', compact.content)
+        self.assertEqual(compact.json(), indented.json())
+
+
+class ProductListRowSerializerTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        category = Category.objects.create(name='Books')
+        Product.objects.create(
+            name='Plain', price=Decimal('0.50'), url='https://example.com/plain', user=self.user
+        )
+        product = Product.objects.create(
+            name='Illustrated', price=Decimal('1299.00'), url='https://example.com/illustrated',
+            user=self.user, category=category
+        )
+        # Set directly to skip derivative generation
+        Product.objects.filter(pk=product.pk).update(image='products/cover.jpg', image_hash='ab' * 32)
+        self.product_url = reverse('product-list-create')
+
+    def test_parity_with_model_serializer(self):
+        from rest_framework.test import APIRequestFactory
+        from .serializers import ProductListRowSerializer, ProductListSerializer
+        request = APIRequestFactory().get('/')
+        queryset = Product.objects.select_related('user', 'category').order_by('id')
+
+        for context in ({}, {'request': request}):
+            expected = ProductListSerializer(queryset, many=True, context=context).data
+            actual = ProductListRowSerializer(ProductListRowSerializer.values(queryset), context=context).data
+            self.assertEqual(actual, [dict(row) for row in expected])
+
+    def test_list_endpoint_uses_rows(self):
+        from rest_framework.test import APIRequestFactory
+        from .serializers import ProductListSerializer
+        expected = ProductListSerializer(
+            Product.objects.select_related('user', 'category'), many=True,
+            context={'request': APIRequestFactory().get('/')}
+        ).data
+
+        for params in ({}, {'pagination': 'cursor'}):
+            cache.clear()
+            response = self.client.get(self.product_url, params)
+            self.assertEqual(response.json()['results'], [dict(row) for row in expected])
+
+
+
+class AsyncReadViewsTest(APITestCase):
+    def setUp(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.auth = f'Bearer {AccessToken.for_user(self.user)}'
+        self.category = Category.objects.create(name='Books')
+        for i in range(25):
+            Product.objects.create(
+                name=f'Product {i}', price=Decimal('10.00'), url=f'https://example.com/p{i}',
+                user=self.user, category=self.category if i % 2 else None
+            )
+        self.product_url = reverse('product-list-create')
+
+    def call(self, view, path, method='get', **extra):
+        from asgiref.sync import async_to_sync
+        from django.test import RequestFactory
+        request = getattr(RequestFactory(), method)(path, **extra)
+        return async_to_sync(view)(request, **extra.pop('kwargs', {}))
+
+    def test_lists_match_the_sync_views(self):
+        import json
+        from .async_views import AsyncCategoryList, AsyncProductList
+        category_url = reverse('category-list-create')
+        cases = [
+            (AsyncProductList.as_view(), self.product_url, {}),
+            (AsyncProductList.as_view(), self.product_url, {'page': 2}),
+            (AsyncProductList.as_view(), self.product_url, {'category': self.category.pk}),
+            (AsyncProductList.as_view(), self.product_url, {'q': 'product 1', 'ordering': 'name'}),
+            (AsyncCategoryList.as_view(), category_url, {}),
+        ]
+        for view, url, params in cases:
+            with self.subTest(url=url, params=params):
+                cache.clear()
+                expected = self.client.get(url, params, HTTP_AUTHORIZATION=self.auth)
+                cache.clear()
+                response = self.call(view, url, data=params, HTTP_AUTHORIZATION=self.auth)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(json.loads(response.content), expected.json())
+
+    def test_shares_cache_entries_and_validators_with_the_sync_view(self):
+        from .async_views import AsyncProductList
+        expected = self.client.get(self.product_url)
+        # Not invalidated, so only a cache hit can still return the old name
+        Product.objects.update(name='Renamed')
+
+        with self.assertNumQueries(0):
+            response = self.call(AsyncProductList.as_view(), self.product_url)
+            not_modified = self.call(
+                AsyncProductList.as_view(), self.product_url, HTTP_IF_NONE_MATCH=expected['ETag']
+            )
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_product_detail(self):
+        import json
+        from .async_views import AsyncProductDetail
+        product = Product.objects.filter(category=self.category).first()
+        url = reverse('product-detail', args=[product.pk])
+        view = AsyncProductDetail.as_view()
+
+        response = self.call(view, url, kwargs={'pk': product.pk})
+        self.assertEqual(json.loads(response.content), self.client.get(url).json())
+        missing = self.call(view, url, kwargs={'pk': 0})
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_and_bad_tokens_go_to_the_drf_view(self):
+        import json
+        from .async_views import AsyncProductList
+        view = AsyncProductList.as_view()
+
+        response = self.call(
+            view, self.product_url, method='post',
+            data=json.dumps({'name': 'Lamp', 'price': '5.00', 'url': 'https://example.com/lamp'}),
+            content_type='application/json', HTTP_AUTHORIZATION=self.auth
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.call(view, self.product_url, HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+# Most queries each endpoint may run per request, at any data size. Reads are
+# measured with a cold cache and a real JWT, so the user lookup counts.
+QUERY_BUDGETS = {
+    'category-list-create GET': 3,
+    'category-list-create POST': 3,
+    'category-detail GET': 2,
+    'category-detail PATCH': 3,
+    'product-list-create GET': 4,
+    'product-list-create POST': 14,
+    'product-bulk GET': 2,
+    'product-bulk POST': 13,
+    'product-detail GET': 2,
+    'product-detail PATCH': 11,
+    'product-price-history GET': 2,
+}
+DATA_SIZES = (1, 5, 15)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class QueryBudgetTest(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='testuser',
+            email='test@example.com',
+            password='testpass123'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        self.product = Product.objects.create(
+            name='Tracked', price=Decimal('10.00'), url='https://example.com/tracked', user=self.user
+        )
+        self.created = 0
+
+    def populate(self, size):
+        """Grow the data to size categories, products (of several owners) and price points."""
+        owners = [self.user] + [
+            User.objects.create_user(username=f'owner{i}', email=f'owner{i}@example.com', password='x')
+            for i in range(User.objects.count() - 1, 3)
+        ]
+        for i in range(Category.objects.count(), size):
+            Category.objects.create(name=f'Category {i}')
+        categories = list(Category.objects.all())
+        for i in range(Product.objects.count(), size + 1):
+            Product.objects.create(
+                name=f'Product {i}', price=Decimal('5.00'), url=f'https://example.com/product/{i}',
+                user=owners[i % len(owners)], category=categories[i % len(categories)]
+            )
+        start = timezone.now() - timedelta(days=30)
+        for i in range(self.product.price_history.count(), size):
+            PriceHistory.objects.create(
+                product=self.product, observed_at=start + timedelta(hours=i), price=Decimal(10 + i)
+            )
+
+    def cold(self, request):
+        def make_request():
+            cache.clear()
+            response = request()
+            if response.streaming:
+                b''.join(response.streaming_content)
+            self.assertLess(response.status_code, 400, getattr(response, 'data', None))
+        return make_request
+
+    def check(self, endpoint, request):
+        self.assertQueryBudgetAtSizes(QUERY_BUDGETS[endpoint], DATA_SIZES, self.populate, self.cold(request))
+
+    def bump(self):
+        self.created += 1
+        return self.created
+
+    def new_name(self, prefix):
+        return f'{prefix} {self.bump()}'
+
+    def test_category_list(self):
+        self.check('category-list-create GET', lambda: self.client.get(reverse('category-list-create')))
+
+    def test_category_create(self):
+        self.check('category-list-create POST', lambda: self.client.post(
+            reverse('category-list-create'), {'name': self.new_name('New category')}
+        ))
+
+    def test_category_detail(self):
+        url = lambda: reverse('category-detail', args=[Category.objects.first().slug])
+        self.check('category-detail GET', lambda: self.client.get(url()))
+        self.check('category-detail PATCH', lambda: self.client.patch(url(), {'description': 'Updated'}))
+
+    def test_product_list(self):
+        url = reverse('product-list-create')
+        self.check('product-list-create GET', lambda: self.client.get(url))
+        self.check('product-list-create GET', lambda: self.client.get(url, {'pagination': 'cursor'}))
+        self.check('product-list-create GET', lambda: self.client.get(url, {'q': 'Product'}))
+        self.check('product-list-create GET', lambda: self.client.get(
+            url, {'category': Category.objects.first().pk, 'ordering': 'price'}
+        ))
+
+    def test_product_create(self):
+        self.check('product-list-create POST', lambda: self.client.post(reverse('product-list-create'), {
+            'name': self.new_name('New product'), 'price': '3.00',
+            'url': f'https://example.com/new/{self.created}', 'category': Category.objects.first().pk
+        }))
+
+    def test_product_detail(self):
+        url = reverse('product-detail', args=[self.product.pk])
+        self.check('product-detail GET', lambda: self.client.get(url))
+        # A new price each time, so every update records a price change
+        self.check('product-detail PATCH', lambda: self.client.patch(url, {'price': f'{self.bump()}.00'}))
+
+    def test_price_history(self):
+        url = reverse('product-price-history', args=[self.product.pk])
+        self.check('product-price-history GET', lambda: self.client.get(url))
+
+    def test_bulk(self):
+        url = reverse('product-bulk')
+        self.check('product-bulk GET', lambda: self.client.get(url))
+
+        def import_rows():
+            # New prices for every owned product and one new product per call
+            price = self.bump()
+            products = list(Product.objects.filter(user=self.user))
+            body = 'name,price,url,category\n' + ''.join(
+                f'{product.name},{price}.00,{product.url},\n' for product in products
+            ) + f'Imported {price},{price}.00,https://example.com/imported/{price},\n'
+            return self.client.generic('POST', url, body.encode('utf-8'), content_type='text/csv')
+        self.check('product-bulk POST', import_rows)
+
+
+class SeedBenchmarkDataTest(TestCase):
+    def seed(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+        call_command(
+            'seed_benchmark_data', '--users', '10', '--categories', '20', '--products', '300',
+            *args, stdout=StringIO()
+        )
+
+    def test_seeds_skewed_data_with_consistent_counters(self):
+        from django.core.management.base import CommandError
+        from django.db.models import Count
+        self.seed()
+        users = User.objects.annotate(actual=Count('products')).order_by('-products_count')
+        self.assertEqual(sum(user.products_count for user in users), 300)
+        self.assertTrue(all(user.products_count == user.actual for user in users))
+        # The heaviest owner has several times the average
+        self.assertGreater(users[0].products_count, 3 * 300 / 10)
+        self.assertEqual(Category.objects.count(), 20)
+        self.assertTrue(self.client.login(email=users[0].email, password='benchmark'))
+
+        with self.assertRaises(CommandError):
+            self.seed()
+        self.seed('--clear')
+        self.assertEqual(Product.objects.count(), 300)
@@ -1,10 +1,23 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+if settings.ASYNC_VIEWS:
+    from .async_views import AsyncCategoryList, AsyncProductDetail, AsyncProductList
+    category_list_view = AsyncCategoryList.as_view()
+    product_list_view = AsyncProductList.as_view()
+    product_detail_view = AsyncProductDetail.as_view()
+else:
+    category_list_view = views.CategoryListCreateView.as_view()
+    product_list_view = views.ProductList.as_view()
+    product_detail_view = views.ProductDetail.as_view()
+
 urlpatterns = [
-    path('categories/', views.CategoryListCreateView.as_view(), name='category-list-create'),
+    path('categories/', category_list_view, name='category-list-create'),
     path('categories/<slug:slug>/', views.CategoryDetailView.as_view(), name='category-detail'),
     
-    path('products/', views.ProductList.as_view(), name='product-list-create'),
-    path('products/<int:pk>/', views.ProductDetail.as_view(), name='product-detail'),
+    path('products/', product_list_view, name='product-list-create'),
+    path('products/bulk/', views.ProductBulkView.as_view(), name='product-bulk'),
+    path('products/<int:pk>/', product_detail_view, name='product-detail'),
+    path('products/<int:pk>/price-history/', views.ProductPriceHistoryView.as_view(), name='product-price-history'),
 ]
\ No newline at end of file
@@ -1,28 +1,44 @@
+from datetime import datetime, time
+
 from rest_framework import generics, permissions, status, filters
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.exceptions import ValidationError, NotFound
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db.models import Count
 from django.shortcuts import get_object_or_404
-from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.response_cache import entry_response, is_cacheable, render_entry
 from .cache_utils import (
-    cache_products_list, get_cached_products_list,
-    cache_categories_list, get_cached_categories_list,
-    invalidate_user_cache
+    CATEGORIES_NAMESPACE, PRODUCTS_NAMESPACE,
+    get_or_compute_products_list, get_or_compute_categories_list,
+    get_namespace_validator, normalize_list_params, pagination_mode, user_namespace
 )
 
 from .models import Category, Product
 from .serializers import (
     CategorySerializer,
     ProductListSerializer,
+    ProductListRowSerializer,
     ProductDetailSerializer,
-    ProductCreateUpdateSerializer
+    ProductCreateUpdateSerializer,
+    PriceHistorySerializer
 )
 from .permissions import IsAuthorOrReadOnly
+from .pagination import KeysetPagination
+from .search import search_products, is_full_text_search_available
+from .prices import get_price_series
+from .bulk import (
+    EXPORT_CONTENT_TYPES, IMPORT_FORMATS, DEFAULT_BATCH_SIZE,
+    export_products, import_products, iter_lines, iter_rows
+)
 
 
-class CategoryListCreateView(generics.ListCreateAPIView):
-    queryset = Category.objects.all()
+class CategoryListCreateView(ConditionalGetMixin, generics.ListCreateAPIView):
+    queryset = Category.objects.annotate(products_count=Count('products'))
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -30,59 +46,72 @@ class CategoryListCreateView(generics.ListCreateAPIView):
     ordering_fields = ['name']
     ordering = ['name']
 
+    def get_etag_parts(self, request):
+        # Valid exactly as long as the cached list page is
+        validator = get_namespace_validator(CATEGORIES_NAMESPACE)
+        return [validator] if validator else None
+
     def list(self, request, *args, **kwargs):
-        # Try to get cached data first
-        cached_data = get_cached_categories_list()
-        if cached_data:
-            return Response(cached_data)
-        
-        # If not cached, get data from database
-        response = super().list(request, *args, **kwargs)
-        
-        # Cache the response data
-        cache_categories_list(response.data)
-        
-        return response
+        filters = normalize_list_params(request.query_params, self.ordering_fields, 'name')
 
-    def create(self, request, *args, **kwargs):
-        response = super().create(request, *args, **kwargs)
-        if response.status_code == 201:
-            # Invalidate categories cache when new category is created
-            cache.delete('categories_list')
-        return response
+        compute = lambda: super(CategoryListCreateView, self).list(request, *args, **kwargs).data
+        if not is_cacheable(request):
+            return Response(compute())
+
+        # Serve the rendered bytes from cache; only one worker rebuilds an expired page
+        entry = get_or_compute_categories_list(
+            filters, lambda: render_entry(self, compute()), request.accepted_media_type
+        )
+        return entry_response(entry, request)
 
 
 class CategoryDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Category.objects.all()
+    queryset = Category.objects.annotate(products_count=Count('products'))
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'slug'
 
 
-class ProductList(generics.ListCreateAPIView):
+class ProductList(ConditionalGetMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['category']
     search_fields = ['name', 'category__name']
     ordering_fields = ['created_at', 'updated_at', 'name', 'price']
-    ordering = ['-created_at']
+
+    @property
+    def ordering(self):
+        # Ranked search results come first unless the client asks for an ordering
+        if self.request.query_params.get('q', '').strip() and is_full_text_search_available():
+            return ['-search_rank', '-created_at']
+        return ['-created_at']
+
+    @property
+    def paginator(self):
+        # Infinite-scroll clients opt in to keyset pagination with ?pagination=cursor
+        if not hasattr(self, '_paginator'):
+            if pagination_mode(self.request.query_params) == 'cursor':
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = self.pagination_class() if self.pagination_class else None
+        return self._paginator
 
     def get_serializer_class(self):
         if self.request.method == 'POST':
             return ProductCreateUpdateSerializer
         return ProductListSerializer
 
+    def get_etag_parts(self, request):
+        # Same namespaces as the list cache key, so no query is needed
+        validator = get_namespace_validator(PRODUCTS_NAMESPACE, user_namespace(request.user.id))
+        return [validator] if validator else None
+
     def get_queryset(self):
-        qs = Product.objects.select_related('user', 'category').all()
+        qs = Product.objects.select_related('user', 'category').defer('search_vector')
 
         q = self.request.query_params.get('q')
         if q:
-            qs = qs.filter(
-                Q(name__icontains=q) |
-                Q(url__icontains=q) |
-                Q(category__name__icontains=q) |
-                Q(user__username__icontains=q)
-            )
+            qs = search_products(qs, q)
 
         ordering = self.request.query_params.get('ordering')
         if ordering:
@@ -94,30 +123,31 @@ class ProductList(generics.ListCreateAPIView):
         return qs
 
     def list(self, request, *args, **kwargs):
-        # Create cache key based on filters
-        filters = {
-            'q': request.query_params.get('q', ''),
-            'category': request.query_params.get('category', ''),
-            'ordering': request.query_params.get('ordering', '-created_at')
-        }
+        # Create cache key based on filters and pagination
+        filters = normalize_list_params(request.query_params, self.ordering_fields, '-created_at')
         
-        # Try to get cached data first
-        cached_data = get_cached_products_list(request.user.id, filters)
-        if cached_data:
-            return Response(cached_data)
-        
-        # If not cached, get data from database
-        response = super().list(request, *args, **kwargs)
-        
-        # Cache the response data
-        cache_products_list(request.user.id, filters, response.data)
-        
-        return response
+        compute = lambda: self.list_rows(request)
+        if not is_cacheable(request):
+            return Response(compute())
+
+        # Serve the rendered bytes from cache; only one worker rebuilds an expired page
+        entry = get_or_compute_products_list(
+            request.user.id, filters, lambda: render_entry(self, compute()), request.accepted_media_type
+        )
+        return entry_response(entry, request)
+
+    def list_rows(self, request):
+        """Build the page from values_list rows rather than model instances."""
+        queryset = ProductListRowSerializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return ProductListRowSerializer(queryset, context=self.get_serializer_context()).data
+        data = ProductListRowSerializer(page, context=self.get_serializer_context()).data
+        return self.get_paginated_response(data).data
 
     def perform_create(self, serializer):
+        # The post_save receiver invalidates the cached lists
         serializer.save(user=self.request.user)
-        # Invalidate user's product cache
-        invalidate_user_cache(self.request.user.id)
 
 
 class ProductDetail(generics.RetrieveUpdateDestroyAPIView):
@@ -129,13 +159,97 @@ class ProductDetail(generics.RetrieveUpdateDestroyAPIView):
             return ProductCreateUpdateSerializer
         return ProductDetailSerializer
 
-    def perform_update(self, serializer):
-        serializer.save()
-        # Invalidate user's product cache
-        invalidate_user_cache(self.request.user.id)
 
-    def perform_destroy(self, instance):
-        user_id = instance.user.id
-        instance.delete()
-        # Invalidate user's product cache
-        invalidate_user_cache(user_id)
+class ProductPriceHistoryView(generics.ListAPIView):
+    """Price series of a product; old days come back as min/max buckets."""
+    serializer_class = PriceHistorySerializer
+    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    pagination_class = None
+
+    def parse_datetime_param(self, name):
+        value = self.request.query_params.get(name)
+        if not value:
+            return None
+        try:
+            parsed = parse_datetime(value)
+            if parsed is None:
+                parsed_date = parse_date(value)
+                if parsed_date is not None:
+                    parsed = datetime.combine(parsed_date, time.min)
+        except ValueError:
+            # Well formed but out of range, e.g. 2026-13-45
+            parsed = None
+        if parsed is None:
+            raise ValidationError({name: ['Expected an ISO 8601 date or datetime']})
+        if timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def list(self, request, *args, **kwargs):
+        series = list(get_price_series(
+            self.kwargs['pk'],
+            since=self.parse_datetime_param('since'),
+            until=self.parse_datetime_param('until')
+        ))
+        # Only pay for the existence check when there is nothing to return
+        if not series and not Product.objects.filter(pk=self.kwargs['pk']).exists():
+            raise NotFound('Product not found')
+        return Response(self.get_serializer(series, many=True).data)
+
+
+class ProductBulkView(APIView):
+    """Stream-import and stream-export the current user's products.
+
+    POST accepts a CSV (text/csv) or JSON Lines (application/x-ndjson) body;
+    ?on_conflict=skip leaves existing products untouched. GET streams the
+    user's products back, ?file_format=csv|jsonl.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    # The body is read as a stream, not parsed into request.data
+    parser_classes = []
+
+    content_type_formats = {
+        'text/csv': 'csv',
+        'application/x-ndjson': 'jsonl',
+        'application/jsonl': 'jsonl',
+    }
+
+    def get(self, request, *args, **kwargs):
+        file_format = request.query_params.get('file_format', 'csv')
+        if file_format not in IMPORT_FORMATS:
+            raise ValidationError({'file_format': f'Choose one of: {", ".join(IMPORT_FORMATS)}'})
+
+        queryset = Product.objects.filter(user=request.user)
+        response = StreamingHttpResponse(
+            export_products(queryset, file_format),
+            content_type=EXPORT_CONTENT_TYPES[file_format]
+        )
+        response['Content-Disposition'] = f'attachment; filename="products.{file_format}"'
+        return response
+
+    def post(self, request, *args, **kwargs):
+        content_type = request.content_type.split(';')[0].strip().lower()
+        file_format = self.content_type_formats.get(content_type)
+        if file_format is None:
+            return Response(
+                {'error': f'Unsupported content type "{content_type}"'},
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        try:
+            batch_size = int(request.query_params.get('batch_size', DEFAULT_BATCH_SIZE))
+        except ValueError:
+            raise ValidationError({'batch_size': 'Must be an integer'})
+        update_existing = request.query_params.get('on_conflict', 'update') != 'skip'
+
+        stream = request.stream
+        if stream is None:
+            raise ValidationError({'error': 'Request body is empty'})
+
+        result = import_products(
+            iter_rows(iter_lines(stream), file_format),
+            request.user,
+            batch_size=max(1, min(batch_size, 5000)),
+            update_existing=update_existing
+        )
+        return Response(result, status=status.HTTP_200_OK)
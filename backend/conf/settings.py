@@ -1,6 +1,9 @@
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
+from corsheaders.defaults import default_headers
+from psycopg_pool import ConnectionPool
 import os
+import sys
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -16,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 ]
 
 #secondary django apps
@@ -28,17 +32,20 @@ INSTALLED_APPS += [
 
 #my django apps
 INSTALLED_APPS += [
+    'apps.core',
     'apps.accounts',
     'apps.tasks'
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -71,21 +78,41 @@ DATABASES = {
         "HOST": "localhost",
         "PORT": 5432,
     },
-    'extra': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
 }
 
-CACHES = {
-    "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": config('REDIS_URL', default='redis://localhost:6379/1'),
-        "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
-        }
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis')
+
+if CACHE_BACKEND == 'locmem':
+    # Local-memory fallback for tests and development without Redis
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "wishlist",
+        },
+        "tokens": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "wishlist-tokens",
+        },
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": config('REDIS_URL', default='redis://localhost:6379/1'),
+            "OPTIONS": {
+                # DefaultClient that reports call timings to the request metrics
+                "CLIENT_CLASS": "apps.core.redis_client.InstrumentedClient",
+            }
+        },
+        # Revoked refresh tokens (TOKEN_BLACKLIST_CACHE); never cleared with the default cache
+        "tokens": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": config('TOKEN_BLACKLIST_REDIS_URL', default='redis://localhost:6379/2'),
+            "OPTIONS": {
+                "CLIENT_CLASS": "apps.core.redis_client.InstrumentedClient",
+            }
+        },
     }
-}
 
 # Session configuration
 SESSION_ENGINE = "django.contrib.sessions.backends.cache"
@@ -96,7 +123,50 @@ SESSION_COOKIE_SECURE = not DEBUG
 SESSION_COOKIE_SAMESITE = 'Lax'
 
 # Cache configuration
-CACHE_TTL = 60 * 15  # 15 minutes
+CACHE_TTL = config('CACHE_TTL', default=60 * 15, cast=int)  # 15 minutes
+CACHE_STALE_TTL = 60 * 5  # how long an expired entry may be served while it is rebuilt
+CACHE_LOCK_TIMEOUT = 10  # rebuild lock lifetime, seconds
+CACHE_LOCK_WAIT = 2.0  # how long a cold miss waits for the lock holder, seconds
+CACHE_XFETCH_BETA = 1.0  # >1 favours earlier recomputation
+RESPONSE_CACHE_GZIP_MIN_BYTES = 1024  # cached list bodies at least this large are stored gzipped
+
+# Product page scraper (apps.tasks.scraper)
+SCRAPER_MAX_WORKERS = config('SCRAPER_MAX_WORKERS', default=8, cast=int)
+SCRAPER_PER_DOMAIN = config('SCRAPER_PER_DOMAIN', default=2, cast=int)
+SCRAPER_TIMEOUT = config('SCRAPER_TIMEOUT', default=10, cast=int)
+SCRAPER_MAX_BYTES = 2 * 1024 * 1024
+SCRAPER_CACHE_TTL = 60 * 60 * 24 * 7  # keep validators and parsed metadata for a week
+SCRAPER_USER_AGENT = config('SCRAPER_USER_AGENT', default='WishlistBot/1.0')
+SCRAPER_ALLOW_PRIVATE_HOSTS = False  # True, or a list of private addresses to allow (e.g. a local test shop)
+
+# Image derivatives (apps.tasks.images)
+IMAGE_WORKERS = config('IMAGE_WORKERS', default=2, cast=int)
+IMAGE_PROCESSING_SYNC = False  # process uploads inline instead of in the worker pool
+
+# New and re-hashed passwords use scrypt with these parameters (apps.accounts.hashers);
+# the remaining hashers still verify older hashes, which are upgraded on login.
+# 2**16 x 8 takes 64 MiB and ~0.2s per hash on one core (manage.py benchmark_hashers).
+PASSWORD_HASHERS = [
+    'apps.accounts.hashers.ScryptPasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+PASSWORD_SCRYPT_WORK_FACTOR = config('PASSWORD_SCRYPT_WORK_FACTOR', default=2**16, cast=int)
+PASSWORD_SCRYPT_BLOCK_SIZE = 8
+PASSWORD_SCRYPT_PARALLELISM = 1
+
+AUTHENTICATION_BACKENDS = [
+    'apps.accounts.backends.BoundedHashingBackend',
+]
+# Password hashes run on a per-process pool (apps.accounts.hashing). Logins
+# beyond the workers plus this many waiting get a 503 instead of queueing.
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=1, cast=int)
+PASSWORD_HASHING_MAX_PENDING = config('PASSWORD_HASHING_MAX_PENDING', default=2, cast=int)
+# (attempts, seconds) per client IP, and (failed attempts, seconds) per email
+LOGIN_RATE_LIMIT_IP = (30, 60)
+LOGIN_RATE_LIMIT_ACCOUNT = (5, 15 * 60)
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -144,7 +214,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication reading the user from a cached snapshot
+        'apps.accounts.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -157,16 +228,31 @@ REST_FRAMEWORK = {
         'rest_framework.filters.OrderingFilter',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',
+        'apps.core.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PARSER_CLASSES': [
-        'rest_framework.parsers.JSONParser',
+        'apps.core.renderers.FastJSONParser',
         'rest_framework.parsers.MultiPartParser',
         'rest_framework.parsers.FormParser',
     ],
+    # Reverse proxies in front of the app. Client IPs (login rate limits)
+    # come from REMOTE_ADDR at 0, else from that many X-Forwarded-For hops
+    # from the right; unset, DRF would trust whatever the client sends.
+    'NUM_PROXIES': config('NUM_PROXIES', default=0, cast=int),
 }
 
+# The browsable API is a development aid only
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('rest_framework.renderers.BrowsableAPIRenderer')
+
+# 'orjson' (falls back to the stdlib when orjson is not installed) or 'stdlib'
+JSON_BACKEND = config('JSON_BACKEND', default='orjson')
+
+# Serve the hot read endpoints (product list/detail, category list, profile)
+# with native async views. Enable when running conf.asgi under uvicorn; under
+# WSGI every async view would be wrapped in async_to_sync.
+ASYNC_VIEWS = config('ASYNC_VIEWS', default=False, cast=bool)
+
 
 from datetime import timedelta
 
@@ -175,7 +261,7 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    'UPDATE_LAST_LOGIN': False,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'VERIFYING_KEY': None,
@@ -183,7 +269,21 @@ SIMPLE_JWT = {
     'AUTH_HEADER_NAME': 'HTTP_AUTHORIZATION',
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.accounts.serializers.TokenRefreshSerializer',
 }
+# Blacklisted refresh token ids live in this cache until the token would have
+# expired (apps.accounts.tokens). An evicted or cleared entry revives a revoked
+# token, so in production it must be its own Redis database on a server with
+# maxmemory-policy noeviction (or no maxmemory), never an LRU or locmem cache;
+# the accounts.W001 check warns about the latter.
+TOKEN_BLACKLIST_CACHE = 'tokens'
+
+# Authentication reads users from a cached copy of their row, deleted on every
+# write to the user (apps.accounts.authentication)
+AUTH_USER_SNAPSHOT_TIMEOUT = 300
+# Build request.user from the token claims alone, without even the cache read.
+# A deactivated user then keeps access until the access token expires.
+JWT_STATELESS_AUTH = config('JWT_STATELESS_AUTH', default=False, cast=bool)
 
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
@@ -200,14 +300,68 @@ CORS_ALLOWED_ORIGINS = config(
     cast=lambda v: [s.strip() for s in v.split(',')]
 )
 CORS_ALLOW_CREDENTIALS = True
-
-# Database connection settings
-DATABASES['default'].update({
-    'CONN_MAX_AGE': 60,
-    'OPTIONS': {
-        'init_command': "SET sql_mode='STRICT_TRANS_TABLES'",
+# Conditional GET: the frontend sends If-None-Match and reads ETag back
+CORS_ALLOW_HEADERS = (*default_headers, 'if-none-match', 'if-modified-since')
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified', 'Server-Timing']
+
+# Database connections. With DB_POOL each process keeps a psycopg pool of
+# DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE connections; size the maximum to the
+# gunicorn threads per worker, and workers * DB_POOL_MAX_SIZE to fit the
+# server's max_connections. Without it, connections persist for
+# DB_CONN_MAX_AGE seconds. Either way a connection is checked before reuse:
+# by the pool's check callback when pooled (Django skips CONN_HEALTH_CHECKS
+# for pooled connections), by CONN_HEALTH_CHECKS otherwise. That catches
+# connections broken by a database restart or failover.
+DB_POOL = config('DB_POOL', default=True, cast=bool)
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+if DB_POOL:
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # the pool manages connection lifetime
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': config('DB_POOL_MIN_SIZE', default=1, cast=int),
+            'max_size': config('DB_POOL_MAX_SIZE', default=4, cast=int),
+            # Seconds a request waits for a free connection before failing
+            'timeout': config('DB_POOL_TIMEOUT', default=10, cast=float),
+            'max_idle': config('DB_POOL_MAX_IDLE', default=300, cast=float),
+            'max_lifetime': config('DB_POOL_MAX_LIFETIME', default=1800, cast=float),
+            # Test each connection on checkout; a broken one is replaced
+            'check': ConnectionPool.check_connection,
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = config('DB_CONN_MAX_AGE', default=60, cast=int)
+
+# Read replicas: comma-separated host[:port] list sharing the primary's
+# credentials. Each becomes a `replicaN` alias used by the router below.
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config('DATABASE_REPLICA_HOSTS', default='', cast=Csv()), start=1):
+    host, _, port = replica.partition(':')
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': int(port) if port else DATABASES['default']['PORT'],
+        'OPTIONS': {**DATABASES['default'].get('OPTIONS', {})},
+        'TEST': {'MIRROR': 'default'},
     }
-})
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+# `manage.py test` gets a second, independent database, so the router is
+# tested against real connections (apps.core.tests.ReplicaRoutingTest)
+if sys.argv[1:2] == ['test']:
+    DATABASES['replica'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}
+
+DATABASE_ROUTERS = ['apps.core.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = 5  # read-your-writes window after a client writes
+REPLICA_MAX_LAG_SECONDS = 5  # replicas further behind are skipped
+REPLICA_HEALTH_CHECK_INTERVAL = 10  # seconds between health checks per replica
+
+# Request metrics (apps.core.metrics). Each worker buffers its counters and
+# adds them to a Redis hash every METRICS_FLUSH_INTERVAL seconds, so /metrics
+# reports totals over all gunicorn workers.
+METRICS_FLUSH_INTERVAL = 5
+METRICS_SERVER_TIMING = config('METRICS_SERVER_TIMING', default=True, cast=bool)
+METRICS_SLOW_REQUEST_SECONDS = 1.0  # slower requests are logged with their breakdown
+METRICS_TOKEN = config('METRICS_TOKEN', default='')  # required as a Bearer token when set
 
 # Logging configuration
 LOGGING = {
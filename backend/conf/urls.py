@@ -2,13 +2,16 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from apps.core.views import HealthView, metrics_view
 
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     
     path('api/v1/auth/', include('apps.accounts.urls')),
-    path('api/v1/tasks/', include('apps.tasks.urls'))
+    path('api/v1/tasks/', include('apps.tasks.urls')),
+    path('api/v1/health/', HealthView.as_view(), name='health'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
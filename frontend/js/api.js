@@ -6,11 +6,14 @@ class API {
     constructor() {
         this.baseURL = API_BASE_URL;
         this.token = localStorage.getItem('access_token');
+        // url -> { etag, data } of the last 200 response, for conditional GETs
+        this.validators = new Map();
     }
 
     // Set authentication token
     setToken(token) {
         this.token = token;
+        this.validators.clear();
         localStorage.setItem('access_token', token);
     }
 
@@ -34,15 +37,29 @@ class API {
             headers: this.getHeaders(),
             ...options,
         };
+        const isGet = !config.method || config.method === 'GET';
+        const cached = isGet ? this.validators.get(url) : null;
+        if (cached) {
+            // Ask the server to answer 304 if our copy is still current
+            config.headers = { ...config.headers, 'If-None-Match': cached.etag };
+        }
 
         try {
             const response = await fetch(url, config);
+            if (response.status === 304 && cached) {
+                return cached.data;
+            }
             const data = await response.json();
 
             if (!response.ok) {
                 throw new Error(data.detail || data.error || `HTTP ${response.status}`);
             }
 
+            const etag = response.headers.get('ETag');
+            if (isGet && etag) {
+                this.validators.set(url, { etag, data });
+            }
+
             return data;
         } catch (error) {
             console.error('API Request failed:', error);
@@ -91,6 +108,7 @@ class API {
         }
         
         this.token = null;
+        this.validators.clear();
         localStorage.removeItem('access_token');
         localStorage.removeItem('refresh_token');
     }
@@ -120,6 +138,13 @@ class API {
         return await this.request(endpoint);
     }
 
+    // Follow a `next` link returned by a paginated endpoint
+    async getNextPage(nextUrl) {
+        const url = new URL(nextUrl);
+        const basePath = new URL(this.baseURL).pathname;
+        return await this.request(url.pathname.replace(basePath, '') + url.search);
+    }
+
     async getProduct(id) {
         return await this.request(`/tasks/products/${id}/`);
     }
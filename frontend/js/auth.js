@@ -155,7 +155,12 @@ class AuthManager {
         // Update avatar
         const avatarImg = document.getElementById('profileAvatar');
         if (avatarImg && this.user.avatar) {
-            avatarImg.src = this.user.avatar;
+            const srcset = this.user.avatar_srcset;
+            if (srcset) {
+                avatarImg.srcset = srcset.jpeg;
+                avatarImg.sizes = '160px';
+            }
+            avatarImg.src = srcset ? srcset.src : this.user.avatar;
             avatarImg.style.display = 'block';
         } else if (avatarImg) {
             avatarImg.style.display = 'none';
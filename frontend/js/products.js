@@ -4,6 +4,8 @@ class ProductsManager {
         this.products = [];
         this.categories = [];
         this.currentPage = 1;
+        this.nextPageUrl = null;
+        this.loadingMore = false;
         this.filters = {
             search: '',
             category: '',
@@ -46,6 +48,16 @@ class ProductsManager {
             });
         }
 
+        // Infinite scroll: fetch the next keyset page near the bottom of the list
+        window.addEventListener('scroll', debounce(() => {
+            const page = document.getElementById('productsPage');
+            if (!page || !page.classList.contains('active')) return;
+            const nearBottom = window.innerHeight + window.scrollY >= document.body.offsetHeight - 400;
+            if (nearBottom) {
+                this.loadMoreProducts();
+            }
+        }, 100));
+
         // Add product form
         const addProductForm = document.getElementById('addProductForm');
         if (addProductForm) {
@@ -107,7 +119,8 @@ class ProductsManager {
     async loadProducts() {
         try {
             showLoading();
-            const params = {};
+            // Cursor pagination: no COUNT(*) and constant cost per page
+            const params = { pagination: 'cursor' };
             
             if (this.filters.search) params.q = this.filters.search;
             if (this.filters.category) params.category = this.filters.category;
@@ -115,6 +128,7 @@ class ProductsManager {
 
             const response = await api.getProducts(params);
             this.products = response.results || response;
+            this.nextPageUrl = response.next || null;
             this.renderProducts();
             this.updateDashboardStats();
             hideLoading();
@@ -125,6 +139,24 @@ class ProductsManager {
         }
     }
 
+    async loadMoreProducts() {
+        if (!this.nextPageUrl || this.loadingMore) return;
+
+        this.loadingMore = true;
+        try {
+            const response = await api.getNextPage(this.nextPageUrl);
+            this.products = this.products.concat(response.results || []);
+            this.nextPageUrl = response.next || null;
+            this.renderProducts();
+            this.updateDashboardStats();
+        } catch (error) {
+            console.error('Failed to load more products:', error);
+            showToast('Failed to load more products', 'error', 'Error');
+        } finally {
+            this.loadingMore = false;
+        }
+    }
+
     renderProducts() {
         const container = document.getElementById('productsList');
         if (!container) return;
@@ -143,14 +175,32 @@ class ProductsManager {
         container.innerHTML = this.products.map(product => this.createProductCard(product)).join('');
     }
 
+    createProductImage(product, imageUrl) {
+        const fallback = "this.src='https://via.placeholder.com/300x200?text=No+Image'";
+        const srcset = product.image_srcset;
+        if (!srcset) {
+            // Derivatives are generated in the background; use the original meanwhile
+            return `<img src="${imageUrl}" alt="${product.name}" class="product-image" loading="lazy"
+                     onerror="${fallback}">`;
+        }
+        // Cards are at most ~320px wide; let the browser pick the smallest fitting size
+        const sizes = '(max-width: 600px) 100vw, 320px';
+        return `
+                <picture>
+                    <source type="image/webp" srcset="${srcset.webp}" sizes="${sizes}">
+                    <img src="${srcset.src}" srcset="${srcset.jpeg}" sizes="${sizes}"
+                         alt="${product.name}" class="product-image" loading="lazy"
+                         onerror="${fallback}">
+                </picture>`;
+    }
+
     createProductCard(product) {
         const category = this.categories.find(cat => cat.id === product.category);
         const imageUrl = product.image || 'https://via.placeholder.com/300x200?text=No+Image';
         
         return `
             <div class="product-card" data-product-id="${product.id}">
-                <img src="${imageUrl}" alt="${product.name}" class="product-image" 
-                     onerror="this.src='https://via.placeholder.com/300x200?text=No+Image'">
+                ${this.createProductImage(product, imageUrl)}
                 <div class="product-content">
                     <div class="product-header">
                         <h3 class="product-title">${product.name}</h3>
@@ -37,7 +37,12 @@ class ProfileManager {
         const avatarImg = document.getElementById('profileAvatar');
         if (avatarImg) {
             if (user.avatar) {
-                avatarImg.src = user.avatar;
+                if (user.avatar_srcset) {
+                    // Small derivative instead of the original upload
+                    avatarImg.srcset = user.avatar_srcset.jpeg;
+                    avatarImg.sizes = '160px';
+                }
+                avatarImg.src = user.avatar_srcset ? user.avatar_srcset.src : user.avatar;
                 avatarImg.style.display = 'block';
             } else {
                 avatarImg.style.display = 'none';
@@ -0,0 +1,40 @@
+"""Gunicorn settings, read from the environment.
+
+Each worker process owns its own database connection pool, so keep
+GUNICORN_THREADS <= DB_POOL_MAX_SIZE and
+GUNICORN_WORKERS * DB_POOL_MAX_SIZE below PostgreSQL's max_connections.
+"""
+import logging
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers now and then; the jitter keeps them from reconnecting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = max_requests // 10
+
+logger = logging.getLogger('gunicorn.error')
+
+
+def post_fork(server, worker):
+    # With preload_app the master may have opened connections; sockets must
+    # not be shared between processes, so every worker starts with fresh pools.
+    from apps.core.db import close_pools
+    close_pools()
+
+
+def worker_exit(server, worker):
+    from apps.core.db import close_pools, get_pool_stats
+    from apps.core.metrics import registry
+    # Hand over the increments buffered since the last periodic flush
+    registry.flush()
+    for alias, stats in get_pool_stats().items():
+        logger.info(f"Worker {worker.pid} pool {alias}: {stats}")
+    close_pools()